@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark da compressao extrativa do contexto RAG.
+
+Roda o Brain sobre um corpus rotulado com e sem o ContextCompressor e
+compara tokens de contexto enviados ao LLM (custo de avaliacao do prompt),
+latencia por comando e acuracia das intencoes (action + target).
+Requer a Knowledge Base ja indexada e o modelo Granite disponivel.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+
+from mascate.core.config import Config
+from mascate.core.metrics import get_metrics, reset_metrics
+from mascate.intelligence.brain import Brain
+from mascate.intelligence.llm.granite import GraniteLLM
+from mascate.intelligence.rag.compression import ContextCompressor, compression_ratio
+from mascate.intelligence.rag.context import ContextAssembler
+from mascate.intelligence.rag.knowledge import KnowledgeBase
+from mascate.intelligence.rag.retriever import RAGRetriever
+
+# Corpus rotulado: (fala do usuario, action esperada, targets aceitos).
+# Targets vazios aceitam qualquer alvo (ex: texto livre de 'reply').
+LABELED_CORPUS: list[tuple[str, str, tuple[str, ...]]] = [
+    ("abra o firefox", "open_app", ("firefox",)),
+    ("abre o terminal", "open_app", ("terminal", "gnome-terminal")),
+    ("abre o editor de texto", "open_app", ("gedit", "gnome-text-editor")),
+    ("pausa a musica", "media_control", ("pausa", "pause")),
+    ("proxima musica", "media_control", ("proxima", "next")),
+    ("aumenta o volume", "system_op", ("volume", "vol")),
+    ("desliga o wifi", "system_op", ("wifi",)),
+    ("abra o site github.com", "open_url", ("github.com", "https://github.com")),
+    ("lista os arquivos em Downloads", "file_op", ("list",)),
+    ("cria a pasta capturas", "file_op", ("mkdir",)),
+    ("oi mascate tudo bem", "reply", ()),
+]
+
+
+def run(brain: Brain) -> dict[str, float]:
+    """Executa o corpus e retorna as metricas agregadas."""
+    reset_metrics()
+    latencies: list[float] = []
+    correct = 0
+    for user_input, action, targets in LABELED_CORPUS:
+        start = time.perf_counter()
+        intent = brain.process(user_input)
+        latencies.append(time.perf_counter() - start)
+        if (
+            intent
+            and intent.action == action
+            and (not targets or intent.target in targets)
+        ):
+            correct += 1
+
+    metrics = get_metrics()
+    return {
+        "context_tokens": metrics.get("rag.context.tokens") / len(LABELED_CORPUS),
+        "latency_ms": statistics.median(latencies) * 1000,
+        "accuracy": correct / len(LABELED_CORPUS),
+        "ratio": compression_ratio(
+            metrics.get("rag.compression.tokens_in"),
+            metrics.get("rag.compression.tokens_out"),
+        ),
+    }
+
+
+def main() -> int:
+    """Ponto de entrada."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--budgets",
+        type=int,
+        nargs="+",
+        default=[64, 128, 160, 256],
+        help="Orcamentos de compressao (tokens) a comparar",
+    )
+    args = parser.parse_args()
+
+    config = Config.load()
+    kb = KnowledgeBase(config)
+    retriever = RAGRetriever(
+        kb,
+        hybrid=config.rag.hybrid,
+        rrf_k=config.rag.rrf_k,
+        sparse_threshold=config.rag.sparse_threshold,
+    )
+    llm = GraniteLLM(
+        model_path=config.llm.model_path
+        or config.models_dir / "granite-4.0-hybridmamba-1b-instruct-Q8_0.gguf",
+        n_gpu_layers=config.llm.n_gpu_layers,
+        n_ctx=config.llm.n_ctx,
+        cache_dir=config.cache_dir,
+        prompt_cache=config.llm.prompt_cache,
+        prefill=config.llm.prefill,
+    )
+    assembler = ContextAssembler(
+        llm.count_tokens,
+        max_tokens=config.rag.context_tokens,
+        score_margin=config.rag.score_margin,
+    )
+
+    modes: list[tuple[str, ContextCompressor | None]] = [("sem compressao", None)]
+    for budget in args.budgets:
+        compressor = ContextCompressor(
+            kb.embedding_model, llm.count_tokens, max_tokens=budget
+        )
+        modes.append((f"compressao {budget}", compressor))
+
+    print(f"Corpus: {len(LABELED_CORPUS)} comandos rotulados")
+    print(f"{'modo':<18}{'tokens ctx':>11}{'razao':>8}{'mediana':>10}{'acuracia':>10}")
+    for label, compressor in modes:
+        brain = Brain(
+            llm,
+            retriever,
+            top_k=config.rag.top_k,
+            context_assembler=assembler,
+            context_compressor=compressor,
+        )
+        brain.process(LABELED_CORPUS[0][0])  # Aquecimento
+        stats = run(brain)
+        print(
+            f"{label:<18}{stats['context_tokens']:>11.1f}{stats['ratio']:>8.2f}"
+            f"{stats['latency_ms']:>8.0f}ms{stats['accuracy']:>10.0%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
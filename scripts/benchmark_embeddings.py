@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmark dos backends de embedding (sentence-transformers x ONNX).
+
+Cada backend roda em um subprocesso limpo, que mede o tempo de import e
+carga do modelo, o RSS maximo e a latencia mediana do encode de uma consulta
+e de um lote de chunks. No fim, compara os vetores de cada backend com os do
+sentence-transformers (cosseno minimo e medio). Requer o modelo de embedding.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = ("sentence-transformers", "onnx-int8", "onnx-fp32")
+
+# Consultas e chunks comparados entre os backends
+TEXTS: list[str] = [
+    "abre o firefox",
+    "aumenta o volume do som",
+    "O gnome-terminal abre um shell bash no GNOME.",
+    "Use pactl set-sink-volume para ajustar o audio.",
+    "nmcli radio wifi on/off liga e desliga a rede sem fio.",
+    "loginctl lock-session bloqueia a tela do usuario.",
+    "git push envia commits; git pull traz as mudancas.",
+    "Arquivos baixados ficam em ~/Downloads.",
+]
+
+
+def run_backend(backend: str, output: Path, repeats: int) -> dict[str, float]:
+    """Carrega o backend, mede o encode e grava os vetores em output."""
+    start = time.perf_counter()
+    from mascate.core.config import Config
+
+    config = Config.load()
+    if backend == "sentence-transformers":
+        from mascate.intelligence.rag.embeddings import EmbeddingModel
+
+        model = EmbeddingModel(config.rag.embedding_model)
+    else:
+        from mascate.intelligence.rag.onnx_embeddings import OnnxEmbeddingModel
+
+        model = OnnxEmbeddingModel(
+            config.rag.embedding_model,
+            cache_dir=config.cache_dir,
+            quantize=backend == "onnx-int8",
+        )
+    loaded = time.perf_counter() - start
+
+    query_latencies: list[float] = []
+    batch_latencies: list[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.encode(TEXTS[0], cache=False)
+        query_latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        vectors = model.encode(TEXTS, cache=False)
+        batch_latencies.append(time.perf_counter() - start)
+    np.save(output, np.asarray(vectors, dtype=np.float32))
+
+    return {
+        "load_s": loaded,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "query_ms": statistics.median(query_latencies) * 1000,
+        "batch_ms": statistics.median(batch_latencies) * 1000,
+    }
+
+
+def main() -> int:
+    """Ponto de entrada."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=10, help="Medicoes por item")
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.output, args.repeats)))
+        return 0
+
+    print(f"{len(TEXTS)} textos, {args.repeats} repeticoes")
+    print(
+        f"{'backend':<23}{'carga':>8}{'rss':>9}{'consulta':>10}{'lote':>10}"
+        f"{'cos min':>9}{'cos medio':>11}"
+    )
+    reference: np.ndarray | None = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in BACKENDS:
+            output = Path(tmp) / f"{backend}.npy"
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--backend",
+                    backend,
+                    "--output",
+                    str(output),
+                    "--repeats",
+                    str(args.repeats),
+                ],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            if result.returncode != 0:
+                error = result.stderr.strip().splitlines()[-1:] or ["?"]
+                print(f"{backend:<23}indisponivel: {error[0]}")
+                continue
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            vectors = np.load(output)
+            if reference is None:
+                reference = vectors
+            cosines = np.sum(vectors * reference, axis=1)
+            print(
+                f"{backend:<23}{stats['load_s']:>7.1f}s{stats['rss_mb']:>6.0f} MB"
+                f"{stats['query_ms']:>8.1f}ms{stats['batch_ms']:>8.1f}ms"
+                f"{cosines.min():>9.4f}{cosines.mean():>11.4f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmark da geracao de intencoes do Mascate.
+
+Compara a decodificacao normal com a decodificacao especulativa por busca
+de n-gramas no prompt (speculative_draft_tokens) sobre um corpus de comandos.
+Mede latencia por comando e confere se as saidas sao identicas, ja que a
+verificacao do rascunho nao deve alterar o resultado em geracao gulosa.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from mascate.core.config import Config
+from mascate.intelligence.llm.granite import GraniteLLM
+
+# Corpus de comandos: (fala do usuario, contexto RAG)
+COMMAND_CORPUS: list[tuple[str, str]] = [
+    ("abra o firefox", ""),
+    ("abre o terminal", ""),
+    ("abrir o visual studio code", ""),
+    ("pausa a musica", ""),
+    ("proxima musica", ""),
+    ("aumenta o volume", ""),
+    ("diminui o volume para 30", ""),
+    ("desliga o wifi", ""),
+    ("abra o site github.com", ""),
+    ("acessa https://docs.python.org/3/library/pathlib.html", ""),
+    ("abre a pasta ~/Documentos/projetos/mascate", ""),
+    ("lista os arquivos em /home/usuario/Downloads", ""),
+    ("move relatorio_final.pdf para ~/Documentos/relatorios", ""),
+    ("copia notas.txt para /tmp/backup", ""),
+    ("cria a pasta ~/Imagens/capturas_de_tela", ""),
+    (
+        "abre o editor de texto",
+        "<doc>O editor de texto padrao e o gnome-text-editor.</doc>",
+    ),
+    (
+        "abre o navegador do trabalho",
+        "<doc>O navegador do trabalho e o chromium com perfil trabalho.</doc>",
+    ),
+    ("que horas sao", ""),
+    ("oi mascate tudo bem", ""),
+]
+
+
+def run_corpus(
+    llm: GraniteLLM, corpus: list[tuple[str, str]], runs: int
+) -> tuple[list[float], list[str]]:
+    """Executa o corpus e retorna latencias (s) e saidas da ultima rodada."""
+    latencies: list[float] = []
+    outputs: list[str] = []
+    for _ in range(runs):
+        outputs = []
+        for user_input, context in corpus:
+            start = time.perf_counter()
+            outputs.append(llm.generate(user_input, context, temperature=0.0))
+            latencies.append(time.perf_counter() - start)
+    return latencies, outputs
+
+
+def summarize(label: str, latencies: list[float]) -> float:
+    """Imprime estatisticas e retorna a mediana em ms."""
+    ordered = sorted(latencies)
+    median = statistics.median(ordered) * 1000
+    p95 = ordered[int(0.95 * (len(ordered) - 1))] * 1000
+    print(
+        f"{label:<14} mediana {median:7.1f}ms  p95 {p95:7.1f}ms  "
+        f"total {sum(ordered):6.2f}s"
+    )
+    return median
+
+
+def main() -> int:
+    """Ponto de entrada."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=Path, help="Caminho do GGUF (padrao: config)")
+    parser.add_argument(
+        "--draft-tokens",
+        type=int,
+        default=10,
+        help="Tokens propostos por passo no modo especulativo",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Rodadas do corpus")
+    args = parser.parse_args()
+
+    config = Config.load()
+    model_path = (
+        args.model
+        or config.llm.model_path
+        or config.models_dir / "granite-4.0-hybridmamba-1b-instruct-Q8_0.gguf"
+    )
+    common = {
+        "model_path": model_path,
+        "n_gpu_layers": config.llm.n_gpu_layers,
+        "n_ctx": config.llm.n_ctx,
+        "cache_dir": config.cache_dir,
+        "prompt_cache": config.llm.prompt_cache,
+        "prefill": config.llm.prefill,
+    }
+
+    results = {}
+    for label, draft_tokens in (("normal", 0), ("especulativo", args.draft_tokens)):
+        llm = GraniteLLM(speculative_draft_tokens=draft_tokens, **common)
+        # Aquecimento: primeira geracao paga alocacoes e compilacao
+        llm.generate(*COMMAND_CORPUS[0], temperature=0.0)
+        results[label] = run_corpus(llm, COMMAND_CORPUS, args.runs)
+        del llm
+
+    print(f"Corpus: {len(COMMAND_CORPUS)} comandos x {args.runs} rodadas")
+    base = summarize("normal", results["normal"][0])
+    spec = summarize("especulativo", results["especulativo"][0])
+    print(f"Speedup (mediana): {base / spec:.2f}x")
+
+    mismatches = [
+        (command, plain, drafted)
+        for (command, _), plain, drafted in zip(
+            COMMAND_CORPUS, results["normal"][1], results["especulativo"][1]
+        )
+        if plain != drafted
+    ]
+    for command, plain, drafted in mismatches:
+        print(f"DIVERGENCIA em '{command}':\n  normal: {plain}\n  espec.: {drafted}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark da busca do RAG: densa x BM25 x hibrida (RRF).
+
+Indexa um corpus Markdown rotulado em uma base temporaria (backend numpy)
+e mede, para cada modo, recall@k (documento esperado entre os k primeiros),
+MRR e latencia mediana por consulta. Requer o modelo de embedding.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mascate.core.config import Config
+from mascate.intelligence.rag.knowledge import KnowledgeBase
+from mascate.intelligence.rag.retriever import RAGRetriever
+
+# Documentos do corpus: nome do arquivo -> conteudo
+DOCUMENTS: dict[str, str] = {
+    "firefox.md": "# Firefox\nNavegador web padrao. Abra com o comando firefox.",
+    "terminal.md": "# Terminal\nO gnome-terminal abre um shell bash no GNOME.",
+    "vscode.md": "# Visual Studio Code\nEditor de codigo. O executavel e 'code'.",
+    "spotify.md": "# Spotify\nPlayer de musica. Controle com playerctl play-pause.",
+    "volume.md": "# Volume\nUse pactl set-sink-volume para ajustar o audio.",
+    "wifi.md": "# Wi-Fi\nnmcli radio wifi on/off liga e desliga a rede sem fio.",
+    "bluetooth.md": "# Bluetooth\nbluetoothctl power on ativa o adaptador.",
+    "screenshot.md": "# Captura de tela\nA tecla Print ou gnome-screenshot salva.",
+    "downloads.md": "# Downloads\nArquivos baixados ficam em ~/Downloads.",
+    "lock.md": "# Bloqueio\nloginctl lock-session bloqueia a tela do usuario.",
+    "git.md": "# Git\ngit push envia commits; git pull traz as mudancas.",
+    "docker.md": "# Docker\ndocker ps lista os containers em execucao.",
+}
+
+# Consultas rotuladas: (fala do usuario, documento esperado)
+LABELED_QUERIES: list[tuple[str, str]] = [
+    ("abre o firefox", "firefox.md"),
+    ("quero navegar na internet", "firefox.md"),
+    ("abre o gnome-terminal", "terminal.md"),
+    ("abre um shell", "terminal.md"),
+    ("abre o vscode", "vscode.md"),
+    ("quero editar codigo", "vscode.md"),
+    ("toca musica no spotify", "spotify.md"),
+    ("playerctl", "spotify.md"),
+    ("aumenta o som", "volume.md"),
+    ("pactl", "volume.md"),
+    ("desliga a internet sem fio", "wifi.md"),
+    ("nmcli", "wifi.md"),
+    ("liga o bluetooth", "bluetooth.md"),
+    ("tira um print da tela", "screenshot.md"),
+    ("onde ficam os arquivos baixados", "downloads.md"),
+    ("bloqueia o computador", "lock.md"),
+    ("da um push ai", "git.md"),
+    ("lista os containers", "docker.md"),
+]
+
+
+def evaluate(retriever: RAGRetriever, top_k: int, mode: str) -> dict[str, float]:
+    """Roda as consultas rotuladas e retorna as metricas agregadas."""
+    latencies: list[float] = []
+    hits = 0
+    reciprocal_ranks = 0.0
+    for query, expected in LABELED_QUERIES:
+        start = time.perf_counter()
+        if mode == "bm25":
+            sources = [
+                hit.payload.get("source")
+                for hit in retriever.kb.sparse_index.search(query, top_k)
+            ]
+        else:
+            sources = [r.source for r in retriever.search(query, top_k=top_k)]
+        latencies.append(time.perf_counter() - start)
+        if expected in sources:
+            hits += 1
+            reciprocal_ranks += 1 / (sources.index(expected) + 1)
+
+    return {
+        "recall": hits / len(LABELED_QUERIES),
+        "mrr": reciprocal_ranks / len(LABELED_QUERIES),
+        "latency_ms": statistics.median(latencies) * 1000,
+    }
+
+
+def main() -> int:
+    """Ponto de entrada."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, default=3, help="Resultados avaliados")
+    parser.add_argument("--rrf-k", type=int, default=60, help="Constante do RRF")
+    parser.add_argument(
+        "--sparse-threshold", type=float, default=1.5, help="Pontuacao BM25 minima"
+    )
+    args = parser.parse_args()
+
+    config = Config.load()
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = Path(tmp) / "docs"
+        docs_dir.mkdir()
+        for name, content in DOCUMENTS.items():
+            (docs_dir / name).write_text(content, encoding="utf-8")
+
+        config.data_dir = Path(tmp) / "data"
+        config.rag.vector_backend = "numpy"
+        config.rag.embedding_cache_size = 0  # Mede o encode de cada consulta
+        kb = KnowledgeBase(config)
+        kb.sync_directory(docs_dir)
+
+        retrievers = {
+            "densa": RAGRetriever(kb),
+            "bm25": RAGRetriever(kb),
+            "hibrida": RAGRetriever(
+                kb,
+                hybrid=True,
+                rrf_k=args.rrf_k,
+                sparse_threshold=args.sparse_threshold,
+            ),
+        }
+        retrievers["densa"].search(LABELED_QUERIES[0][0])  # Aquecimento
+
+        print(f"Corpus: {len(DOCUMENTS)} documentos, {len(LABELED_QUERIES)} consultas")
+        print(f"{'modo':<10}{f'recall@{args.top_k}':>11}{'mrr':>8}{'mediana':>10}")
+        for mode, retriever in retrievers.items():
+            stats = evaluate(retriever, args.top_k, mode)
+            print(
+                f"{mode:<10}{stats['recall']:>11.0%}{stats['mrr']:>8.2f}"
+                f"{stats['latency_ms']:>8.1f}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark do carregamento do RAG (lazy_load x carga imediata).
+
+Cada modo roda em um subprocesso limpo, que mede o tempo ate a Knowledge
+Base estar pronta para o assistente (imports mais construcao), o RSS nesse
+ponto, a carga do modelo de embedding e do banco vetorial (o que o preload
+faz em segundo plano) e o RSS depois do descarte por ociosidade. Requer o
+modelo de embedding.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+MODES = ("lazy", "eager")
+
+
+def rss_mb() -> float:
+    """RSS atual do processo em MB (Linux)."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_mode(mode: str) -> dict[str, float]:
+    """Cria a KB no modo pedido e mede pronto, carga e descarte."""
+    start = time.perf_counter()
+    from mascate.core.config import Config
+    from mascate.intelligence.rag.knowledge import KnowledgeBase
+
+    config = Config.load()
+    config.rag.lazy_load = mode == "lazy"
+    config.rag.idle_unload_s = 0  # O descarte e chamado abaixo
+    kb = KnowledgeBase(config)
+    ready = time.perf_counter() - start
+    ready_rss = rss_mb()
+
+    start = time.perf_counter()
+    kb.load()
+    kb.embedding_model.encode("abre o firefox", cache=False)
+    loaded = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    kb.unload()
+    return {
+        "ready_s": ready,
+        "ready_mb": ready_rss,
+        "load_s": loaded,
+        "loaded_mb": loaded_rss,
+        "unloaded_mb": rss_mb(),
+    }
+
+
+def main() -> int:
+    """Ponto de entrada."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode)))
+        return 0
+
+    print(f"{'modo':<8}{'pronto':>9}{'rss':>9}{'carga':>9}{'rss':>9}{'ocioso':>10}")
+    for mode in MODES:
+        result = subprocess.run(
+            [sys.executable, __file__, "--mode", mode],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1:] or ["?"]
+            print(f"{mode:<8}indisponivel: {error[0]}")
+            continue
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"{mode:<8}{stats['ready_s']:>8.2f}s{stats['ready_mb']:>6.0f} MB"
+            f"{stats['load_s']:>8.2f}s{stats['loaded_mb']:>6.0f} MB"
+            f"{stats['unloaded_mb']:>7.0f} MB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Benchmark dos bancos vetoriais do RAG (Qdrant local x indice NumPy).
+
+Indexa vetores sinteticos agrupados (como embeddings de documentos parecidos)
+em diretorios temporarios e compara tempo de abertura, tempo de ingestao,
+latencia de busca (mediana e p95), bytes de vetor na RAM por chunk e o
+recall@k contra a busca exata do indice NumPy em float32. Os modos
+numpy-int8 e numpy-binary usam a quantizacao com reordenacao exata. Nao
+precisa do modelo de embedding; o Qdrant e pulado se qdrant-client nao estiver
+instalado.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from mascate.intelligence.rag.numpy_db import NumpyVectorDB
+from mascate.intelligence.rag.vectordb import VectorDB, VectorDBError
+
+COLLECTION = "benchmark"
+BACKENDS = ("numpy", "qdrant", "numpy-int8", "numpy-binary")
+
+
+def build(
+    name: str,
+    path: Path,
+    vectors: np.ndarray,
+    ids: list[str],
+    dtype: str,
+    oversampling: float = 4.0,
+) -> tuple[Any, float, float]:
+    """Abre o banco e indexa os vetores; retorna (banco, abertura, ingestao)."""
+    start = time.perf_counter()
+    db: Any
+    if name.startswith("numpy"):
+        _, _, quantization = name.partition("-")
+        db = NumpyVectorDB(
+            path,
+            dtype=dtype,
+            quantization=quantization or "none",
+            oversampling=oversampling,
+        )
+    else:
+        db = VectorDB(path)
+    db.ensure_collection(COLLECTION, vectors.shape[1])
+    opened = time.perf_counter() - start
+
+    start = time.perf_counter()
+    payloads = [{"content": f"chunk {i}"} for i in range(len(ids))]
+    for i in range(0, len(ids), 256):
+        db.upsert(
+            COLLECTION,
+            ids[i : i + 256],
+            vectors[i : i + 256].tolist(),
+            payloads[i : i + 256],
+        )
+    return db, opened, time.perf_counter() - start
+
+
+def search_all(db: Any, queries: np.ndarray, top_k: int) -> tuple[list[float], list]:
+    """Executa as buscas; retorna latencias e IDs do top-k de cada uma."""
+    latencies: list[float] = []
+    results: list[list[str]] = []
+    for query in queries.tolist():
+        start = time.perf_counter()
+        hits = db.search(COLLECTION, query, limit=top_k)
+        latencies.append(time.perf_counter() - start)
+        results.append([str(hit.id) for hit in hits])
+    return latencies, results
+
+
+def make_vectors(
+    rng: np.random.Generator, n: int, dim: int, clusters: int
+) -> np.ndarray:
+    """Vetores normalizados em torno de centros aleatorios."""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += 0.8 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def main() -> int:
+    """Ponto de entrada."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=3000, help="Vetores indexados")
+    parser.add_argument("--dim", type=int, default=1024, help="Dimensao (BGE-M3)")
+    parser.add_argument("--queries", type=int, default=200, help="Buscas medidas")
+    parser.add_argument("--top-k", type=int, default=6, help="Resultados por busca")
+    parser.add_argument(
+        "--dtype", default="float32", help="Tipo dos vetores no indice NumPy"
+    )
+    parser.add_argument("--clusters", type=int, default=50, help="Grupos de vetores")
+    parser.add_argument(
+        "--oversampling", type=float, default=4.0, help="Candidatos reordenados"
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(rng, args.chunks, args.dim, args.clusters)
+    queries = make_vectors(rng, args.queries, args.dim, args.clusters)
+    ids = [str(uuid.UUID(int=i)) for i in range(args.chunks)]
+
+    print(f"{args.chunks} vetores de {args.dim} dimensoes, {args.queries} buscas")
+    print(
+        f"{'banco':<14}{'abertura':>10}{'ingestao':>10}{'mediana':>10}"
+        f"{'p95':>10}{'bytes/chunk':>13}{f'recall@{args.top_k}':>11}"
+    )
+    reference: list[list[str]] | None = None
+    for name in BACKENDS:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                db, opened, ingested = build(
+                    name,
+                    Path(tmp) / name,
+                    vectors,
+                    ids,
+                    "float32" if name == "numpy" else args.dtype,
+                    args.oversampling,
+                )
+            except VectorDBError as e:
+                print(f"{name:<14}indisponivel: {e}")
+                continue
+            search_all(db, queries[:5], args.top_k)  # Aquecimento
+            latencies, results = search_all(db, queries, args.top_k)
+            footprint = (
+                db.bytes_per_point(COLLECTION)
+                if isinstance(db, NumpyVectorDB)
+                else args.dim * 4
+            )
+
+        if reference is None:
+            reference = results  # Busca exata em float32
+        recall = statistics.mean(
+            len(set(expected) & set(found)) / len(expected)
+            for expected, found in zip(reference, results, strict=True)
+        )
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(
+            f"{name:<14}{opened * 1000:>8.0f}ms{ingested * 1000:>8.0f}ms"
+            f"{statistics.median(latencies) * 1000:>8.2f}ms{p95 * 1000:>8.2f}ms"
+            f"{footprint:>13}{recall:>11.1%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Gera a gramatica GBNF de comandos do Mascate.
+
+Le os schemas declarados pelos handlers do Executor e escreve
+src/mascate/intelligence/llm/grammars/command.gbnf e command_compact.gbnf
+(chaves curtas). Use --check no CI para verificar se estao atualizados.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from mascate.executor.registry import build_command_grammar
+
+GRAMMARS_DIR = (
+    Path(__file__).resolve().parent.parent
+    / "src"
+    / "mascate"
+    / "intelligence"
+    / "llm"
+    / "grammars"
+)
+
+# Arquivo -> formato compacto?
+GRAMMAR_FILES = {
+    "command.gbnf": False,
+    "command_compact.gbnf": True,
+}
+
+
+def main() -> int:
+    """Ponto de entrada."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Apenas verifica se as gramaticas estao sincronizadas com os handlers",
+    )
+    args = parser.parse_args()
+
+    outdated = 0
+    for filename, compact in GRAMMAR_FILES.items():
+        path = GRAMMARS_DIR / filename
+        grammar = build_command_grammar(compact=compact)
+
+        if args.check:
+            current = path.read_text(encoding="utf-8") if path.exists() else ""
+            if current != grammar:
+                print(f"{path} desatualizado. Rode scripts/generate_grammar.py")
+                outdated += 1
+            continue
+
+        path.write_text(grammar, encoding="utf-8")
+        print(f"Gramatica escrita em {path}")
+
+    if args.check and not outdated:
+        print("Gramaticas atualizadas.")
+    return 1 if outdated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
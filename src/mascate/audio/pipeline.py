@@ -35,6 +35,7 @@ class AudioPipeline:
         vad_processor: VADProcessor,
         stt: WhisperSTT,
         hotkey_listener: HotkeyListener | None = None,
+        partial_interval_s: float = 0.0,
     ) -> None:
         """Inicializa o pipeline.
 
@@ -44,14 +45,22 @@ class AudioPipeline:
             vad_processor: Instância de VADProcessor.
             stt: Instância de WhisperSTT.
             hotkey_listener: Instância de HotkeyListener para ativação via teclado.
+            partial_interval_s: Intervalo entre transcrições parciais durante
+                a fala (0 desativa). As parciais rodam em outra thread e vão
+                para o callback de on_partial_transcription.
         """
         self.capture = capture
         self.wake_detector = wake_detector
         self.vad_processor = vad_processor
         self.stt = stt
         self.hotkey_listener = hotkey_listener
+        self.partial_interval_s = partial_interval_s
 
         self._on_transcription_cb: Callable[[str], None] | None = None
+        self._on_partial_cb: Callable[[str], None] | None = None
+        # Transcrição parcial em andamento e instante da última
+        self._partial_thread: threading.Thread | None = None
+        self._last_partial = 0.0
         self._on_activation_cb: Callable[[], None] | None = None
 
         self._running = False
@@ -74,6 +83,10 @@ class AudioPipeline:
         """Define callback para resultado do STT."""
         self._on_transcription_cb = callback
 
+    def on_partial_transcription(self, callback: Callable[[str], None]) -> None:
+        """Define callback para transcrições parciais (fala em andamento)."""
+        self._on_partial_cb = callback
+
     def start(self) -> None:
         """Inicia o pipeline em uma thread separada."""
         if self._running:
@@ -138,6 +151,8 @@ class AudioPipeline:
 
                     if state == VADState.END_OF_SPEECH:
                         self._handle_end_of_speech()
+                    else:
+                        self._maybe_partial_transcription()
 
             except Exception as e:
                 logger.error("Erro no loop do pipeline: %s", e)
@@ -175,6 +190,7 @@ class AudioPipeline:
         source = "Hotkey" if self.hotkey_listener else "Wake Word"
         logger.info("Sistema ativado via %s", source)
         self._is_listening = True
+        self._last_partial = time.monotonic()
         self._audio_buffer = []
         self._vad_accumulator = np.array([], dtype=np.float32)
 
@@ -201,6 +217,11 @@ class AudioPipeline:
 
         full_audio = np.concatenate(self._audio_buffer)
 
+        # O modelo de STT não é compartilhado entre threads
+        if self._partial_thread is not None:
+            self._partial_thread.join()
+            self._partial_thread = None
+
         # Transcreve (STT)
         text = self.stt.transcribe(full_audio)
 
@@ -211,3 +232,30 @@ class AudioPipeline:
         self.vad_processor.confirm_end()
         self._audio_buffer = []
         self._vad_accumulator = np.array([], dtype=np.float32)
+
+    def _maybe_partial_transcription(self) -> None:
+        """Dispara uma transcrição parcial se o intervalo passou."""
+        if (
+            self.partial_interval_s <= 0
+            or self._on_partial_cb is None
+            or not self._audio_buffer
+            or (self._partial_thread is not None and self._partial_thread.is_alive())
+            or time.monotonic() - self._last_partial < self.partial_interval_s
+        ):
+            return
+
+        self._last_partial = time.monotonic()
+        audio = np.concatenate(self._audio_buffer)
+        self._partial_thread = threading.Thread(
+            target=self._run_partial, args=(audio,), daemon=True
+        )
+        self._partial_thread.start()
+
+    def _run_partial(self, audio: np.ndarray) -> None:
+        """Transcreve o áudio acumulado até agora e entrega o texto parcial."""
+        try:
+            text = self.stt.transcribe(audio)
+            if text and self._on_partial_cb:
+                self._on_partial_cb(text)
+        except Exception as e:
+            logger.debug("Falha na transcrição parcial: %s", e)
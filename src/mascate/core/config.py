@@ -48,6 +48,8 @@ class AudioConfig:
     hotkey: str = "ctrl+shift+m"
     # Se True, desabilita wake word e usa apenas hotkey
     hotkey_only: bool = False
+    # Transcricao parcial durante a fala para adiantar a busca no RAG (0 = off)
+    partial_transcript_interval_s: float = 0.0
 
 
 @dataclass
@@ -60,6 +62,95 @@ class LLMConfig:
     n_batch: int = 512
     temperature: float = 0.7
     max_tokens: int = 256
+    # Snapshot do estado apos o prompt de sistema (persistido em cache_dir)
+    prompt_cache: bool = True
+    # Consome a geracao em streaming e despacha acoes sem params antecipadamente
+    early_dispatch: bool = True
+    # Pre-preenche no prompt o texto forcado pela gramatica (ex: '{"action": ')
+    prefill: bool = True
+    # Gramatica com chaves curtas (a/t/p), convertidas de volta pelo Brain
+    compact_schema: bool = False
+    # Tokens propostos por passo via busca de n-gramas no prompt (0 = desativado)
+    speculative_draft_tokens: int = 0
+    # Prazo da geracao em segundos; ao estourar usa resposta parcial (0 = sem prazo)
+    generation_deadline_s: float = 8.0
+    # Avalia sistema + pedido no LLM enquanto a busca no RAG roda
+    parallel_prefill: bool = False
+
+
+@dataclass
+class RAGConfig:
+    """Configuracao do RAG."""
+
+    collection_name: str = "mascate_knowledge"
+    embedding_model: str = "BAAI/bge-m3"
+    embedding_device: str = "cpu"
+    # Backend do embedding: 'sentence-transformers' ou 'onnx' (sem PyTorch)
+    embedding_backend: str = "sentence-transformers"
+    # Backend onnx: pesos quantizados em int8 (~1/4 do tamanho)
+    embedding_quantize: bool = True
+    top_k: int = 3
+    # Orcamento de tokens do contexto enviado ao LLM (tokenizer do modelo)
+    context_tokens: int = 384
+    # Descarta documentos com score abaixo de (melhor score - margem)
+    score_margin: float = 0.2
+    # Compressao extrativa: mantem so as sentencas mais proximas da query
+    compression: bool = False
+    compression_tokens: int = 160
+    # Prazo da busca em segundos; ao estourar segue sem contexto (0 = sem prazo)
+    retrieval_deadline_s: float = 2.0
+    # Cache LRU dos vetores de consultas (0 = desligado)
+    embedding_cache_size: int = 1024
+    # Tipo de armazenamento dos vetores: 'float32' ou 'float16' (metade da RAM)
+    embedding_cache_dtype: str = "float32"
+    # Persiste os vetores em cache_dir (lidos com mmap no proximo inicio)
+    embedding_cache_persist: bool = True
+    # Processos de parsing na ingestao (0 = um por CPU)
+    ingest_workers: int = 0
+    # Chunks por lote de embedding na ingestao (agrupa varios arquivos)
+    ingest_batch_size: int = 64
+    # Banco vetorial: 'qdrant' ou 'numpy' (matriz com mmap, bases pequenas)
+    vector_backend: str = "qdrant"
+    # Tipo dos vetores no backend numpy: 'float32' ou 'float16'
+    vector_dtype: str = "float32"
+    # Quantizacao do backend numpy: 'none', 'int8' ou 'binary'
+    vector_quantization: str = "none"
+    # Candidatos reordenados com os vetores completos, por resultado pedido
+    rescore_oversampling: float = 4.0
+    # Busca hibrida: densa + BM25 combinadas por reciprocal rank fusion
+    hybrid: bool = True
+    rrf_k: int = 60
+    # Pontuacao BM25 minima para um documento entrar na fusao
+    sparse_threshold: float = 1.5
+    # Buscas em cache por (consulta, top_k, limiar, versao da KB) (0 = desligado)
+    retrieval_cache_size: int = 256
+    # Modelo de embedding e banco vetorial abrem no primeiro uso
+    lazy_load: bool = True
+    # Carrega em segundo plano logo apos o sistema ficar pronto
+    preload: bool = True
+    # Descarta modelo e banco apos esse tempo sem uso, em segundos (0 = nunca)
+    idle_unload_s: float = 1800.0
+    # Ingestao em uma geracao sombra, trocada atomicamente ao final
+    atomic_rebuild: bool = True
+
+
+@dataclass
+class RouterConfig:
+    """Configuracao dos atalhos de intencao (antes do RAG e do LLM)."""
+
+    # Regras deterministicas para frases frequentes ("abre o X", volume, midia)
+    fast_path: bool = True
+    # Roteador por similaridade com frases de exemplo (usa o embedding do RAG)
+    semantic: bool = False
+    semantic_threshold: float = 0.85
+    # Diferenca minima entre as duas intencoes mais proximas
+    semantic_margin: float = 0.05
+    # Comandos executados com sucesso viram exemplos (em data_dir)
+    semantic_learn: bool = True
+    # Intencoes validadas por transcricao normalizada (persistido em cache_dir)
+    intent_cache: bool = True
+    intent_cache_size: int = 256
+    intent_cache_ttl_s: float = 86400.0
 
 
 @dataclass
@@ -113,6 +204,8 @@ class Config:
 
     audio: AudioConfig = field(default_factory=AudioConfig)
     llm: LLMConfig = field(default_factory=LLMConfig)
+    rag: RAGConfig = field(default_factory=RAGConfig)
+    router: RouterConfig = field(default_factory=RouterConfig)
     security: SecurityConfig = field(default_factory=SecurityConfig)
     models_dir: Path = DEFAULT_MODELS_DIR
     data_dir: Path = DEFAULT_DATA_DIR
@@ -186,6 +279,9 @@ class Config:
             hotkey_enabled=audio_data.get("hotkey_enabled", True),
             hotkey=audio_data.get("hotkey", "ctrl+shift+m"),
             hotkey_only=audio_data.get("hotkey_only", False),
+            partial_transcript_interval_s=audio_data.get(
+                "partial_transcript_interval_s", 0.0
+            ),
         )
 
         # Parse LLM config
@@ -198,6 +294,61 @@ class Config:
             n_batch=llm_data.get("n_batch", 512),
             temperature=llm_data.get("temperature", 0.7),
             max_tokens=llm_data.get("max_tokens", 256),
+            prompt_cache=llm_data.get("prompt_cache", True),
+            early_dispatch=llm_data.get("early_dispatch", True),
+            prefill=llm_data.get("prefill", True),
+            compact_schema=llm_data.get("compact_schema", False),
+            speculative_draft_tokens=llm_data.get("speculative_draft_tokens", 0),
+            generation_deadline_s=llm_data.get("generation_deadline_s", 8.0),
+            parallel_prefill=llm_data.get("parallel_prefill", False),
+        )
+
+        # Parse RAG config
+        rag_data = data.get("rag", {})
+        rag = RAGConfig(
+            collection_name=rag_data.get("collection_name", "mascate_knowledge"),
+            embedding_model=rag_data.get("embedding_model", "BAAI/bge-m3"),
+            embedding_device=rag_data.get("embedding_device", "cpu"),
+            embedding_backend=rag_data.get(
+                "embedding_backend", "sentence-transformers"
+            ),
+            embedding_quantize=rag_data.get("embedding_quantize", True),
+            top_k=rag_data.get("top_k", 3),
+            context_tokens=rag_data.get("context_tokens", 384),
+            score_margin=rag_data.get("score_margin", 0.2),
+            compression=rag_data.get("compression", False),
+            compression_tokens=rag_data.get("compression_tokens", 160),
+            retrieval_deadline_s=rag_data.get("retrieval_deadline_s", 2.0),
+            embedding_cache_size=rag_data.get("embedding_cache_size", 1024),
+            embedding_cache_dtype=rag_data.get("embedding_cache_dtype", "float32"),
+            embedding_cache_persist=rag_data.get("embedding_cache_persist", True),
+            ingest_workers=rag_data.get("ingest_workers", 0),
+            ingest_batch_size=rag_data.get("ingest_batch_size", 64),
+            vector_backend=rag_data.get("vector_backend", "qdrant"),
+            vector_dtype=rag_data.get("vector_dtype", "float32"),
+            vector_quantization=rag_data.get("vector_quantization", "none"),
+            rescore_oversampling=rag_data.get("rescore_oversampling", 4.0),
+            hybrid=rag_data.get("hybrid", True),
+            rrf_k=rag_data.get("rrf_k", 60),
+            sparse_threshold=rag_data.get("sparse_threshold", 1.5),
+            retrieval_cache_size=rag_data.get("retrieval_cache_size", 256),
+            lazy_load=rag_data.get("lazy_load", True),
+            preload=rag_data.get("preload", True),
+            idle_unload_s=rag_data.get("idle_unload_s", 1800.0),
+            atomic_rebuild=rag_data.get("atomic_rebuild", True),
+        )
+
+        # Parse router config
+        router_data = data.get("router", {})
+        router = RouterConfig(
+            fast_path=router_data.get("fast_path", True),
+            semantic=router_data.get("semantic", False),
+            semantic_threshold=router_data.get("semantic_threshold", 0.85),
+            semantic_margin=router_data.get("semantic_margin", 0.05),
+            semantic_learn=router_data.get("semantic_learn", True),
+            intent_cache=router_data.get("intent_cache", True),
+            intent_cache_size=router_data.get("intent_cache_size", 256),
+            intent_cache_ttl_s=router_data.get("intent_cache_ttl_s", 86400.0),
         )
 
         # Parse security config
@@ -227,6 +378,8 @@ class Config:
         return cls(
             audio=audio,
             llm=llm,
+            rag=rag,
+            router=router,
             security=security,
             models_dir=models_dir,
             data_dir=data_dir,
@@ -0,0 +1,127 @@
+"""Metricas internas do Mascate.
+
+Contadores e tempos acumulados em memoria, usados para medir caches,
+atalhos e latencias do pipeline sem dependencias externas.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@dataclass
+class TimingStats:
+    """Estatisticas acumuladas de um temporizador."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        """Tempo medio em segundos."""
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    """Registro thread-safe de contadores e tempos."""
+
+    def __init__(self) -> None:
+        """Inicializa o registro vazio."""
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._timings: dict[str, TimingStats] = {}
+
+    def increment(self, name: str, value: float = 1.0) -> None:
+        """Incrementa um contador.
+
+        Args:
+            name: Nome do contador (ex: 'grammar_cache.hits').
+            value: Valor a somar.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Registra a duracao de uma operacao.
+
+        Args:
+            name: Nome do temporizador.
+            seconds: Duracao em segundos.
+        """
+        with self._lock:
+            stats = self._timings.setdefault(name, TimingStats())
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Context manager que registra a duracao do bloco."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def get(self, name: str) -> float:
+        """Retorna o valor atual de um contador (0 se inexistente)."""
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def timing(self, name: str) -> TimingStats:
+        """Retorna uma copia das estatisticas de um temporizador."""
+        with self._lock:
+            stats = self._timings.get(name, TimingStats())
+            return TimingStats(count=stats.count, total=stats.total, max=stats.max)
+
+    def snapshot(self) -> dict[str, float]:
+        """Retorna todas as metricas em um dicionario plano.
+
+        Temporizadores sao expostos como '<nome>.count', '<nome>.total_s'
+        e '<nome>.max_s'.
+        """
+        with self._lock:
+            data = dict(self._counters)
+            for name, stats in self._timings.items():
+                data[f"{name}.count"] = float(stats.count)
+                data[f"{name}.total_s"] = stats.total
+                data[f"{name}.max_s"] = stats.max
+            return data
+
+    def reset(self) -> None:
+        """Zera todas as metricas."""
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+def get_metrics() -> Metrics:
+    """Obtem o registro global de metricas (singleton).
+
+    Returns:
+        Instancia compartilhada de Metrics.
+    """
+    global _metrics_instance
+    if _metrics_instance is None:
+        _metrics_instance = Metrics()
+    return _metrics_instance
+
+
+def reset_metrics() -> None:
+    """Zera o registro global de metricas.
+
+    Util para testes.
+    """
+    get_metrics().reset()
+
+
+# Registro global de metricas
+_metrics_instance: Metrics | None = None
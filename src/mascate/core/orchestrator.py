@@ -7,9 +7,11 @@ from __future__ import annotations
 
 import json
 import logging
+import re
+import threading
 import time
 from enum import Enum
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from mascate.audio.pipeline import AudioPipeline
 from mascate.audio.tts.piper import PiperTTS
@@ -17,8 +19,17 @@ from mascate.executor.executor import Executor
 from mascate.intelligence.brain import Brain
 from mascate.interface.hud import HUD
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
 logger = logging.getLogger(__name__)
 
+# Fala que interrompe o comando em andamento (barge-in)
+_CANCEL_RE = re.compile(r"^\s*(cancela|cancelar|cancele|para|pare|esquece)\W*$", re.I)
+
+# Prefixo do feedback do Executor quando o handler executa com sucesso
+_SUCCESS_PREFIX = "Pronto!"
+
 
 class SystemState(Enum):
     """Estados globais do assistente."""
@@ -43,6 +54,7 @@ class Orchestrator:
         executor: Executor,
         hud: HUD,
         tts: PiperTTS | None = None,
+        on_ready: Callable[[], object] | None = None,
     ) -> None:
         """Inicializa o orquestrador.
 
@@ -52,12 +64,15 @@ class Orchestrator:
             executor: Executor (Segurança, Handlers).
             hud: Interface visual.
             tts: Sintetizador de voz (opcional).
+            on_ready: Chamado quando o sistema anuncia que está pronto
+                (ex: pré-carregamento do RAG em segundo plano).
         """
         self.audio = audio_pipeline
         self.brain = brain
         self.executor = executor
         self.hud = hud
         self.tts = tts
+        self.on_ready = on_ready
 
         self.state = SystemState.INITIALIZING
         self._running = False
@@ -65,6 +80,11 @@ class Orchestrator:
         # Estado para confirmação de comandos HIGH risk
         self._pending_confirmation: dict[str, Any] | None = None
 
+        # Comando em andamento: roda fora da thread de áudio para que a
+        # wake word e o "cancela" continuem sendo ouvidos durante a geração
+        self._command_thread: threading.Thread | None = None
+        self._command_cancelled = threading.Event()
+
     def start(self) -> None:
         """Inicia o loop principal do sistema."""
         self._running = True
@@ -74,12 +94,15 @@ class Orchestrator:
         # Configura callbacks do pipeline de áudio
         self.audio.on_activation(self._handle_wake_word)
         self.audio.on_transcription(self._handle_transcription)
+        self.audio.on_partial_transcription(self._handle_partial_transcription)
 
         # Inicia pipeline de áudio
         self.audio.start()
 
         self._set_state(SystemState.IDLE)
         self.hud.add_log("Sistema pronto. Diga 'Mascate' para ativar.")
+        if self.on_ready is not None:
+            self.on_ready()
         self._speak("Mascate pronto para ajudar.")
 
         # Loop de espera (os eventos são tratados via callbacks)
@@ -97,6 +120,8 @@ class Orchestrator:
 
         self._set_state(SystemState.SHUTTING_DOWN)
         self._running = False
+        self._cancel_command()
+        self.wait_command(timeout=2.0)
 
         self.hud.add_log("Encerrando sistemas...")
         self._speak("Até logo!")
@@ -104,6 +129,21 @@ class Orchestrator:
         self.hud.stop()
         logger.info("Mascate encerrado.")
 
+    def wait_command(self, timeout: float | None = None) -> None:
+        """Espera o comando em andamento terminar.
+
+        Args:
+            timeout: Tempo máximo de espera em segundos (None = sem limite).
+        """
+        thread = self._command_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _cancel_command(self) -> None:
+        """Interrompe a geração e descarta o resultado do comando em andamento."""
+        self._command_cancelled.set()
+        self.brain.cancel()
+
     def _set_state(self, state: SystemState) -> None:
         """Atualiza o estado interno e reflete no HUD."""
         self.state = state
@@ -127,22 +167,62 @@ class Orchestrator:
 
     def _handle_wake_word(self) -> None:
         """Callback: Wake word detectada."""
+        # Nova ativação interrompe a geração anterior ainda em andamento
+        self._cancel_command()
+        # Aquece LLM e embedding enquanto o usuário fala
+        self.brain.warm_up()
         self._set_state(SystemState.LISTENING)
         self.hud.add_log("Ouvindo...", "WAKE")
 
+    def _handle_partial_transcription(self, text: str) -> None:
+        """Callback: Transcrição parcial (fala ainda em andamento)."""
+        self.brain.prefetch(text)
+
     def _handle_transcription(self, text: str) -> None:
-        """Callback: Texto transcrito disponível."""
-        self._set_state(SystemState.PROCESSING)
+        """Callback: Texto transcrito disponível (thread de áudio).
+
+        O cancelamento é tratado aqui mesmo; os demais comandos rodam em uma
+        thread própria, liberando o pipeline para ouvir enquanto o Brain
+        processa.
+        """
         self.hud.add_log(f"Transcrito: '{text}'", "STT")
 
+        if not self._pending_confirmation and _CANCEL_RE.match(text):
+            self._cancel_command()
+            self.hud.add_log("Comando cancelado pelo usuario", "CANCEL")
+            self._speak("Cancelado.")
+            self._set_state(SystemState.IDLE)
+            return
+
+        # Um comando novo substitui o anterior ainda em andamento
+        if self._command_thread is not None and self._command_thread.is_alive():
+            self._cancel_command()
+            self.wait_command()
+        self._command_cancelled = threading.Event()
+        self._command_thread = threading.Thread(
+            target=self._process_command,
+            args=(text, self._command_cancelled),
+            name="orchestrator-command",
+            daemon=True,
+        )
+        self._command_thread.start()
+
+    def _process_command(self, text: str, cancelled: threading.Event) -> None:
+        """Envia a transcrição ao Brain e executa a intenção resultante."""
+        self._set_state(SystemState.PROCESSING)
+
         # Se estamos aguardando confirmação, verifica a resposta
-        if self._pending_confirmation and self.state != SystemState.CONFIRMING:
+        if self._pending_confirmation:
             self._handle_confirmation_response(text)
             return
 
         # 1. Envia para o Cérebro
         intent = self.brain.process(text)
 
+        if cancelled.is_set():
+            logger.info("Comando descartado apos cancelamento: '%s'", text)
+            return
+
         if not intent:
             self.hud.add_log("Nao entendi a intencao.", "ERROR")
             self._speak("Desculpe, não entendi. Pode repetir?")
@@ -172,6 +252,10 @@ class Orchestrator:
             self._request_confirmation(feedback, intent_data)
             return
 
+        # Comando executado com sucesso vira exemplo para o roteador semantico
+        if feedback.startswith(_SUCCESS_PREFIX):
+            self.brain.learn(text, intent_data)
+
         # 4. Exibe e fala o feedback
         self.hud.set_interaction(text, feedback)
         self.hud.add_log(feedback, "RESULT")
@@ -1,12 +1,15 @@
 """Handler para abrir aplicativos."""
 
 from mascate.executor.handlers.base import BaseHandler
-from mascate.executor.models import Command
+from mascate.executor.models import ActionType, Command
+from mascate.executor.schema import ActionSchema
 
 
 class AppHandler(BaseHandler):
     """Executa aplicativos instalados no sistema."""
 
+    SCHEMA = ActionSchema(ActionType.OPEN_APP)
+
     def execute(self, command: Command) -> bool:
         # Usa o target como o nome do executável
         # No Linux, o ideal seria procurar o .desktop, mas para a PoC
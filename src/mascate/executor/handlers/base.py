@@ -5,8 +5,11 @@ from __future__ import annotations
 import logging
 import subprocess
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, ClassVar
 
-from mascate.executor.models import Command
+if TYPE_CHECKING:
+    from mascate.executor.models import Command
+    from mascate.executor.schema import ActionSchema
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +17,9 @@ logger = logging.getLogger(__name__)
 class BaseHandler(ABC):
     """Classe base abstrata para todos os handlers."""
 
+    # Acao, alvos e parametros aceitos (usado para gerar a gramatica GBNF)
+    SCHEMA: ClassVar[ActionSchema | None] = None
+
     @abstractmethod
     def execute(self, command: Command) -> bool:
         """Executa o comando.
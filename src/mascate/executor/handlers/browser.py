@@ -1,12 +1,15 @@
 """Handler para abrir URLs no navegador."""
 
 from mascate.executor.handlers.base import BaseHandler
-from mascate.executor.models import Command
+from mascate.executor.models import ActionType, Command
+from mascate.executor.schema import ActionSchema
 
 
 class BrowserHandler(BaseHandler):
     """Abre URLs usando o navegador padrão via xdg-open."""
 
+    SCHEMA = ActionSchema(ActionType.OPEN_URL)
+
     def execute(self, command: Command) -> bool:
         url = command.target
         if not url.startswith(("http://", "https://")):
@@ -12,13 +12,29 @@ from pathlib import Path
 
 from mascate.executor.handlers.base import BaseHandler
 from mascate.executor.models import ActionType, Command
+from mascate.executor.schema import ActionSchema, ParamSpec, TargetSpec
 
 logger = logging.getLogger(__name__)
 
+# Operacoes suportadas (params.operation)
+FILE_OPERATIONS = ("open", "list", "copy", "move", "delete", "mkdir")
+
 
 class FileHandler(BaseHandler):
     """Executa operacoes de arquivo de forma segura."""
 
+    SCHEMA = ActionSchema(
+        ActionType.FILE_OP,
+        targets=(
+            TargetSpec(
+                params=(
+                    ParamSpec("operation", choices=FILE_OPERATIONS),
+                    ParamSpec("destination"),
+                )
+            ),
+        ),
+    )
+
     @property
     def supported_actions(self) -> list[ActionType]:
         """Retorna as acoes suportadas por este handler."""
@@ -3,29 +3,37 @@
 import logging
 
 from mascate.executor.handlers.base import BaseHandler
-from mascate.executor.models import Command
+from mascate.executor.models import ActionType, Command
+from mascate.executor.schema import ActionSchema, TargetSpec
 
 logger = logging.getLogger(__name__)
 
+# Mapeamento de comandos falados para comandos do playerctl
+MEDIA_COMMANDS = {
+    "play": "play",
+    "pausa": "pause",
+    "pause": "pause",
+    "toca": "play-pause",
+    "play-pause": "play-pause",
+    "proxima": "next",
+    "next": "next",
+    "anterior": "previous",
+    "previous": "previous",
+    "stop": "stop",
+}
+
 
 class MediaHandler(BaseHandler):
     """Controla players de mídia compatíveis com MPRIS via playerctl."""
 
+    SCHEMA = ActionSchema(
+        ActionType.MEDIA_CONTROL,
+        targets=(TargetSpec(names=tuple(MEDIA_COMMANDS)),),
+    )
+
     def execute(self, command: Command) -> bool:
         action = command.target.lower()
-
-        # Mapeamento de comandos falados para comandos do playerctl
-        cmd_map = {
-            "play": "play",
-            "pausa": "pause",
-            "pause": "pause",
-            "toca": "play-pause",
-            "proxima": "next",
-            "anterior": "previous",
-            "stop": "stop",
-        }
-
-        pctl_cmd = cmd_map.get(action, action)
+        pctl_cmd = MEDIA_COMMANDS.get(action, action)
 
         logger.debug("Mídia: %s -> playerctl %s", action, pctl_cmd)
         # playerctl costuma ser rápido, rodamos síncrono para checar erro
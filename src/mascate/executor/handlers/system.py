@@ -10,13 +10,62 @@ import subprocess
 
 from mascate.executor.handlers.base import BaseHandler
 from mascate.executor.models import ActionType, Command
+from mascate.executor.schema import ActionSchema, ParamSpec, ParamType, TargetSpec
 
 logger = logging.getLogger(__name__)
 
+# Nomes aceitos para cada operacao (command.target)
+VOLUME_OPS = ("volume", "vol")
+BRIGHTNESS_OPS = ("brightness", "brilho")
+SHUTDOWN_OPS = ("shutdown", "desligar")
+REBOOT_OPS = ("reboot", "reiniciar")
+SUSPEND_OPS = ("suspend", "suspender", "sleep", "dormir")
+LOCK_OPS = ("lock", "bloquear")
+WIFI_OPS = ("wifi",)
+BLUETOOTH_OPS = ("bluetooth", "bt")
+NOTIFICATION_OPS = ("notification", "notify", "notificar")
+
+_VALUE = ParamSpec("value", type=ParamType.NUMBER)
+_TOGGLE = ParamSpec("action", choices=("on", "off", "toggle"))
+
 
 class SystemHandler(BaseHandler):
     """Executa operacoes de sistema de forma segura."""
 
+    SCHEMA = ActionSchema(
+        ActionType.SYSTEM_OP,
+        targets=(
+            TargetSpec(
+                names=VOLUME_OPS,
+                params=(
+                    ParamSpec(
+                        "action",
+                        choices=("up", "down", "mute", "unmute", "toggle", "set"),
+                    ),
+                    _VALUE,
+                ),
+            ),
+            TargetSpec(
+                names=BRIGHTNESS_OPS,
+                params=(ParamSpec("action", choices=("up", "down", "set")), _VALUE),
+            ),
+            TargetSpec(names=SHUTDOWN_OPS),
+            TargetSpec(names=REBOOT_OPS),
+            TargetSpec(names=SUSPEND_OPS),
+            TargetSpec(names=LOCK_OPS),
+            TargetSpec(names=WIFI_OPS, params=(_TOGGLE,)),
+            TargetSpec(names=BLUETOOTH_OPS, params=(_TOGGLE,)),
+            TargetSpec(
+                names=NOTIFICATION_OPS,
+                params=(
+                    ParamSpec("title"),
+                    ParamSpec("body"),
+                    ParamSpec("urgency", choices=("low", "normal", "critical")),
+                ),
+            ),
+        ),
+    )
+
     @property
     def supported_actions(self) -> list[ActionType]:
         """Retorna as acoes suportadas por este handler."""
@@ -36,23 +85,23 @@ class SystemHandler(BaseHandler):
         logger.info("SystemHandler executando operacao: %s", operation)
 
         try:
-            if operation in ("volume", "vol"):
+            if operation in VOLUME_OPS:
                 return self._handle_volume(command.params)
-            elif operation in ("brightness", "brilho"):
+            elif operation in BRIGHTNESS_OPS:
                 return self._handle_brightness(command.params)
-            elif operation in ("shutdown", "desligar"):
+            elif operation in SHUTDOWN_OPS:
                 return self._handle_power("shutdown")
-            elif operation in ("reboot", "reiniciar"):
+            elif operation in REBOOT_OPS:
                 return self._handle_power("reboot")
-            elif operation in ("suspend", "suspender", "sleep", "dormir"):
+            elif operation in SUSPEND_OPS:
                 return self._handle_power("suspend")
-            elif operation in ("lock", "bloquear"):
+            elif operation in LOCK_OPS:
                 return self._lock_screen()
-            elif operation in ("wifi"):
+            elif operation in WIFI_OPS:
                 return self._handle_wifi(command.params)
-            elif operation in ("bluetooth", "bt"):
+            elif operation in BLUETOOTH_OPS:
                 return self._handle_bluetooth(command.params)
-            elif operation in ("notification", "notify", "notificar"):
+            elif operation in NOTIFICATION_OPS:
                 return self._send_notification(command.params)
             else:
                 logger.warning("Operacao de sistema desconhecida: %s", operation)
@@ -9,6 +9,12 @@ from mascate.executor.handlers.file import FileHandler
 from mascate.executor.handlers.media import MediaHandler
 from mascate.executor.handlers.system import SystemHandler
 from mascate.executor.models import ActionType
+from mascate.executor.schema import (
+    CANONICAL_WIRE,
+    COMPACT_WIRE,
+    ActionSchema,
+    build_grammar,
+)
 
 HANDLERS: dict[ActionType, type[BaseHandler]] = {
     ActionType.OPEN_APP: AppHandler,
@@ -18,6 +24,9 @@ HANDLERS: dict[ActionType, type[BaseHandler]] = {
     ActionType.SYSTEM_OP: SystemHandler,
 }
 
+# 'reply' nao tem handler: o Executor devolve o target como resposta falada
+REPLY_SCHEMA = ActionSchema(ActionType.REPLY)
+
 
 def get_handler(action: ActionType) -> BaseHandler | None:
     """Obtém uma instância do handler para a ação.
@@ -32,3 +41,29 @@ def get_handler(action: ActionType) -> BaseHandler | None:
     if handler_class:
         return handler_class()
     return None
+
+
+def get_action_schemas() -> list[ActionSchema]:
+    """Retorna os schemas de todas as acoes executaveis.
+
+    Returns:
+        Schemas declarados pelos handlers registrados, mais 'reply'.
+    """
+    schemas = [cls.SCHEMA for cls in HANDLERS.values() if cls.SCHEMA is not None]
+    schemas.append(REPLY_SCHEMA)
+    return schemas
+
+
+def build_command_grammar(compact: bool = False) -> str:
+    """Gera a gramatica GBNF de comandos a partir dos handlers registrados.
+
+    Args:
+        compact: Se True, usa chaves curtas (a/t/p) sem espacos.
+
+    Returns:
+        Conteudo para intelligence/llm/grammars/command.gbnf
+        (ou command_compact.gbnf).
+    """
+    return build_grammar(
+        get_action_schemas(), wire=COMPACT_WIRE if compact else CANONICAL_WIRE
+    )
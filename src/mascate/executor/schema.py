@@ -0,0 +1,202 @@
+"""Schema declarativo das acoes do Executor.
+
+Cada handler declara a acao que atende, os alvos (ou operacoes) permitidos
+e os parametros que le. A partir desses schemas e gerada a gramatica GBNF
+de comandos, restringindo o LLM ao que o Executor realmente entende.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from mascate.executor.models import ActionType
+
+
+class ParamType(Enum):
+    """Tipos de valor aceitos em parametros."""
+
+    STRING = "string"
+    NUMBER = "number"
+    BOOLEAN = "boolean"
+
+
+@dataclass(frozen=True)
+class ParamSpec:
+    """Parametro lido por um handler."""
+
+    name: str
+    type: ParamType = ParamType.STRING
+    choices: tuple[str, ...] = ()  # Vazio = valor livre do tipo declarado
+    required: bool = False
+
+
+@dataclass(frozen=True)
+class TargetSpec:
+    """Alvo (ou operacao) aceito por uma acao e seus parametros."""
+
+    names: tuple[str, ...] = ()  # Vazio = texto livre
+    params: tuple[ParamSpec, ...] = ()
+
+
+@dataclass(frozen=True)
+class WireFormat:
+    """Chaves e separadores do JSON emitido pelo LLM."""
+
+    action_key: str = "action"
+    target_key: str = "target"
+    params_key: str = "params"
+    item_sep: str = ", "
+    key_sep: str = ": "
+
+
+# Formato canonico (o mesmo que o Executor recebe)
+CANONICAL_WIRE = WireFormat()
+
+# Formato compacto: chaves curtas e sem espacos, menos tokens gerados.
+# O Brain converte de volta para as chaves canonicas.
+COMPACT_WIRE = WireFormat(
+    action_key="a", target_key="t", params_key="p", item_sep=",", key_sep=":"
+)
+
+
+@dataclass(frozen=True)
+class ActionSchema:
+    """Schema completo de uma acao."""
+
+    action: ActionType
+    targets: tuple[TargetSpec, ...] = (TargetSpec(),)
+
+    @property
+    def accepts_params(self) -> bool:
+        """Indica se algum alvo desta acao aceita parametros."""
+        return any(target.params for target in self.targets)
+
+
+# Primitivas JSON usadas pela gramatica gerada
+_PRIMITIVES = r"""# JSON Primitives
+string ::= "\"" ([^\\"] | "\\" ([\"\\/bfnrt] | "u" [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F]))* "\""
+number ::= "-"? [0-9]+ ("." [0-9]+)?
+boolean ::= "true" | "false"
+"""
+
+_HEADER = """# Command Grammar
+# GERADA AUTOMATICAMENTE a partir dos schemas em mascate.executor.registry.
+# Nao edite manualmente: rode `python scripts/generate_grammar.py`.
+#
+# Cada acao aceita apenas os alvos e parametros que seu handler le, com
+# separadores fixos, para que o LLM gaste tokens so no que e incerto.
+"""
+
+
+def _literal(text: str) -> str:
+    """Escapa texto como literal GBNF."""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _rule_name(*parts: str) -> str:
+    """Gera nome de regra GBNF valido (minusculas e hifens)."""
+    return "-".join(re.sub(r"[^a-z0-9]+", "-", p.lower()).strip("-") for p in parts)
+
+
+def _choices(values: Iterable[str]) -> str:
+    """Alternativa entre strings JSON fixas."""
+    return "(" + " | ".join(_literal(json.dumps(v)) for v in values) + ")"
+
+
+def _param_value(param: ParamSpec) -> str:
+    """Expressao GBNF do valor de um parametro."""
+    if param.choices:
+        return _choices(param.choices)
+    return param.type.value
+
+
+def _params_expr(params: tuple[ParamSpec, ...], wire: WireFormat) -> str:
+    """Expressao GBNF do objeto params, na ordem declarada.
+
+    Parametros opcionais podem ser omitidos; a virgula so aparece entre
+    itens presentes.
+    """
+    items = [
+        _literal(f'"{p.name}"{wire.key_sep}') + " " + _param_value(p) for p in params
+    ]
+
+    def tail(i: int) -> str:
+        # Itens restantes, cada um precedido de virgula
+        if i == len(params):
+            return ""
+        item = f"{_literal(wire.item_sep)} {items[i]}"
+        rest = tail(i + 1)
+        if params[i].required:
+            return f"{item} {rest}".strip()
+        return f"({item})? {rest}".strip()
+
+    def head(i: int) -> str:
+        # Primeiro item presente, sem virgula (objeto nunca fica vazio)
+        first = f"{items[i]} {tail(i + 1)}".strip()
+        if params[i].required or i == len(params) - 1:
+            return first
+        return f"({first} | {head(i + 1)})"
+
+    opening = _literal(f'{wire.item_sep}"{wire.params_key}"{wire.key_sep}{{')
+    return " ".join([opening, head(0), _literal("}")])
+
+
+def build_grammar(
+    schemas: Iterable[ActionSchema], wire: WireFormat = CANONICAL_WIRE
+) -> str:
+    """Gera a gramatica GBNF de comandos a partir dos schemas.
+
+    Args:
+        schemas: Schemas das acoes suportadas.
+        wire: Chaves e separadores do JSON gerado.
+
+    Returns:
+        Texto GBNF com regra 'root'.
+    """
+    schemas = list(schemas)
+    action_rules = [_rule_name(s.action.value) for s in schemas]
+    opening = _literal(f'{{"{wire.action_key}"{wire.key_sep}')
+    lines = [
+        f"root ::= {opening} command {_literal('}')}",
+        "",
+        f"command ::= {' | '.join(action_rules)}",
+        "",
+    ]
+
+    for schema, rule in zip(schemas, action_rules):
+        prefix = _literal(
+            f'"{schema.action.value}"{wire.item_sep}"{wire.target_key}"{wire.key_sep}'
+        )
+        target_rules: list[str] = []
+        extra: list[str] = []
+
+        for target in schema.targets:
+            target_expr = _choices(target.names) if target.names else "string"
+            if target.params:
+                params_expr = _params_expr(target.params, wire)
+                if not any(p.required for p in target.params):
+                    params_expr = f"({params_expr})?"
+                target_expr = f"{target_expr} {params_expr}"
+
+            if len(schema.targets) == 1:
+                target_rules.append(target_expr)
+            else:
+                name = _rule_name(rule, target.names[0] if target.names else "any")
+                target_rules.append(name)
+                extra.append(f"{name} ::= {target_expr}")
+
+        body = target_rules[0]
+        if len(target_rules) > 1:
+            body = "(" + " | ".join(target_rules) + ")"
+        lines.append(f"{rule} ::= {prefix} {body}")
+        lines.extend(extra)
+        lines.append("")
+
+    return _HEADER + "\n" + "\n".join(lines) + _PRIMITIVES
@@ -7,14 +7,39 @@ from __future__ import annotations
 
 import json
 import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
-from typing import Any
+from functools import partial
+from typing import TYPE_CHECKING, Any
 
-from mascate.intelligence.llm.granite import GraniteLLM
-from mascate.intelligence.rag.retriever import RAGRetriever
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.llm.granite import CancellationToken, GraniteLLM
+from mascate.intelligence.llm.json_stream import IncrementalJSONParser
+from mascate.intelligence.text import normalize_transcript
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from mascate.intelligence.intent_cache import IntentCache
+    from mascate.intelligence.rag.compression import ContextCompressor
+    from mascate.intelligence.rag.context import ContextAssembler
+    from mascate.intelligence.rag.retriever import RAGRetriever, SearchResult
+    from mascate.intelligence.router import FastPathRouter
+    from mascate.intelligence.semantic_router import SemanticRouter
 
 logger = logging.getLogger(__name__)
 
+# Chaves curtas do formato compacto (gramatica command_compact) -> canonicas
+COMPACT_KEYS = {"a": "action", "t": "target", "p": "params"}
+
+# Resposta falada quando a geração estoura o prazo sem intenção utilizável
+STILL_WORKING_REPLY = "Ainda estou processando. Pode repetir o comando?"
+
+# Ações que dependem do momento da conversa e não vão para o intent cache
+UNCACHED_ACTIONS = frozenset({"reply"})
+
 
 @dataclass
 class Intent:
@@ -29,15 +54,83 @@ class Intent:
 class Brain:
     """O Cérebro do sistema."""
 
-    def __init__(self, llm: GraniteLLM, retriever: RAGRetriever) -> None:
+    def __init__(
+        self,
+        llm: GraniteLLM,
+        retriever: RAGRetriever,
+        early_dispatch_actions: Iterable[str] | None = None,
+        grammar_name: str = "command",
+        top_k: int = 3,
+        context_assembler: ContextAssembler | None = None,
+        context_compressor: ContextCompressor | None = None,
+        retrieval_deadline_s: float | None = None,
+        generation_deadline_s: float | None = None,
+        router: FastPathRouter | None = None,
+        semantic_router: SemanticRouter | None = None,
+        intent_cache: IntentCache | None = None,
+        parallel_prefill: bool = False,
+    ) -> None:
         """Inicializa o cérebro.
 
         Args:
             llm: Instância do GraniteLLM.
             retriever: Instância do RAGRetriever.
+            early_dispatch_actions: Ações sem parâmetros que podem ser
+                despachadas assim que 'action' e 'target' estiverem completos.
+                Se definido, a geração é consumida em streaming e encerrada
+                na chave final balanceada. Se None, usa geração não-streaming.
+            grammar_name: Gramática de saída ('command' ou 'command_compact',
+                com chaves curtas convertidas de volta em _parse_response).
+            top_k: Documentos candidatos buscados no RAG.
+            context_assembler: Monta o contexto dentro de um orçamento de
+                tokens. Se None, usa retriever.format_context com todos os
+                documentos.
+            context_compressor: Reduz os documentos às sentenças mais
+                próximas da query antes da montagem do contexto.
+            retrieval_deadline_s: Prazo da busca no RAG. Estourado, segue sem
+                contexto. None desativa.
+            generation_deadline_s: Prazo da geração. Estourado, a geração é
+                interrompida e o Brain usa a melhor resposta disponível
+                (atalho do router, intenção parcial ou aviso de que ainda
+                está processando). None desativa.
+            router: Fast path consultado antes do RAG e do LLM; frases
+                reconhecidas viram Intent direto.
+            semantic_router: Consultado após o fast path; paráfrases
+                próximas de um exemplo (com margem) viram Intent sem o LLM.
+            intent_cache: Cache de intenções validadas por transcrição
+                normalizada, consultado após o fast path. A chave inclui as
+                versões da Knowledge Base e da gramática.
+            parallel_prefill: Se True, usa o prompt com o pedido antes do
+                contexto e avalia sistema + pedido no LLM enquanto a busca
+                no RAG roda em paralelo; o contexto (se houver) é anexado
+                depois, sem reavaliar o início do prompt.
         """
         self.llm = llm
         self.retriever = retriever
+        self.grammar_name = grammar_name
+        self.top_k = top_k
+        self.context_assembler = context_assembler
+        self.context_compressor = context_compressor
+        self.early_dispatch_actions = (
+            frozenset(early_dispatch_actions)
+            if early_dispatch_actions is not None
+            else None
+        )
+        self.retrieval_deadline_s = retrieval_deadline_s
+        self.generation_deadline_s = generation_deadline_s
+        self.router = router
+        self.semantic_router = semantic_router
+        self.intent_cache = intent_cache
+        self.parallel_prefill = parallel_prefill
+        # Resposta degradada (prazo estourado) não vai para o cache
+        self._degraded = False
+        self._cancel_token: CancellationToken | None = None
+        # Threads criadas sob demanda: busca no RAG e aquecimento do LLM
+        self._retrieval_pool: ThreadPoolExecutor | None = None
+        self._warm_up_pool: ThreadPoolExecutor | None = None
+        self._warm_up_future: Future[None] | None = None
+        # Busca especulativa da transcrição parcial (texto normalizado, busca)
+        self._prefetched: tuple[str, Future[list[SearchResult]]] | None = None
 
     def process(self, user_input: str) -> Intent | None:
         """Processa a entrada do usuário e retorna uma intenção.
@@ -46,38 +139,343 @@ class Brain:
             user_input: Texto falado pelo usuário.
 
         Returns:
-            Objeto Intent ou None se falhar.
+            Objeto Intent ou None se falhar ou for cancelado.
         """
         logger.info("Processando input: '%s'", user_input)
+        if self.router is not None:
+            intent = self.router.route(user_input)
+            if intent is not None:
+                return intent
+
+        version: tuple[int, ...] = ()
+        if self.intent_cache is not None:
+            version = self._cache_version()
+            intent = self.intent_cache.get(user_input, version)
+            if intent is not None:
+                return intent
+
+        intent = None
+        if self.semantic_router is not None:
+            intent = self.semantic_router.route(user_input)
+
+        self._degraded = False
+        if intent is None:
+            token = CancellationToken()
+            self._cancel_token = token
+            try:
+                intent = self._process(user_input, token)
+            finally:
+                if self._cancel_token is token:
+                    self._cancel_token = None
+
+        if (
+            self.intent_cache is not None
+            and intent is not None
+            and intent.action not in UNCACHED_ACTIONS
+            and not self._degraded
+        ):
+            self.intent_cache.put(user_input, version, intent)
+        return intent
+
+    def learn(self, user_input: str, intent_data: dict[str, Any]) -> None:
+        """Registra um comando executado com sucesso como exemplo.
+
+        Args:
+            user_input: Texto falado pelo usuário.
+            intent_data: Intenção executada.
+        """
+        if self.semantic_router is not None:
+            self.semantic_router.learn(user_input, intent_data)
+
+    def warm_up(self) -> None:
+        """Paga os custos fixos enquanto o usuário ainda está falando.
+
+        Chamado na ativação (wake word ou hotkey): em segundo plano, toca os
+        pesos do LLM e restaura o snapshot do prompt de sistema, e pré-carrega
+        o modelo de embedding. Não bloqueia.
+        """
+        self._prefetched = None
+        if self._warm_up_future is None or self._warm_up_future.done():
+            if self._warm_up_pool is None:
+                self._warm_up_pool = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="brain-warmup"
+                )
+            self._warm_up_future = self._warm_up_pool.submit(self.llm.warm_up)
+        self._pool().submit(self._warm_up_embedding)
+        get_metrics().increment("brain.warm_up")
+
+    def prefetch(self, partial_input: str) -> None:
+        """Inicia a busca no RAG com uma transcrição parcial.
 
+        Se a transcrição final tiver a mesma forma normalizada, process()
+        reaproveita o resultado em vez de buscar de novo.
+
+        Args:
+            partial_input: Texto parcial do STT (fala em andamento).
+        """
+        normalized = normalize_transcript(partial_input)
+        if not normalized or (
+            self._prefetched is not None and self._prefetched[0] == normalized
+        ):
+            return
+        future = self._pool().submit(self._search, partial_input)
+        self._prefetched = (normalized, future)
+        get_metrics().increment("brain.prefetch")
+
+    def cancel(self) -> None:
+        """Cancela o processamento em andamento (barge-in, nova ativação).
+
+        A geração do LLM para no próximo token e process() retorna None.
+        """
+        token = self._cancel_token
+        if token is not None and not token.cancelled:
+            token.cancel()
+            get_metrics().increment("brain.cancelled")
+            logger.info("Processamento cancelado")
+
+    def _process(self, user_input: str, token: CancellationToken) -> Intent | None:
+        """Executa RAG e geração para process()."""
         # 1. Recupera contexto relevante (RAG)
         # Busca documentos que ajudem a entender comandos ou procedimentos
-        search_results = self.retriever.search(user_input, top_k=3)
-        context = self.retriever.format_context(search_results)
+        # No modo paralelo o LLM avalia sistema + pedido durante a busca
+        during = partial(self._prime, user_input) if self.parallel_prefill else None
+        search_results = self._retrieve(user_input, during)
+        self._wait_warm_up()
+
+        if self.parallel_prefill and not search_results:
+            context = ""  # Segue sem reavaliar: o contexto vazio é omitido
+        elif self.context_assembler is not None:
+            context = self.context_assembler.assemble(search_results)
+        else:
+            context = self.retriever.format_context(search_results)
 
         logger.debug("Contexto recuperado: %d documentos", len(search_results))
+        if token.cancelled:
+            return None
+
+        deadline = None
+        if self.generation_deadline_s is not None:
+            deadline = time.monotonic() + self.generation_deadline_s
 
         # 2. Gera resposta estruturada (LLM + GBNF)
         # O prompt e a gramática forçam a saída JSON
+        if self.early_dispatch_actions is not None:
+            return self._generate_streaming(
+                user_input, context, self.early_dispatch_actions, deadline, token
+            )
+
         json_output = self.llm.generate(
             user_input=user_input,
             context=context,
-            grammar_name="command",
+            grammar_name=self.grammar_name,
             temperature=0.1,  # Baixa criatividade para precisão
+            deadline=deadline,
+            cancel_token=token,
+            user_first=self.parallel_prefill,
         )
 
         # 3. Faz parsing e validação básica
+        if token.cancelled:
+            return None
         if isinstance(json_output, str):
+            if _expired(deadline):
+                parser = IncrementalJSONParser()
+                if not parser.feed(json_output):
+                    return self._fallback(parser)
             return self._parse_response(json_output)
 
         # Se for iterator (streaming), teríamos que acumular.
         # O método generate padrão já retorna string completa.
         return None
 
+    def _cache_version(self) -> tuple[int, ...]:
+        """Versões que invalidam o intent cache (Knowledge Base, gramática)."""
+        return (
+            self.retriever.kb.version,
+            self.llm.grammar_cache.version(self.grammar_name),
+        )
+
+    def _retrieve(
+        self, user_input: str, during: Callable[[], object] | None = None
+    ) -> list[SearchResult]:
+        """Busca (e comprime) documentos, respeitando o prazo da busca.
+
+        Args:
+            user_input: Texto do usuário.
+            during: Executado na thread atual enquanto a busca roda.
+        """
+        start = time.monotonic()
+        future = self._take_prefetched(user_input)
+        if future is None:
+            if self.retrieval_deadline_s is None and during is None:
+                return self._search(user_input)
+            future = self._pool().submit(self._search, user_input)
+        if during is not None:
+            during()
+
+        timeout = None
+        if self.retrieval_deadline_s is not None:
+            timeout = max(0.0, self.retrieval_deadline_s - (time.monotonic() - start))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # A busca segue em segundo plano; o resultado é descartado
+            get_metrics().increment("brain.deadline.retrieval")
+            logger.warning(
+                "Busca RAG excedeu %.2fs, seguindo sem contexto",
+                self.retrieval_deadline_s,
+            )
+            return []
+
+    def _take_prefetched(self, user_input: str) -> Future[list[SearchResult]] | None:
+        """Consome a busca especulativa se ela for da mesma transcrição."""
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None:
+            return None
+        if prefetched[0] == normalize_transcript(user_input):
+            get_metrics().increment("brain.prefetch.hits")
+            return prefetched[1]
+        get_metrics().increment("brain.prefetch.misses")
+        return None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Thread da busca no RAG (criada no primeiro uso)."""
+        if self._retrieval_pool is None:
+            self._retrieval_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="brain-rag"
+            )
+        return self._retrieval_pool
+
+    def _wait_warm_up(self) -> None:
+        """Espera o aquecimento do LLM (o modelo não é usado por duas threads)."""
+        future = self._warm_up_future
+        if future is not None and not future.done():
+            with get_metrics().timer("brain.warm_up.wait"):
+                future.result()
+
+    def _prime(self, user_input: str) -> None:
+        """Avalia sistema + pedido no LLM após o aquecimento."""
+        self._wait_warm_up()
+        self.llm.prime(user_input)
+
+    def _warm_up_embedding(self) -> None:
+        """Carrega a Knowledge Base (se descarregada) e aquece o embedding."""
+        try:
+            with get_metrics().timer("brain.warm_up.embedding"):
+                self.retriever.kb.load()
+                self.retriever.kb.embedding_model.encode(["mascate"], cache=False)
+        except Exception as e:
+            logger.debug("Falha no aquecimento do embedding: %s", e)
+
+    def _search(self, user_input: str) -> list[SearchResult]:
+        """Busca no RAG e aplica a compressão de contexto."""
+        search_results = self.retriever.search(user_input, top_k=self.top_k)
+        if self.context_compressor is not None and search_results:
+            search_results = self.context_compressor.compress(
+                user_input, search_results
+            )
+        return search_results
+
+    def _fallback(self, parser: IncrementalJSONParser) -> Intent:
+        """Melhor resposta disponível após estourar o prazo de geração.
+
+        Intenção parcial se 'action' e 'target' já foram gerados; senão,
+        aviso de que ainda está processando. Regras do fast path não são
+        tentadas aqui: casadas em qualquer ponto da frase, executariam
+        comandos que o usuário não pediu ("nao abre o firefox").
+        """
+        metrics = get_metrics()
+        metrics.increment("brain.deadline.generation")
+        self._degraded = True
+
+        fields = _canonical_keys(parser.fields)
+        action = fields.get("action")
+        target = fields.get("target")
+        if isinstance(action, str) and isinstance(target, str):
+            metrics.increment("brain.fallback.partial")
+            logger.warning("Geração excedeu o prazo, usando intenção parcial")
+            data = {"action": action, "target": target}
+        else:
+            metrics.increment("brain.fallback.still_working")
+            logger.warning("Geração excedeu o prazo sem intenção utilizável")
+            data = {"action": "reply", "target": STILL_WORKING_REPLY}
+
+        return Intent(
+            action=data["action"],
+            target=data["target"],
+            params={},
+            raw_json=json.dumps(data, ensure_ascii=False),
+        )
+
+    def _generate_streaming(
+        self,
+        user_input: str,
+        context: str,
+        early_actions: frozenset[str],
+        deadline: float | None = None,
+        token: CancellationToken | None = None,
+    ) -> Intent | None:
+        """Consome a geração em streaming com despacho antecipado.
+
+        Para ações sem parâmetros, a intenção é devolvida assim que 'target'
+        fecha; nas demais, a geração para na chave final balanceada, sem
+        esperar o token de fim de texto.
+        """
+        parser = IncrementalJSONParser()
+        stream = self.llm.generate(
+            user_input=user_input,
+            context=context,
+            grammar_name=self.grammar_name,
+            temperature=0.1,
+            stream=True,
+            deadline=deadline,
+            cancel_token=token,
+            user_first=self.parallel_prefill,
+        )
+
+        try:
+            for delta in stream:
+                if (token is not None and token.cancelled) or parser.feed(delta):
+                    break
+
+                fields = _canonical_keys(parser.fields)
+                action = fields.get("action")
+                target = fields.get("target")
+                if action in early_actions and isinstance(target, str):
+                    get_metrics().increment("brain.early_dispatch")
+                    logger.debug("Despacho antecipado: %s (%s)", action, target)
+                    return Intent(
+                        action=action,
+                        target=target,
+                        params={},
+                        raw_json=json.dumps(
+                            {"action": action, "target": target}, ensure_ascii=False
+                        ),
+                    )
+        finally:
+            # Encerrar o gerador interrompe a geração no llama.cpp
+            close = getattr(stream, "close", None)
+            if callable(close):
+                close()
+
+        if token is not None and token.cancelled:
+            return None
+        if not parser.complete and _expired(deadline):
+            return self._fallback(parser)
+        return self._parse_response(parser.text)
+
     def _parse_response(self, json_str: str) -> Intent | None:
         """Converte string JSON em objeto Intent."""
         try:
             data = json.loads(json_str)
+            if not isinstance(data, dict):
+                logger.warning("JSON gerado não é um objeto: %s", json_str)
+                return None
+
+            if any(key in COMPACT_KEYS for key in data):
+                # Formato compacto: o Executor recebe sempre as chaves canônicas
+                data = _canonical_keys(data)
+                json_str = json.dumps(data, ensure_ascii=False)
 
             # Validação básica de schema (já garantida pelo GBNF, mas bom checar)
             action = data.get("action")
@@ -99,3 +497,13 @@ class Brain:
         except Exception as e:
             logger.error("Erro ao processar resposta do LLM: %s", e)
             return None
+
+
+def _expired(deadline: float | None) -> bool:
+    """Indica se o prazo (time.monotonic()) já passou."""
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _canonical_keys(data: dict[str, Any]) -> dict[str, Any]:
+    """Converte chaves do formato compacto (a/t/p) para as canônicas."""
+    return {COMPACT_KEYS.get(key, key): value for key, value in data.items()}
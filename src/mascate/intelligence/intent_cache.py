@@ -0,0 +1,162 @@
+"""Cache de intencoes por transcricao normalizada.
+
+Usuarios repetem os mesmos comandos varias vezes ao dia. A intencao
+validada de cada transcricao e guardada em um LRU com TTL, chaveado pela
+forma normalizada do texto e pelas versoes da Knowledge Base e da gramatica;
+reingerir a base ou alterar a gramatica invalida as entradas antigas.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.brain import Intent
+from mascate.intelligence.text import normalize_transcript
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class IntentCache:
+    """LRU com TTL de intencoes validadas, persistido em JSON."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_entries: int = 256,
+        ttl_s: float = 86400.0,
+    ) -> None:
+        """Inicializa o cache e carrega as entradas persistidas.
+
+        Args:
+            path: Arquivo JSON de persistencia. Se None, o cache vive apenas
+                em memoria.
+            max_entries: Numero maximo de entradas (as menos usadas saem).
+            ttl_s: Validade de cada entrada em segundos.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        # chave -> (expira em, time.time(); campos da Intent)
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._load()
+
+    def __len__(self) -> int:
+        """Numero de entradas (inclui expiradas ainda nao removidas)."""
+        return len(self._entries)
+
+    def get(self, text: str, version: tuple[int, ...]) -> Intent | None:
+        """Busca a intencao de uma transcricao.
+
+        Args:
+            text: Transcricao do usuario.
+            version: Versoes das dependencias (Knowledge Base, gramatica).
+
+        Returns:
+            Intent cacheada ou None se ausente ou expirada.
+        """
+        start = time.perf_counter()
+        metrics = get_metrics()
+        key = _make_key(text, version)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                metrics.increment("intent_cache.expired")
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        metrics.observe("intent_cache.lookup", time.perf_counter() - start)
+        if entry is None:
+            metrics.increment("intent_cache.misses")
+            return None
+
+        metrics.increment("intent_cache.hits")
+        logger.debug("Intent cache: acerto para '%s'", key)
+        return Intent(**entry[1])
+
+    def put(self, text: str, version: tuple[int, ...], intent: Intent) -> None:
+        """Guarda a intencao validada de uma transcricao e persiste o cache.
+
+        Args:
+            text: Transcricao do usuario.
+            version: Versoes das dependencias (Knowledge Base, gramatica).
+            intent: Intencao validada.
+        """
+        key = _make_key(text, version)
+        data = {
+            "action": intent.action,
+            "target": intent.target,
+            "params": intent.params,
+            "raw_json": intent.raw_json,
+        }
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_s, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                get_metrics().increment("intent_cache.evictions")
+            self._save()
+
+    def clear(self) -> None:
+        """Remove todas as entradas (e o arquivo persistido)."""
+        with self._lock:
+            self._entries.clear()
+            if self.path is not None:
+                self.path.unlink(missing_ok=True)
+
+    def _load(self) -> None:
+        """Carrega as entradas validas do arquivo, descartando as expiradas."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            stored = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Intent cache invalido (%s): %s", self.path, e)
+            return
+        if not isinstance(stored, list):
+            return
+
+        now = time.time()
+        for entry in stored[-self.max_entries :]:
+            try:
+                key, expires_at, data = entry
+                Intent(**data)
+            except (TypeError, ValueError):
+                continue
+            if expires_at > now:
+                self._entries[key] = (expires_at, data)
+        logger.debug("Intent cache: %d entradas carregadas", len(self._entries))
+
+    def _save(self) -> None:
+        """Grava as entradas de forma atomica (em ordem de uso)."""
+        if self.path is None:
+            return
+        stored = [
+            [key, expires_at, data] for key, (expires_at, data) in self._entries.items()
+        ]
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps(stored, ensure_ascii=False), encoding="utf-8"
+            )
+            tmp_path.replace(self.path)
+        except OSError as e:
+            logger.warning("Falha ao salvar o intent cache: %s", e)
+
+
+def _make_key(text: str, version: tuple[int, ...]) -> str:
+    """Chave do cache: versoes + transcricao normalizada."""
+    return ":".join(str(v) for v in version) + "|" + normalize_transcript(text)
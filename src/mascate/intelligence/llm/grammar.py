@@ -1,14 +1,24 @@
 """Loader de gramáticas GBNF.
 
-Gerencia o carregamento de arquivos GBNF para o LLM.
+Gerencia o carregamento de arquivos GBNF para o LLM e mantém um cache
+das gramáticas já compiladas.
 """
 
 from __future__ import annotations
 
 import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from mascate.core.exceptions import MascateError
+from mascate.core.metrics import get_metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +27,71 @@ class GrammarError(MascateError):
     """Erro relacionado a gramáticas."""
 
 
+# Literal GBNF ("...") com escapes
+_LITERAL_RE = re.compile(r'"((?:\\.|[^"\\])*)"')
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+
+def _unescape(literal: str) -> str:
+    """Converte o conteúdo de um literal GBNF em texto."""
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), literal)
+
+
+def split_forced_prefix(gbnf: str) -> tuple[str, str]:
+    """Separa o prefixo determinístico da regra 'root'.
+
+    Se 'root' começa com literais obrigatórios (sem alternativa nem
+    quantificador), esse texto é forçado pela gramática e pode ser
+    pré-preenchido no prompt em vez de amostrado token a token.
+
+    Args:
+        gbnf: Texto da gramática.
+
+    Returns:
+        Tupla (prefixo, gramática com 'root' sem o prefixo). Se não houver
+        prefixo forçado, retorna ("", gbnf).
+    """
+    lines = gbnf.splitlines(keepends=True)
+    for index, line in enumerate(lines):
+        if not line.startswith("root ::= "):
+            continue
+
+        body = line[len("root ::= ") :].rstrip("\n")
+        if _has_top_level_alternative(body):
+            return "", gbnf
+
+        prefix_parts: list[str] = []
+        rest = body
+        while match := _LITERAL_RE.match(rest):
+            after = rest[match.end() :]
+            if after[:1] in ("?", "*", "+"):
+                break
+            prefix_parts.append(_unescape(match.group(1)))
+            rest = after.lstrip(" ")
+
+        if not prefix_parts or not rest:
+            return "", gbnf
+
+        lines[index] = f"root ::= {rest}\n"
+        return "".join(prefix_parts), "".join(lines)
+
+    return "", gbnf
+
+
+def _has_top_level_alternative(body: str) -> bool:
+    """Indica se a expressão tem '|' fora de parênteses, literais e classes."""
+    stripped = re.sub(r'"(?:\\.|[^"\\])*"|\[(?:\\.|[^\]\\])*\]', "", body)
+    depth = 0
+    for char in stripped:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
 class GrammarLoader:
     """Carregador de gramáticas GBNF."""
 
@@ -32,6 +107,25 @@ class GrammarLoader:
         else:
             self.grammar_dir = grammar_dir
 
+    def path_for(self, name: str) -> Path:
+        """Retorna o caminho do arquivo de uma gramática.
+
+        Args:
+            name: Nome do arquivo (sem extensão .gbnf).
+
+        Returns:
+            Caminho do arquivo .gbnf (pode não existir).
+        """
+        return self.grammar_dir / f"{name}.gbnf"
+
+    def available(self) -> list[str]:
+        """Lista as gramáticas disponíveis no diretório.
+
+        Returns:
+            Nomes (sem extensão) ordenados alfabeticamente.
+        """
+        return sorted(path.stem for path in self.grammar_dir.glob("*.gbnf"))
+
     def load(self, name: str) -> str:
         """Carrega o conteúdo de uma gramática.
 
@@ -44,7 +138,7 @@ class GrammarLoader:
         Raises:
             GrammarError: Se o arquivo não for encontrado.
         """
-        file_path = self.grammar_dir / f"{name}.gbnf"
+        file_path = self.path_for(name)
 
         if not file_path.exists():
             raise GrammarError(
@@ -55,3 +149,154 @@ class GrammarLoader:
             return file_path.read_text(encoding="utf-8")
         except Exception as e:
             raise GrammarError(f"Erro ao ler gramática {name}: {e}") from e
+
+
+@dataclass
+class CompiledGrammar:
+    """Gramática compilada e os dados usados para invalidá-la."""
+
+    name: str
+    grammar: Any
+    mtime_ns: int
+    compile_time: float
+    prefix: str = ""  # Texto forçado pré-preenchido no prompt (modo prefill)
+
+
+class GrammarCache:
+    """Cache de gramáticas compiladas, invalidado pelo mtime do arquivo.
+
+    Evita reler e recompilar o GBNF a cada requisição. Cada acerto soma o
+    tempo da compilação original em 'grammar_cache.time_saved_s'.
+    """
+
+    def __init__(self, loader: GrammarLoader, compiler: Callable[[str], Any]) -> None:
+        """Inicializa o cache.
+
+        Args:
+            loader: Loader que localiza e lê os arquivos .gbnf.
+            compiler: Função que compila o texto GBNF
+                      (ex: LlamaGrammar.from_string).
+        """
+        self.loader = loader
+        self.compiler = compiler
+        self._entries: dict[tuple[str, bool], CompiledGrammar] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Retorna a gramática compilada, recompilando se o arquivo mudou.
+
+        Args:
+            name: Nome da gramática (sem extensão .gbnf).
+
+        Returns:
+            Objeto de gramática compilado.
+
+        Raises:
+            GrammarError: Se o arquivo não existir ou não puder ser lido.
+        """
+        return self._get(name, prefill=False).grammar
+
+    def get_prefilled(self, name: str) -> tuple[str, Any]:
+        """Retorna o prefixo forçado e a gramática compilada do restante.
+
+        Args:
+            name: Nome da gramática (sem extensão .gbnf).
+
+        Returns:
+            Tupla (prefixo, gramática). O prefixo é "" se 'root' não
+            começar com texto determinístico.
+
+        Raises:
+            GrammarError: Se o arquivo não existir ou não puder ser lido.
+        """
+        entry = self._get(name, prefill=True)
+        return entry.prefix, entry.grammar
+
+    def version(self, name: str) -> int:
+        """Retorna a versão (mtime em ns) do arquivo da gramática.
+
+        Raises:
+            GrammarError: Se o arquivo não existir.
+        """
+        return self._mtime_ns(name)
+
+    def _get(self, name: str, prefill: bool) -> CompiledGrammar:
+        """Busca no cache ou compila a gramática (e variante prefill)."""
+        metrics = get_metrics()
+        mtime_ns = self._mtime_ns(name)
+        key = (name, prefill)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == mtime_ns:
+                metrics.increment("grammar_cache.hits")
+                metrics.increment("grammar_cache.time_saved_s", entry.compile_time)
+                return entry
+
+            start = time.perf_counter()
+            text = self.loader.load(name)
+            prefix = ""
+            if prefill:
+                prefix, text = split_forced_prefix(text)
+            grammar = self.compiler(text)
+            elapsed = time.perf_counter() - start
+
+            entry = CompiledGrammar(
+                name=name,
+                grammar=grammar,
+                mtime_ns=mtime_ns,
+                compile_time=elapsed,
+                prefix=prefix,
+            )
+            self._entries[key] = entry
+
+        metrics.increment("grammar_cache.misses")
+        metrics.observe("grammar_cache.compile", elapsed)
+        logger.debug("Gramática '%s' compilada em %.1fms", name, elapsed * 1000)
+        return entry
+
+    def precompile(self, prefill: bool = False) -> int:
+        """Compila todas as gramáticas do diretório do loader.
+
+        Arquivos sem regra 'root' (bibliotecas como base.gbnf) são ignorados.
+
+        Args:
+            prefill: Se True, compila a variante sem o prefixo forçado.
+
+        Returns:
+            Número de gramáticas compiladas.
+        """
+        compiled = 0
+        for name in self.loader.available():
+            try:
+                if "root ::=" not in self.loader.load(name):
+                    continue
+                self._get(name, prefill=prefill)
+                compiled += 1
+            except Exception as e:
+                logger.warning("Falha ao pré-compilar gramática %s: %s", name, e)
+
+        logger.info("%d gramáticas pré-compiladas", compiled)
+        return compiled
+
+    def invalidate(self, name: str | None = None) -> None:
+        """Remove uma gramática (ou todas) do cache.
+
+        Args:
+            name: Nome da gramática. Se None, limpa o cache inteiro.
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop((name, False), None)
+                self._entries.pop((name, True), None)
+
+    def _mtime_ns(self, name: str) -> int:
+        """Retorna o mtime do arquivo da gramática."""
+        try:
+            return self.loader.path_for(name).stat().st_mtime_ns
+        except OSError as e:
+            raise GrammarError(
+                f"Gramática '{name}' não encontrada em {self.loader.grammar_dir}"
+            ) from e
@@ -5,32 +5,68 @@ Gerencia o carregamento do modelo na GPU e a geracao de respostas JSON.
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import pickle
+import threading
+import time
 from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
 
 try:
-    from llama_cpp import Llama, LlamaGrammar
+    from llama_cpp import Llama, LlamaGrammar, StoppingCriteriaList
 except ImportError:
     Llama = None
     LlamaGrammar = None
+    StoppingCriteriaList = None
+
+try:
+    from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+except ImportError:
+    LlamaPromptLookupDecoding = None
 
 from mascate.core.exceptions import MascateError
-from mascate.intelligence.llm.grammar import GrammarLoader
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.llm.grammar import GrammarCache, GrammarLoader
 from mascate.intelligence.llm.prompts import (
     ASSISTANT_TEMPLATE,
+    CONTEXT_TEMPLATE,
     SYSTEM_PROMPT,
+    USER_FIRST_TEMPLATE,
     USER_TEMPLATE,
 )
 
 logger = logging.getLogger(__name__)
 
+# Bytes iniciais do GGUF usados na impressao digital do modelo
+_FINGERPRINT_BYTES = 1 << 20
+
 
 class LLMError(MascateError):
     """Erro relacionado ao LLM."""
 
 
+class CancellationToken:
+    """Sinaliza o cancelamento de uma geracao em andamento.
+
+    Verificado pelo criterio de parada entre um token e outro.
+    """
+
+    def __init__(self) -> None:
+        """Inicializa o token nao cancelado."""
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Cancela a geracao associada."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Indica se o cancelamento foi solicitado."""
+        return self._event.is_set()
+
+
 class GraniteLLM:
     """Interface para o modelo Granite."""
 
@@ -41,6 +77,10 @@ class GraniteLLM:
         n_ctx: int = 4096,
         n_threads: int = 4,
         verbose: bool = False,
+        cache_dir: str | Path | None = None,
+        prompt_cache: bool = True,
+        prefill: bool = True,
+        speculative_draft_tokens: int = 0,
     ) -> None:
         """Inicializa o LLM.
 
@@ -50,6 +90,14 @@ class GraniteLLM:
             n_ctx: Tamanho do contexto.
             n_threads: Threads de CPU (se nao usar GPU total).
             verbose: Logs do llama.cpp.
+            cache_dir: Diretorio para persistir o snapshot do prompt de sistema.
+                       Se None, o snapshot fica apenas em memoria.
+            prompt_cache: Se True, avalia o prompt de sistema uma unica vez e
+                          restaura o estado antes de cada requisicao.
+            prefill: Se True, o prefixo deterministico da gramatica (ex:
+                     '{"action": ') vai direto no prompt em vez de ser amostrado.
+            speculative_draft_tokens: Tokens propostos por passo na decodificacao
+                especulativa por busca de n-gramas no prompt (0 desativa).
         """
         if Llama is None:
             raise LLMError(
@@ -61,6 +109,19 @@ class GraniteLLM:
         if not self.model_path.exists():
             raise LLMError(f"Modelo LLM nao encontrado: {model_path}")
 
+        self.n_ctx = n_ctx
+        self.prefill = prefill
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._prefix_state: Any = None
+        # Tokens ja avaliados por prime() (sistema + pedido)
+        self._primed_tokens: list[int] | None = None
+        # Tokens das geracoes em andamento (cancelados por cancel())
+        self._active_tokens: set[CancellationToken] = set()
+        self._tokens_lock = threading.Lock()
+        # O contexto do llama.cpp nao e thread-safe: geracao, warm_up e
+        # prime o usam um de cada vez (cancel() so marca os tokens)
+        self._llm_lock = threading.Lock()
+
         try:
             self.llm = Llama(
                 model_path=str(self.model_path),
@@ -68,13 +129,23 @@ class GraniteLLM:
                 n_ctx=n_ctx,
                 n_threads=n_threads,
                 verbose=verbose,
+                draft_model=self._create_draft_model(speculative_draft_tokens),
             )
             self.grammar_loader = GrammarLoader()
+            self.grammar_cache = GrammarCache(
+                self.grammar_loader, LlamaGrammar.from_string
+            )
             logger.info("Granite LLM carregado: %s", self.model_path)
         except Exception as e:
             logger.error("Falha ao carregar LLM: %s", e)
             raise LLMError(f"Erro inicializacao LLM: {e}") from e
 
+        # Compila as gramaticas fora do caminho critico das requisicoes
+        self.grammar_cache.precompile(prefill=self.prefill)
+
+        if prompt_cache:
+            self._init_prompt_cache()
+
     def generate(
         self,
         user_input: str,
@@ -83,6 +154,9 @@ class GraniteLLM:
         temperature: float = 0.1,
         max_tokens: int = 256,
         stream: bool = False,
+        deadline: float | None = None,
+        cancel_token: CancellationToken | None = None,
+        user_first: bool = False,
     ) -> str | Iterator[str]:
         """Gera resposta para o input do usuario.
 
@@ -93,60 +167,379 @@ class GraniteLLM:
             temperature: Criatividade (baixo para comandos).
             max_tokens: Limite de saida.
             stream: Se True, retorna iterador de strings.
+            deadline: Instante limite (time.monotonic()). A geracao e
+                      interrompida entre tokens ao atingi-lo, devolvendo o
+                      texto parcial.
+            cancel_token: Token para cancelar esta geracao. Se None, a
+                          geracao ainda pode ser cancelada via cancel().
+            user_first: Se True, usa o layout com o pedido antes do contexto
+                        (contexto vazio e omitido), reaproveitando o estado
+                        avaliado por prime().
 
         Returns:
             JSON string ou iterador.
         """
-        # Constroi prompt
-        prompt = (
-            SYSTEM_PROMPT
-            + USER_TEMPLATE.format(context=context, user_input=user_input)
-            + ASSISTANT_TEMPLATE
-        )
-
-        # Carrega gramatica
+        # Obtem gramatica compilada (cache invalidado pelo mtime do arquivo).
+        # No modo prefill, o texto forcado do inicio da gramatica vai no prompt.
         try:
-            gbnf_content = self.grammar_loader.load(grammar_name)
-            grammar = LlamaGrammar.from_string(gbnf_content)
+            if self.prefill:
+                prefix, grammar = self.grammar_cache.get_prefilled(grammar_name)
+            else:
+                prefix, grammar = "", self.grammar_cache.get(grammar_name)
         except Exception as e:
             logger.error("Erro ao carregar gramatica %s: %s", grammar_name, e)
             # Fallback sem gramatica se falhar (arriscado, mas evita crash)
-            grammar = None
+            prefix, grammar = "", None
 
-        if stream:
-            return self._stream_generation(prompt, grammar, temperature, max_tokens)
+        prompt = self._build_prompt(user_input, context, user_first) + prefix
+        token = cancel_token or CancellationToken()
+        stopping_criteria = self._stopping_criteria(deadline, token)
 
-        try:
-            output = self.llm(
+        if stream:
+            return self._stream_generation(
                 prompt,
-                grammar=grammar,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stop=["<|endoftext|>"],
-                echo=False,
+                grammar,
+                temperature,
+                max_tokens,
+                prefix,
+                stopping_criteria,
+                token,
             )
-            return output["choices"][0]["text"].strip()
+
+        if token.cancelled:
+            return ""
+
+        self._register(token)
+        try:
+            with self._llm_lock:
+                self._prepare_state(prompt)
+                output = self.llm(
+                    prompt,
+                    grammar=grammar,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stop=["<|endoftext|>"],
+                    stopping_criteria=stopping_criteria,
+                    echo=False,
+                )
+            return (prefix + output["choices"][0]["text"]).strip()
         except Exception as e:
             logger.error("Erro na geracao LLM: %s", e)
             return "{}"
+        finally:
+            self._unregister(token)
+
+    def warm_up(self) -> None:
+        """Prepara o modelo entre a ativacao e o fim da fala.
+
+        Um forward de um token toca todos os pesos (paginas do mmap que o
+        sistema tenha descartado voltam para a memoria) e o snapshot do
+        prompt de sistema e restaurado. Se uma geracao (recem-cancelada)
+        ainda usa o modelo, espera ela parar no proximo token.
+        """
+        try:
+            with self._llm_lock, get_metrics().timer("llm.warm_up"):
+                self._restore_prompt_state()
+                self.llm.eval(self._tokenize(" ", add_bos=False))
+                # O token extra nao pode ficar no estado usado pela proxima geracao
+                if self._prefix_state is None:
+                    self.llm.reset()
+                self._restore_prompt_state()
+        except Exception as e:
+            logger.debug("Falha no aquecimento do LLM: %s", e)
+
+    def prime(self, user_input: str) -> bool:
+        """Avalia o prefixo sistema + pedido antes de o contexto estar pronto.
+
+        Usado com o layout user_first: enquanto a busca no RAG roda em outra
+        thread, o pedido ja e avaliado. A geracao seguinte com o mesmo pedido
+        avalia apenas o contexto (se houver) e o cabecalho do assistente.
+
+        Args:
+            user_input: Texto do usuario.
+
+        Returns:
+            True se o prefixo foi avaliado.
+        """
+        head = SYSTEM_PROMPT + USER_FIRST_TEMPLATE.format(user_input=user_input)
+        with self._llm_lock:
+            self._primed_tokens = None
+            try:
+                tokens = self._tokenize(head, add_bos=True)
+                with get_metrics().timer("llm.prime"):
+                    self._restore_prompt_state()
+                    # Com o snapshot restaurado, o prompt de sistema ja esta avaliado
+                    start = self.llm.n_tokens if self._prefix_state is not None else 0
+                    if start == 0:
+                        self.llm.reset()
+                    self.llm.eval(tokens[start:])
+            except Exception as e:
+                logger.warning("Falha ao avaliar o pedido antecipadamente: %s", e)
+                return False
+
+            self._primed_tokens = tokens
+        return True
+
+    def cancel(self) -> None:
+        """Cancela todas as geracoes em andamento.
+
+        A geracao para no proximo token; a avaliacao do prompt ja iniciada
+        nao e interrompida.
+        """
+        with self._tokens_lock:
+            tokens = list(self._active_tokens)
+        for token in tokens:
+            token.cancel()
+        if tokens:
+            logger.info("Geracao LLM cancelada")
+
+    def _register(self, token: CancellationToken) -> None:
+        """Registra o token de uma geracao em andamento."""
+        with self._tokens_lock:
+            self._active_tokens.add(token)
+
+    def _unregister(self, token: CancellationToken) -> None:
+        """Remove o token de uma geracao encerrada."""
+        with self._tokens_lock:
+            self._active_tokens.discard(token)
 
     def _stream_generation(
-        self, prompt: str, grammar: Any, temperature: float, max_tokens: int
+        self,
+        prompt: str,
+        grammar: Any,
+        temperature: float,
+        max_tokens: int,
+        prefix: str = "",
+        stopping_criteria: Any = None,
+        token: CancellationToken | None = None,
     ) -> Iterator[str]:
-        """Gerador para streaming de tokens."""
+        """Gerador para streaming de tokens (o prefixo pre-preenchido vem primeiro)."""
+        token = token or CancellationToken()
+        if prefix:
+            yield prefix
+        if token.cancelled:
+            return
+
+        self._register(token)
+        # Mantido ate o gerador terminar ou ser fechado pelo consumidor
+        lock = self._llm_lock
+        lock.acquire()
         try:
+            self._prepare_state(prompt)
             stream = self.llm(
                 prompt,
                 grammar=grammar,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 stop=["<|endoftext|>"],
+                stopping_criteria=stopping_criteria,
                 stream=True,
                 echo=False,
             )
-            for chunk in stream:
-                delta = chunk["choices"][0]["text"]
-                yield delta
+            try:
+                for chunk in stream:
+                    delta = chunk["choices"][0]["text"]
+                    yield delta
+            finally:
+                # Consumidor parou cedo (ex: objeto JSON completo): encerra a geracao
+                close = getattr(stream, "close", None)
+                if callable(close):
+                    close()
         except Exception as e:
             logger.error("Erro no streaming LLM: %s", e)
             yield ""
+        finally:
+            lock.release()
+            self._unregister(token)
+
+    @staticmethod
+    def _stopping_criteria(
+        deadline: float | None, token: CancellationToken | None = None
+    ) -> Any:
+        """Cria o criterio de parada avaliado pelo llama.cpp a cada token.
+
+        Returns:
+            StoppingCriteriaList ou None se nao houver prazo nem token.
+        """
+        if (deadline is None and token is None) or StoppingCriteriaList is None:
+            return None
+
+        def should_stop(_input_ids: Any, _logits: Any) -> bool:
+            if token is not None and token.cancelled:
+                return True
+            return deadline is not None and time.monotonic() >= deadline
+
+        return StoppingCriteriaList([should_stop])
+
+    @staticmethod
+    def _create_draft_model(num_pred_tokens: int) -> Any:
+        """Cria o rascunho por busca de n-gramas no prompt (prompt lookup).
+
+        Alvos de comandos costumam ser copiados da fala ou do contexto RAG
+        (apps, caminhos, URLs), entao varios tokens sao propostos de uma vez
+        e verificados em um unico forward. A gramatica continua sendo
+        aplicada na amostragem, entao rascunhos invalidos sao descartados.
+
+        Returns:
+            Modelo de rascunho ou None se desativado/indisponivel.
+        """
+        if num_pred_tokens <= 0:
+            return None
+        if LlamaPromptLookupDecoding is None:
+            logger.warning(
+                "Decodificacao especulativa indisponivel nesta versao do llama-cpp"
+            )
+            return None
+        logger.info("Decodificacao especulativa ativa (%d tokens)", num_pred_tokens)
+        return LlamaPromptLookupDecoding(num_pred_tokens=num_pred_tokens)
+
+    @staticmethod
+    def _build_prompt(user_input: str, context: str, user_first: bool = False) -> str:
+        """Monta o prompt completo (sistema + usuario + assistente).
+
+        No layout user_first o pedido vem antes do contexto, e o contexto
+        vazio e omitido.
+        """
+        if not user_first:
+            return (
+                SYSTEM_PROMPT
+                + USER_TEMPLATE.format(context=context, user_input=user_input)
+                + ASSISTANT_TEMPLATE
+            )
+
+        prompt = SYSTEM_PROMPT + USER_FIRST_TEMPLATE.format(user_input=user_input)
+        if context:
+            prompt += CONTEXT_TEMPLATE.format(context=context)
+        return prompt + ASSISTANT_TEMPLATE
+
+    def _prepare_state(self, prompt: str) -> None:
+        """Deixa o modelo pronto para avaliar o prompt (chamado com _llm_lock).
+
+        Se prime() ja avaliou um prefixo deste prompt, o estado e mantido e
+        o llama.cpp avalia apenas o restante. Caso contrario, restaura o
+        snapshot do prompt de sistema.
+        """
+        primed, self._primed_tokens = self._primed_tokens, None
+        if primed is not None:
+            tokens = self._tokenize(prompt, add_bos=True)
+            if tokens[: len(primed)] == primed and self.llm.n_tokens == len(primed):
+                get_metrics().increment("llm.prime.reused")
+                return
+            # Tokenizacao divergente: o estado recorrente nao pode ser recuado
+            get_metrics().increment("llm.prime.discarded")
+            logger.debug("Prefixo avaliado antecipadamente descartado")
+            if self._prefix_state is None:
+                self.llm.reset()
+        self._restore_prompt_state()
+
+    def count_tokens(self, text: str) -> int:
+        """Conta os tokens de um texto com o tokenizer do modelo.
+
+        Args:
+            text: Texto a contar (sem BOS).
+
+        Returns:
+            Numero de tokens.
+        """
+        return len(self._tokenize(text, add_bos=False))
+
+    def _tokenize(self, text: str, add_bos: bool) -> list[int]:
+        """Tokeniza texto com o tokenizer do modelo (tokens especiais inclusos)."""
+        return list(
+            self.llm.tokenize(text.encode("utf-8"), add_bos=add_bos, special=True)
+        )
+
+    def _init_prompt_cache(self) -> None:
+        """Prepara o snapshot do prompt de sistema.
+
+        O prefixo estatico (SYSTEM_PROMPT) e avaliado uma unica vez e o estado
+        do contexto e guardado: KV cache das camadas de atencao e estado
+        recorrente das camadas Mamba do Granite hibrido. Antes de cada
+        requisicao o estado e restaurado e o llama.cpp reaproveita o prefixo,
+        avaliando apenas o sufixo variavel.
+        """
+        try:
+            prefix_tokens = self._tokenize(SYSTEM_PROMPT, add_bos=True)
+            sample_tokens = self._tokenize(self._build_prompt("", ""), add_bos=True)
+            if (
+                not prefix_tokens
+                or sample_tokens[: len(prefix_tokens)] != prefix_tokens
+            ):
+                # O prefixo so pode ser reaproveitado se a tokenizacao do prompt
+                # completo comecar exatamente pelos mesmos tokens.
+                logger.warning(
+                    "Prefixo do prompt nao tokeniza de forma estavel; snapshot desabilitado"
+                )
+                return
+
+            cache_file = self._prompt_cache_file()
+            state = self._load_prompt_state(cache_file) if cache_file else None
+
+            if state is None:
+                self.llm.reset()
+                self.llm.eval(prefix_tokens)
+                state = self.llm.save_state()
+                if cache_file:
+                    self._save_prompt_state(cache_file, state)
+
+            self._prefix_state = state
+            logger.info(
+                "Snapshot do prompt de sistema pronto (%d tokens)", len(prefix_tokens)
+            )
+        except Exception as e:
+            logger.warning("Falha ao preparar snapshot do prompt: %s", e)
+            self._prefix_state = None
+
+    def _restore_prompt_state(self) -> None:
+        """Restaura o estado do modelo logo apos o prompt de sistema."""
+        if self._prefix_state is None:
+            return
+        try:
+            self.llm.load_state(self._prefix_state)
+        except Exception as e:
+            logger.warning("Falha ao restaurar snapshot do prompt: %s", e)
+            self._prefix_state = None
+
+    def _prompt_cache_file(self) -> Path | None:
+        """Caminho do snapshot em disco, chaveado por modelo e prompt."""
+        if self.cache_dir is None:
+            return None
+
+        stat = self.model_path.stat()
+        model_hash = hashlib.sha256(
+            f"{self.model_path.name}:{stat.st_size}:{stat.st_mtime_ns}:{self.n_ctx}".encode()
+        )
+        with self.model_path.open("rb") as f:
+            model_hash.update(f.read(_FINGERPRINT_BYTES))
+
+        prompt_hash = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:16]
+        return (
+            self.cache_dir
+            / "prompt_state"
+            / f"{model_hash.hexdigest()[:16]}-{prompt_hash}.bin"
+        )
+
+    def _load_prompt_state(self, cache_file: Path) -> Any:
+        """Carrega e aplica um snapshot persistido. Retorna None se indisponivel."""
+        if not cache_file.exists():
+            return None
+        try:
+            state = pickle.loads(cache_file.read_bytes())
+            self.llm.load_state(state)
+            logger.debug("Snapshot do prompt carregado de %s", cache_file)
+            return state
+        except Exception as e:
+            logger.warning("Snapshot do prompt invalido (%s), recalculando", e)
+            cache_file.unlink(missing_ok=True)
+            return None
+
+    def _save_prompt_state(self, cache_file: Path, state: Any) -> None:
+        """Persiste o snapshot de forma atomica."""
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(".tmp")
+            tmp_file.write_bytes(pickle.dumps(state))
+            tmp_file.replace(cache_file)
+            logger.debug("Snapshot do prompt salvo em %s", cache_file)
+        except Exception as e:
+            logger.warning("Falha ao salvar snapshot do prompt: %s", e)
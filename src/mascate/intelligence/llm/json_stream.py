@@ -0,0 +1,99 @@
+"""Parser JSON incremental para geracao em streaming.
+
+Acompanha os fragmentos emitidos pelo LLM e expoe os campos de topo do
+objeto assim que ficam completos, sem esperar o fim da geracao.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+class IncrementalJSONParser:
+    """Parser incremental de um unico objeto JSON.
+
+    Rastreia profundidade e strings para detectar o fechamento balanceado
+    do objeto raiz e extrai os campos string de primeiro nivel (ex: action,
+    target) no momento em que a aspa de fechamento chega.
+    """
+
+    def __init__(self) -> None:
+        """Inicializa o parser vazio."""
+        self.fields: dict[str, Any] = {}
+        self.complete = False
+        self._chars: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: str | None = None
+        self._after_colon = False
+
+    @property
+    def text(self) -> str:
+        """Texto acumulado ate o fechamento do objeto raiz."""
+        return "".join(self._chars)
+
+    def feed(self, fragment: str) -> bool:
+        """Processa um fragmento de texto.
+
+        Args:
+            fragment: Trecho emitido pelo LLM.
+
+        Returns:
+            True quando o objeto raiz foi fechado (chave final balanceada).
+        """
+        for char in fragment:
+            if self.complete:
+                break
+            if self._depth == 0 and char != "{":
+                # Ignora qualquer coisa antes da abertura do objeto
+                continue
+
+            self._chars.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string()
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = len(self._chars) - 1
+            elif char in "{[":
+                self._depth += 1
+                self._after_colon = False
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+            elif self._depth == 1 and char == ":":
+                self._after_colon = True
+            elif self._depth == 1 and char == ",":
+                self._key = None
+                self._after_colon = False
+
+        return self.complete
+
+    def _end_string(self) -> None:
+        """Registra chave ou valor string de primeiro nivel."""
+        if self._depth != 1:
+            return
+
+        raw = "".join(self._chars[self._string_start :])
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+
+        if self._after_colon and self._key is not None:
+            self.fields[self._key] = value
+            self._after_colon = False
+        else:
+            self._key = value
@@ -21,3 +21,15 @@ Pedido:
 """
 
 ASSISTANT_TEMPLATE = """<|assistant|>"""
+
+# Layout com o pedido antes do contexto: o prefixo sistema + pedido pode ser
+# avaliado enquanto a busca no RAG ainda esta em andamento
+USER_FIRST_TEMPLATE = """<|user|>
+Pedido:
+{user_input}
+"""
+
+# Sem newline inicial para nao fundir com o final do pedido na tokenizacao
+CONTEXT_TEMPLATE = """Contexto RAG:
+{context}
+"""
@@ -0,0 +1,291 @@
+"""Indice esparso BM25 para a busca hibrida.
+
+A busca densa erra consultas por palavra exata (nomes de apps, comandos,
+flags). Este indice invertido em memoria, atualizado na ingestao e salvo em
+disco, pontua os chunks por BM25 sobre tokens sem acento e sem stopwords.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from mascate.intelligence.text import strip_accents
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Palavras muito frequentes em portugues que nao ajudam a ranquear
+STOPWORDS = frozenset(
+    (
+        "a",
+        "ao",
+        "aos",
+        "as",
+        "com",
+        "como",
+        "da",
+        "das",
+        "de",
+        "do",
+        "dos",
+        "e",
+        "em",
+        "entre",
+        "era",
+        "esta",
+        "este",
+        "eu",
+        "isso",
+        "isto",
+        "ja",
+        "la",
+        "mais",
+        "mas",
+        "me",
+        "meu",
+        "minha",
+        "na",
+        "nas",
+        "nao",
+        "no",
+        "nos",
+        "num",
+        "numa",
+        "o",
+        "os",
+        "ou",
+        "para",
+        "pela",
+        "pelas",
+        "pelo",
+        "pelos",
+        "por",
+        "qual",
+        "que",
+        "quando",
+        "se",
+        "sem",
+        "ser",
+        "seu",
+        "sua",
+        "so",
+        "sobre",
+        "tambem",
+        "te",
+        "tem",
+        "um",
+        "uma",
+        "umas",
+        "uns",
+        "voce",
+    )
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Quebra o texto em termos (minusculas, sem acentos, sem stopwords).
+
+    Termos compostos ('gnome-terminal', 'github.com') sao mantidos inteiros
+    e tambem quebrados nas partes, para casar as duas formas.
+    """
+    tokens: list[str] = []
+    for match in _TOKEN_RE.findall(strip_accents(text.lower())):
+        parts = re.split(r"[._-]", match)
+        if len(parts) > 1:
+            tokens.append(match)
+        tokens.extend(p for p in parts if p not in STOPWORDS)
+    return tokens
+
+
+@dataclass
+class SparseHit:
+    """Resultado da busca esparsa."""
+
+    id: str
+    score: float
+    payload: dict[str, Any]
+
+
+class BM25Index:
+    """Indice invertido com pontuacao BM25."""
+
+    def __init__(
+        self, path: Path | None = None, k1: float = 1.2, b: float = 0.75
+    ) -> None:
+        """Inicializa o indice e carrega o arquivo persistido.
+
+        Args:
+            path: Arquivo JSON do indice. Se None, vive apenas em memoria.
+            k1: Saturacao da frequencia do termo.
+            b: Peso da normalizacao pelo tamanho do documento.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._payloads: dict[str, dict[str, Any]] = {}
+        self._lengths: dict[str, int] = {}
+        self._postings: dict[str, dict[str, int]] = {}  # termo -> {id: tf}
+        self._total_length = 0
+        self._load()
+
+    def __len__(self) -> int:
+        """Numero de documentos indexados."""
+        return len(self._payloads)
+
+    def add(self, ids: list[str], payloads: list[dict[str, Any]]) -> None:
+        """Indexa (ou reindexa) documentos pelo campo 'content' do payload.
+
+        Args:
+            ids: IDs dos chunks.
+            payloads: Payloads dos chunks (os mesmos gravados no VectorDB).
+        """
+        with self._lock:
+            for doc_id, payload in zip(ids, payloads, strict=True):
+                self._remove(doc_id)
+                terms = Counter(tokenize(payload.get("content", "")))
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+                length = sum(terms.values())
+                self._payloads[doc_id] = payload
+                self._lengths[doc_id] = length
+                self._total_length += length
+
+    def remove(self, ids: list[str]) -> None:
+        """Remove documentos do indice."""
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def clear(self) -> None:
+        """Remove todos os documentos."""
+        with self._lock:
+            self._payloads.clear()
+            self._lengths.clear()
+            self._postings.clear()
+            self._total_length = 0
+
+    def copy(self, path: Path | None, ids: Iterable[str] | None = None) -> BM25Index:
+        """Copia o indice (nao salvo) para outro arquivo.
+
+        Args:
+            path: Arquivo JSON da copia.
+            ids: Documentos mantidos na copia (None = todos).
+
+        Returns:
+            Novo BM25Index independente deste.
+        """
+        index = BM25Index(None, k1=self.k1, b=self.b)
+        index.path = path
+        with self._lock:
+            index._payloads = dict(self._payloads)
+            index._lengths = dict(self._lengths)
+            index._postings = {
+                term: dict(postings) for term, postings in self._postings.items()
+            }
+            index._total_length = self._total_length
+        if ids is not None:
+            keep = set(ids)
+            index.remove([doc_id for doc_id in index._payloads if doc_id not in keep])
+        return index
+
+    def search(self, query: str, limit: int = 5) -> list[SparseHit]:
+        """Busca os documentos com maior pontuacao BM25.
+
+        Args:
+            query: Texto da consulta.
+            limit: Numero maximo de resultados.
+
+        Returns:
+            Lista de SparseHit em ordem decrescente de pontuacao.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._payloads)
+            if not n_docs or not terms:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (
+                        1 - self.b + self.b * self._lengths[doc_id] / avg_length
+                    )
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (
+                        self.k1 + 1
+                    ) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+            return [
+                SparseHit(id=doc_id, score=score, payload=self._payloads[doc_id])
+                for doc_id, score in ranked
+            ]
+
+    def save(self) -> None:
+        """Grava o indice de forma atomica."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = json.dumps(
+                {"payloads": self._payloads, "postings": self._postings},
+                ensure_ascii=False,
+            )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(data, encoding="utf-8")
+            tmp_path.replace(self.path)
+        except OSError as e:
+            logger.warning("Falha ao salvar o indice BM25: %s", e)
+
+    def _remove(self, doc_id: str) -> None:
+        """Remove um documento (chamado com o lock)."""
+        payload = self._payloads.pop(doc_id, None)
+        if payload is None:
+            return
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in set(tokenize(payload.get("content", ""))):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def _load(self) -> None:
+        """Carrega o indice persistido."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            payloads = data["payloads"]
+            postings = data["postings"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Indice BM25 invalido, ignorando: %s", e)
+            return
+
+        lengths = dict.fromkeys(payloads, 0)
+        for term_postings in postings.values():
+            for doc_id, tf in term_postings.items():
+                lengths[doc_id] += tf
+        self._payloads = payloads
+        self._postings = postings
+        self._lengths = lengths
+        self._total_length = sum(lengths.values())
+        logger.debug("Indice BM25: %d documentos carregados", len(payloads))
@@ -0,0 +1,123 @@
+"""Compressao extrativa do contexto RAG.
+
+Mesmo chunks relevantes sao, em sua maioria, texto de apoio para um comando
+especifico. Cada sentenca dos chunks recuperados e pontuada contra a query
+com o modelo de embedding ja carregado, e apenas as melhores sentencas que
+cabem no orcamento seguem para o prompt.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import replace
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.rag.context import split_sentences
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from mascate.intelligence.rag.embeddings import EmbeddingModel
+    from mascate.intelligence.rag.retriever import SearchResult
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCompressor:
+    """Seleciona as sentencas mais proximas da query dentro de um orcamento."""
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        token_counter: Callable[[str], int],
+        max_tokens: int = 160,
+        min_similarity: float = 0.0,
+    ) -> None:
+        """Inicializa o compressor.
+
+        Args:
+            embedding_model: Modelo de embedding da Knowledge Base
+                (vetores normalizados, similaridade = produto interno).
+            token_counter: Conta tokens com o tokenizer do LLM.
+            max_tokens: Orcamento total de tokens das sentencas mantidas.
+            min_similarity: Sentencas abaixo desta similaridade sao descartadas.
+        """
+        self.embedding_model = embedding_model
+        self.token_counter = token_counter
+        self.max_tokens = max_tokens
+        self.min_similarity = min_similarity
+        # Fracao de tokens mantida na ultima chamada (1.0 = sem compressao)
+        self.last_ratio = 1.0
+
+    def compress(self, query: str, results: list[SearchResult]) -> list[SearchResult]:
+        """Reduz cada resultado as sentencas mais relevantes para a query.
+
+        As sentencas de todos os chunks competem pelo mesmo orcamento; as
+        escolhidas mantem a ordem original dentro do chunk. Chunks sem
+        nenhuma sentenca escolhida sao removidos.
+
+        Args:
+            query: Texto do usuario.
+            results: Resultados do retriever.
+
+        Returns:
+            Resultados com o conteudo comprimido, na ordem recebida.
+        """
+        sentences: list[tuple[int, int, str]] = []  # (resultado, posicao, texto)
+        for i, result in enumerate(results):
+            for j, sentence in enumerate(split_sentences(result.content)):
+                sentences.append((i, j, sentence))
+        if not sentences:
+            return results
+
+        # Query separada: o vetor ja costuma estar no cache do retriever
+        query_vector = np.asarray(self.embedding_model.encode([query]))[0]
+        vectors = np.asarray(self.embedding_model.encode([s[2] for s in sentences]))
+        similarities = vectors @ query_vector
+
+        counts = [self.token_counter(s[2]) for s in sentences]
+        selected: set[tuple[int, int]] = set()
+        remaining = self.max_tokens
+
+        for index in np.argsort(-similarities, kind="stable"):
+            if similarities[index] < self.min_similarity:
+                break
+            if counts[index] <= remaining:
+                i, j, _ = sentences[index]
+                selected.add((i, j))
+                remaining -= counts[index]
+
+        compressed: list[SearchResult] = []
+        for i, result in enumerate(results):
+            kept = [
+                index
+                for index, (r, j, _) in enumerate(sentences)
+                if r == i and (r, j) in selected
+            ]
+            if kept:
+                # Atualiza 'n_tokens' para o montador nao usar a contagem do chunk inteiro
+                metadata = {**result.metadata, "n_tokens": sum(counts[k] for k in kept)}
+                content = " ".join(sentences[k][2] for k in kept)
+                compressed.append(replace(result, content=content, metadata=metadata))
+
+        tokens_in = sum(counts)
+        tokens_out = self.max_tokens - remaining
+        self.last_ratio = compression_ratio(tokens_in, tokens_out)
+        metrics = get_metrics()
+        metrics.increment("rag.compression.tokens_in", tokens_in)
+        metrics.increment("rag.compression.tokens_out", tokens_out)
+        logger.debug(
+            "Contexto comprimido: %d -> %d tokens (%.0f%%)",
+            tokens_in,
+            tokens_out,
+            100 * self.last_ratio,
+        )
+        return compressed
+
+
+def compression_ratio(tokens_in: float, tokens_out: float) -> float:
+    """Fracao dos tokens mantida (1.0 = sem compressao)."""
+    return tokens_out / tokens_in if tokens_in else 1.0
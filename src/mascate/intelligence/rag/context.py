@@ -0,0 +1,142 @@
+"""Montagem do contexto RAG com orcamento de tokens.
+
+Seleciona os documentos recuperados por relevancia ate preencher um
+orcamento de tokens medido com o tokenizer do LLM, de modo que o custo de
+avaliacao do prompt acompanhe o contexto util e nao o pior caso.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.rag.retriever import NO_CONTEXT, format_doc
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from mascate.intelligence.rag.retriever import SearchResult
+
+logger = logging.getLogger(__name__)
+
+# Fronteira de sentenca: pontuacao final seguida de espaco, ou quebra de linha
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+# Separador entre documentos no contexto
+_DOC_SEPARATOR = "\n\n"
+
+
+def split_sentences(text: str) -> list[str]:
+    """Divide texto em sentencas (sem as vazias)."""
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+class ContextAssembler:
+    """Monta o contexto do prompt dentro de um orcamento de tokens."""
+
+    def __init__(
+        self,
+        token_counter: Callable[[str], int],
+        max_tokens: int = 384,
+        score_margin: float = 0.2,
+    ) -> None:
+        """Inicializa o montador.
+
+        Args:
+            token_counter: Conta tokens com o tokenizer do LLM.
+            max_tokens: Orcamento total de tokens do contexto.
+            score_margin: Documentos com cosseno (dense_score) abaixo de
+                (melhor cosseno - margem) sao descartados. Os trazidos so
+                pelo BM25 ja passaram pelo limiar do BM25 e sao mantidos.
+        """
+        self.max_tokens = max_tokens
+        self.score_margin = score_margin
+        self._counter = token_counter
+        # Chunks sem 'n_tokens' no payload (ingeridos sem contador) e
+        # cabecalhos de documento sao contados uma unica vez
+        self._count = lru_cache(maxsize=1024)(token_counter)
+
+    def assemble(self, results: list[SearchResult]) -> str:
+        """Monta o contexto a partir dos resultados da busca.
+
+        Args:
+            results: Resultados do retriever (qualquer ordem).
+
+        Returns:
+            Documentos em tags XML, do mais ao menos relevante, cabendo no
+            orcamento. Documentos que nao cabem inteiros sao truncados em
+            fronteira de sentenca.
+        """
+        if not results:
+            return NO_CONTEXT
+
+        metrics = get_metrics()
+        ranked = sorted(results, key=lambda r: r.score, reverse=True)
+        # A margem compara cossenos entre si, nunca com o score do RRF
+        dense = [r.dense_score for r in ranked if r.dense_score is not None]
+        cutoff = max(dense) - self.score_margin if dense else float("-inf")
+        relevant = [
+            r for r in ranked if r.dense_score is None or r.dense_score >= cutoff
+        ]
+        metrics.increment("rag.context.dropped_low_margin", len(ranked) - len(relevant))
+
+        parts: list[str] = []
+        remaining = self.max_tokens
+        for result in relevant:
+            doc_id = len(parts) + 1
+            overhead = self._count(format_doc(doc_id, result.source, ""))
+            if parts:
+                overhead += self._count(_DOC_SEPARATOR)
+            budget = remaining - overhead
+            if budget <= 0:
+                break
+
+            n_tokens = result.metadata.get("n_tokens")
+            if not isinstance(n_tokens, int):
+                n_tokens = self._count(result.content)
+
+            content: str | None = result.content
+            if n_tokens > budget:
+                content, n_tokens = self._truncate(result.content, budget)
+                if content is None:
+                    metrics.increment("rag.context.dropped_over_budget")
+                    continue
+                metrics.increment("rag.context.truncated")
+
+            parts.append(format_doc(doc_id, result.source, content))
+            remaining = budget - n_tokens
+
+        if not parts:
+            return NO_CONTEXT
+
+        metrics.increment("rag.context.tokens", self.max_tokens - remaining)
+        logger.debug(
+            "Contexto: %d/%d documentos, %d/%d tokens",
+            len(parts),
+            len(results),
+            self.max_tokens - remaining,
+            self.max_tokens,
+        )
+        return _DOC_SEPARATOR.join(parts)
+
+    def _truncate(self, text: str, budget: int) -> tuple[str | None, int]:
+        """Mantem as sentencas iniciais que cabem no orcamento.
+
+        Returns:
+            Tupla (texto truncado, tokens). Texto None se nem a primeira
+            sentenca couber.
+        """
+        kept: str | None = None
+        kept_tokens = 0
+        sentences: list[str] = []
+        for sentence in split_sentences(text):
+            sentences.append(sentence)
+            candidate = " ".join(sentences)
+            tokens = self._counter(candidate)
+            if tokens > budget:
+                break
+            kept, kept_tokens = candidate, tokens
+        return kept, kept_tokens
@@ -0,0 +1,185 @@
+"""Cache LRU de embeddings de consultas.
+
+O BGE-M3 e grande e roda na CPU; a mesma transcricao repetida minutos depois
+gerava o mesmo vetor de novo. Os vetores ficam em um LRU chaveado pelo
+modelo e pelo texto normalizado e podem ser persistidos em cache_dir como
+uma matriz .npy, lida com mmap no proximo inicio.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from mascate.core.metrics import get_metrics
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """LRU de vetores por (modelo, texto normalizado)."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        dtype: str = "float32",
+        path: Path | None = None,
+        save_every: int = 16,
+    ) -> None:
+        """Inicializa o cache e carrega os vetores persistidos.
+
+        Args:
+            max_entries: Numero maximo de vetores (os menos usados saem).
+            dtype: Tipo de armazenamento ('float32' ou 'float16'). Vetores
+                sempre saem como float32.
+            path: Prefixo dos arquivos de persistencia ('<path>.npy' com a
+                matriz e '<path>.json' com as chaves). Se None, o cache vive
+                apenas em memoria.
+            save_every: Vetores novos entre gravacoes em disco (o restante e
+                gravado na saida do processo).
+        """
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._dirty = 0
+
+        if path is not None:
+            self._load()
+            atexit.register(self.save)
+
+    def __len__(self) -> int:
+        """Numero de vetores em cache."""
+        return len(self._entries)
+
+    def get(self, model_name: str, text: str) -> np.ndarray | None:
+        """Busca o vetor de um texto.
+
+        Args:
+            model_name: Identificador do modelo de embedding.
+            text: Texto da consulta.
+
+        Returns:
+            Copia float32 do vetor ou None se ausente.
+        """
+        key = (model_name, normalize_text(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        get_metrics().increment(
+            "embedding_cache.misses" if vector is None else "embedding_cache.hits"
+        )
+        return None if vector is None else vector.astype(np.float32)
+
+    def put(self, model_name: str, text: str, vector: np.ndarray) -> None:
+        """Guarda o vetor de um texto.
+
+        Args:
+            model_name: Identificador do modelo de embedding.
+            text: Texto da consulta.
+            vector: Vetor 1-D gerado pelo modelo.
+        """
+        key = (model_name, normalize_text(text))
+        evicted = 0
+        with self._lock:
+            self._entries[key] = np.asarray(vector, dtype=self.dtype).ravel()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+            self._dirty += 1
+            flush = self.path is not None and self._dirty >= self.save_every
+
+        if evicted:
+            get_metrics().increment("embedding_cache.evictions", evicted)
+        if flush:
+            self.save()
+
+    def save(self) -> None:
+        """Grava a matriz de vetores (.npy) e as chaves (.json)."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            keys = [list(key) for key in self._entries]
+            vectors = list(self._entries.values())
+            self._dirty = 0
+
+        matrix_path, keys_path = self._files()
+        try:
+            matrix_path.parent.mkdir(parents=True, exist_ok=True)
+            if vectors:
+                matrix = np.stack(vectors)
+            else:
+                matrix = np.zeros((0, 0), dtype=self.dtype)
+            # Arquivos novos e rename: mmaps abertos continuam validos
+            tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+            with tmp_matrix.open("wb") as f:
+                np.save(f, matrix)
+            tmp_keys = keys_path.with_name(keys_path.name + ".tmp")
+            tmp_keys.write_text(json.dumps(keys, ensure_ascii=False), encoding="utf-8")
+            tmp_matrix.replace(matrix_path)
+            tmp_keys.replace(keys_path)
+            logger.debug("Cache de embeddings salvo: %d vetores", len(vectors))
+        except OSError as e:
+            logger.warning("Falha ao salvar o cache de embeddings: %s", e)
+
+    def _load(self) -> None:
+        """Carrega os vetores persistidos com mmap (sem copiar para a RAM)."""
+        matrix_path, keys_path = self._files()
+        if not matrix_path.exists() or not keys_path.exists():
+            return
+        try:
+            keys = json.loads(keys_path.read_text(encoding="utf-8"))
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning("Cache de embeddings invalido, ignorando: %s", e)
+            return
+        if matrix.dtype != self.dtype or len(keys) != len(matrix):
+            logger.info("Cache de embeddings incompativel, recriando")
+            return
+
+        for (model_name, text), vector in list(zip(keys, matrix, strict=True))[
+            -self.max_entries :
+        ]:
+            self._entries[(model_name, text)] = vector
+        logger.debug("Cache de embeddings: %d vetores carregados", len(self._entries))
+
+    def _files(self) -> tuple[Path, Path]:
+        """Arquivos da matriz e das chaves."""
+        assert self.path is not None
+        return (
+            self.path.with_name(self.path.name + ".npy"),
+            self.path.with_name(self.path.name + ".json"),
+        )
+
+
+def normalize_text(text: str) -> str:
+    """Forma canonica do texto (Unicode NFC, espacos colapsados).
+
+    Nao altera caixa nem acentos: o vetor em cache e identico ao que o
+    modelo geraria para qualquer variante com a mesma chave.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
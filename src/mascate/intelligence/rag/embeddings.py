@@ -1,24 +1,35 @@
 """Gerador de Embeddings para o RAG.
 
 Utiliza BGE-M3 (via sentence-transformers) para converter texto em vetores.
+O sentence-transformers (e com ele o PyTorch) so e importado ao criar o
+primeiro EmbeddingModel: importar este modulo, a Knowledge Base ou o backend
+ONNX nao carrega o torch.
 """
 
 from __future__ import annotations
 
+import gc
 import logging
-from typing import Any
+import threading
+import time
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 
-try:
-    from sentence_transformers import SentenceTransformer
-except ImportError:
-    SentenceTransformer = None
-
 from mascate.core.exceptions import MascateError
+from mascate.core.metrics import get_metrics
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from mascate.intelligence.rag.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
+# Classe do sentence-transformers, importada no primeiro uso (ver
+# _sentence_transformer)
+SentenceTransformer: Any = None
+
 
 class EmbeddingError(MascateError):
     """Erro relacionado a geracao de embeddings."""
@@ -27,17 +38,25 @@ class EmbeddingError(MascateError):
 class EmbeddingModel:
     """Wrapper para modelo de embedding (BGE-M3)."""
 
-    def __init__(self, model_name: str = "BAAI/bge-m3", device: str = "cpu") -> None:
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-m3",
+        device: str = "cpu",
+        cache: EmbeddingCache | None = None,
+    ) -> None:
         """Inicializa o modelo de embedding.
 
         Args:
             model_name: ID do modelo no Hugging Face.
             device: 'cpu' ou 'cuda'.
+            cache: Cache dos vetores de consultas unicas. Se None, todo
+                encode passa pelo modelo.
 
         Raises:
             EmbeddingError: Se sentence-transformers nao estiver instalado.
         """
-        if SentenceTransformer is None:
+        model_class = _sentence_transformer()
+        if model_class is None:
             raise EmbeddingError(
                 "sentence-transformers nao instalado. "
                 "Instale com 'uv pip install sentence-transformers'."
@@ -45,22 +64,28 @@ class EmbeddingModel:
 
         self.model_name = model_name
         self.device = device
+        self.cache = cache
+        self.cache_key = model_name
         self.model: Any = None
 
         try:
             # Carrega modelo. Para BGE-M3, trust_remote_code=False geralmente funciona,
             # mas alguns modelos recentes exigem True. O padrao BAAI/bge-m3 é seguro.
-            self.model = SentenceTransformer(model_name, device=device)
+            self.model = model_class(model_name, device=device)
             logger.info("Modelo de embedding carregado: %s (%s)", model_name, device)
         except Exception as e:
             logger.error("Falha ao carregar modelo de embedding: %s", e)
             raise EmbeddingError(f"Erro no modelo {model_name}: {e}") from e
 
-    def encode(self, texts: str | list[str]) -> np.ndarray:
+    def encode(self, texts: str | list[str], cache: bool = True) -> np.ndarray:
         """Gera vetores para o texto fornecido.
 
+        Consultas unicas (string ou lista com um texto) passam pelo cache;
+        lotes (ingestao, sentencas da compressao) vao direto ao modelo.
+
         Args:
             texts: String unica ou lista de strings.
+            cache: Se False, ignora o cache (ex: aquecimento do modelo).
 
         Returns:
             Array numpy com os embeddings.
@@ -68,24 +93,117 @@ class EmbeddingModel:
         if self.model is None:
             raise EmbeddingError("Modelo nao inicializado")
 
+        single = texts if isinstance(texts, str) else None
+        if not isinstance(texts, str) and len(texts) == 1:
+            single = texts[0]
+        use_cache = cache and self.cache is not None and single is not None
+        if use_cache:
+            vector = self.cache.get(self.cache_key, single)
+            if vector is not None:
+                return vector if isinstance(texts, str) else vector[np.newaxis]
+
         try:
-            # BGE-M3 recomenda instrucoes para queries em retrieval tasks,
-            # mas para documentos raw nao precisa.
-            # Aqui simplificamos usando encode direto.
-            embeddings = self.model.encode(
-                texts,
-                normalize_embeddings=True,
-                convert_to_numpy=True,
-                show_progress_bar=False,
-            )
-            return embeddings
+            embeddings = self._encode(texts)
         except Exception as e:
             logger.error("Erro ao gerar embedding: %s", e)
             raise EmbeddingError(f"Falha no encode: {e}") from e
 
+        if use_cache:
+            self.cache.put(self.cache_key, single, embeddings)
+        return embeddings
+
+    def _encode(self, texts: str | list[str]) -> np.ndarray:
+        """Roda o modelo (vetores normalizados, mesmo formato da entrada)."""
+        # BGE-M3 recomenda instrucoes para queries em retrieval tasks,
+        # mas para documentos raw nao precisa.
+        # Aqui simplificamos usando encode direto.
+        return self.model.encode(
+            texts,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+
     @property
     def embedding_size(self) -> int:
         """Retorna a dimensao do vetor (ex: 1024 para BGE-M3)."""
         if self.model:
             return self.model.get_sentence_embedding_dimension()
         return 0
+
+
+def _sentence_transformer() -> Any:
+    """Importa o sentence-transformers (e o PyTorch) so quando necessario.
+
+    Returns:
+        A classe SentenceTransformer, ou None se a biblioteca nao existir.
+    """
+    global SentenceTransformer
+    if SentenceTransformer is None:
+        try:
+            from sentence_transformers import SentenceTransformer as model_class
+        except ImportError:
+            return None
+        SentenceTransformer = model_class
+    return SentenceTransformer
+
+
+class LazyEmbeddingModel:
+    """Modelo de embedding carregado no primeiro uso e descartavel quando ocioso.
+
+    Tem a interface usada pelo RAG (encode, embedding_size): quem guarda a
+    referencia (roteador semantico, compressor) nao precisa saber se os pesos
+    estao na memoria.
+    """
+
+    def __init__(self, factory: Callable[[], EmbeddingModel]) -> None:
+        """Inicializa sem carregar o modelo.
+
+        Args:
+            factory: Cria o modelo (chamada no primeiro uso e apos unload).
+        """
+        self._factory = factory
+        self._model: EmbeddingModel | None = None
+        self._lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def loaded(self) -> bool:
+        """Se os pesos estao na memoria."""
+        return self._model is not None
+
+    def load(self) -> EmbeddingModel:
+        """Retorna o modelo, carregando-o se necessario."""
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    with get_metrics().timer("rag.embedding.load"):
+                        self._model = self._factory()
+                model = self._model
+        self.last_used = time.monotonic()
+        return model
+
+    def unload(self) -> bool:
+        """Descarta o modelo; o proximo encode o carrega de novo.
+
+        Returns:
+            True se havia um modelo carregado.
+        """
+        with self._lock:
+            model, self._model = self._model, None
+        if model is None:
+            return False
+        del model
+        gc.collect()
+        logger.info("Modelo de embedding descarregado")
+        return True
+
+    def encode(self, *args: Any, **kwargs: Any) -> np.ndarray:
+        """Gera vetores (mesmos argumentos de EmbeddingModel.encode)."""
+        return self.load().encode(*args, **kwargs)
+
+    @property
+    def embedding_size(self) -> int:
+        """Dimensao do vetor (carrega o modelo)."""
+        return self.load().embedding_size
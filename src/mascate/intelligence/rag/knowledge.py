@@ -5,118 +5,819 @@ Coordena Parser, Embeddings e VectorDB para ingestao de documentos.
 
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
 import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from mascate.core.config import Config
-from mascate.intelligence.rag.embeddings import EmbeddingModel
-from mascate.intelligence.rag.parser import MarkdownParser
-from mascate.intelligence.rag.vectordb import VectorDB
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.rag.bm25 import BM25Index
+from mascate.intelligence.rag.embedding_cache import EmbeddingCache
+from mascate.intelligence.rag.embeddings import EmbeddingModel, LazyEmbeddingModel
+from mascate.intelligence.rag.numpy_db import NumpyVectorDB
+from mascate.intelligence.rag.onnx_embeddings import OnnxEmbeddingModel
+from mascate.intelligence.rag.parser import Chunk, MarkdownParser
+from mascate.intelligence.rag.vectordb import VectorDB, VectorDBError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class IngestReport:
+    """Resultado de uma sincronizacao da base."""
+
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    chunks_indexed: int = 0
+    chunks_deleted: int = 0
+
+
 class KnowledgeBase:
     """Gerenciador da base de conhecimento."""
 
     COLLECTION_NAME = "mascate_knowledge"
+    # Contador incrementado a cada ingestao (versao da base)
+    VERSION_FILE = "knowledge.version"
+    # Arquivos indexados (tamanho, mtime, hash e chunk ids)
+    MANIFEST_FILE = "knowledge_manifest.json"
+    SPARSE_FILE = "bm25_index.json"
+    # Geracao ativa e anterior (collection, manifesto e BM25 de cada uma)
+    GENERATION_FILE = "knowledge_generation.json"
 
-    def __init__(self, config: Config) -> None:
+    def __init__(
+        self, config: Config, token_counter: Callable[[str], int] | None = None
+    ) -> None:
         """Inicializa a Knowledge Base.
 
         Args:
             config: Configuracao global do sistema.
+            token_counter: Conta tokens com o tokenizer do LLM. Se definido,
+                a contagem de cada chunk e gravada no payload ('n_tokens')
+                durante a ingestao, evitando retokenizar a cada consulta.
         """
         self.config = config
+        self.token_counter = token_counter
 
         # Inicializa componentes
-        # Usa caminho persistente para o Qdrant
-        qdrant_path = config.data_dir / "qdrant_db"
-        self.vectordb = VectorDB(path=qdrant_path)
+        self.version_path = config.data_dir / self.VERSION_FILE
+        self._version = 0
+        self._version_key: tuple[int, int] | None = None
+        manifest_path = config.data_dir / self.MANIFEST_FILE
+        sparse_path = config.data_dir / self.SPARSE_FILE
+        self.generation_path = config.data_dir / self.GENERATION_FILE
+        if config.rag.vector_backend == "numpy":
+            # Manifesto e indice esparso proprios: cada backend tem seus pontos
+            manifest_path = manifest_path.with_suffix(".numpy.json")
+            sparse_path = sparse_path.with_suffix(".numpy.json")
+            self.generation_path = self.generation_path.with_suffix(".numpy.json")
+        # Arquivos da geracao 0; as seguintes usam o sufixo .g<N>
+        self._base_manifest_path = manifest_path
+        self._base_sparse_path = sparse_path
+        self.atomic_rebuild = config.rag.atomic_rebuild
+        self.generation, self.previous_generation = self._read_generation()
+        self.manifest_path = self._generation_file(manifest_path, self.generation)
+        # Indice BM25 da busca hibrida, atualizado junto com o VectorDB
+        self.sparse_index = BM25Index(
+            self._generation_file(sparse_path, self.generation)
+        )
 
-        self.embedding_model = EmbeddingModel(device="cpu")  # RAG roda na CPU
+        embedding_cache = None
+        if config.rag.embedding_cache_size > 0:
+            embedding_cache = EmbeddingCache(
+                max_entries=config.rag.embedding_cache_size,
+                dtype=config.rag.embedding_cache_dtype,
+                path=(
+                    config.cache_dir / "query_embeddings"
+                    if config.rag.embedding_cache_persist
+                    else None
+                ),
+            )
+        # Modelo e banco vetorial abrem no primeiro uso (ou em preload())
+        self.embedding_model = LazyEmbeddingModel(
+            lambda: self._create_embedding_model(embedding_cache)
+        )
+        self._vectordb: VectorDB | NumpyVectorDB | None = None
+        self._vectordb_used = time.monotonic()
+        self._lock = threading.Lock()
+        # Buscas e ingestoes em andamento (o descarte espera por elas)
+        self._in_use = 0
+        self._sync_lock = threading.Lock()
         self.parser = MarkdownParser()
 
+        # Pipeline de ingestao (0 workers = um por CPU)
+        self.ingest_workers = config.rag.ingest_workers
+        self.embed_batch_size = config.rag.ingest_batch_size
+        self.upsert_batch_size = 256
+
+        # Descarte do modelo e do banco apos um periodo ocioso (0 = nunca)
+        self.idle_unload_s = config.rag.idle_unload_s
+        self._idle_stop = threading.Event()
+        if not config.rag.lazy_load:
+            self.load()
+        if self.idle_unload_s > 0:
+            threading.Thread(
+                target=self._idle_loop, name="kb-idle", daemon=True
+            ).start()
+
+    @property
+    def vectordb(self) -> VectorDB | NumpyVectorDB:
+        """Banco vetorial, aberto no primeiro acesso."""
+        with self._lock:
+            if self._vectordb is None:
+                self._vectordb = self._open_vectordb()
+            self._vectordb_used = time.monotonic()
+            return self._vectordb
+
+    @property
+    def loaded(self) -> bool:
+        """Se o modelo de embedding ou o banco vetorial estao abertos."""
+        return self.embedding_model.loaded or self._vectordb is not None
+
+    def load(self) -> None:
+        """Carrega o modelo de embedding e abre o banco vetorial."""
+        self.embedding_model.load()
+        _ = self.vectordb
+
+    def preload(self) -> threading.Thread:
+        """Carrega os componentes em segundo plano (ex: apos o sistema pronto).
+
+        Returns:
+            Thread do carregamento (daemon).
+        """
+
+        def run() -> None:
+            start = time.perf_counter()
+            try:
+                self.load()
+            except Exception as e:
+                # O erro aparece de novo (e e tratado) no primeiro uso
+                logger.warning("Falha no pre-carregamento do RAG: %s", e)
+                return
+            logger.info("RAG pre-carregado em %.1fs", time.perf_counter() - start)
+
+        thread = threading.Thread(target=run, name="kb-preload", daemon=True)
+        thread.start()
+        return thread
+
+    @contextmanager
+    def in_use(self) -> Iterator[None]:
+        """Marca uma busca ou ingestao em andamento (bloqueia o unload)."""
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._vectordb_used = time.monotonic()
+
+    def unload(self) -> bool:
+        """Descarta o modelo de embedding e fecha o banco vetorial.
+
+        Ambos sao reabertos no proximo uso. Nao faz nada durante uma busca
+        ou ingestao (ver in_use).
+
+        Returns:
+            True se algo foi descarregado.
+        """
+        with self._lock:
+            if self._in_use:
+                return False
+            vectordb, self._vectordb = self._vectordb, None
+            # Ainda com o lock: uma busca que comece agora espera e reabre
+            if vectordb is not None:
+                vectordb.close()
+            unloaded = self.embedding_model.unload() or vectordb is not None
+        if unloaded:
+            get_metrics().increment("rag.unloads")
+        return unloaded
+
+    def unload_if_idle(self) -> bool:
+        """Descarrega os componentes se ficaram sem uso por idle_unload_s.
+
+        Returns:
+            True se algo foi descarregado.
+        """
+        last_used = max(self.embedding_model.last_used, self._vectordb_used)
+        if not self.loaded or time.monotonic() - last_used < self.idle_unload_s:
+            return False
+        logger.info("RAG ocioso ha %.0fs, descarregando", time.monotonic() - last_used)
+        return self.unload()
+
+    def _idle_loop(self) -> None:
+        """Verifica periodicamente se os componentes estao ociosos."""
+        interval = min(60.0, max(1.0, self.idle_unload_s / 4))
+        while not self._idle_stop.wait(interval):
+            try:
+                self.unload_if_idle()
+            except Exception as e:
+                logger.warning("Falha ao descarregar o RAG: %s", e)
+
+    def _create_embedding_model(
+        self, embedding_cache: EmbeddingCache | None
+    ) -> EmbeddingModel:
+        """Cria o modelo de embedding do backend configurado (RAG roda na CPU)."""
+        if self.config.rag.embedding_backend == "onnx":
+            return OnnxEmbeddingModel(
+                model_name=self.config.rag.embedding_model,
+                cache_dir=self.config.cache_dir,
+                quantize=self.config.rag.embedding_quantize,
+                cache=embedding_cache,
+            )
+        return EmbeddingModel(device="cpu", cache=embedding_cache)
+
+    def _open_vectordb(self) -> VectorDB | NumpyVectorDB:
+        """Abre o banco vetorial e garante a collection (chamado com o lock)."""
+        rag = self.config.rag
+        vectordb: VectorDB | NumpyVectorDB
+        if rag.vector_backend == "numpy":
+            vectordb = NumpyVectorDB(
+                path=self.config.data_dir / "numpy_db",
+                dtype=rag.vector_dtype,
+                quantization=rag.vector_quantization,
+                oversampling=rag.rescore_oversampling,
+            )
+        else:
+            # Usa caminho persistente para o Qdrant
+            vectordb = VectorDB(path=self.config.data_dir / "qdrant_db")
+        # Buscas e ingestao usam o nome logico, ligado a geracao ativa
+        vectordb.set_alias(self.COLLECTION_NAME, self._collection_name(self.generation))
         # Garante que a collection exista com o tamanho correto do embedding
         # BGE-M3 tem 1024 dimensoes
-        self.vectordb.ensure_collection(
+        vectordb.ensure_collection(
             self.COLLECTION_NAME, vector_size=self.embedding_model.embedding_size
         )
+        return vectordb
+
+    @property
+    def version(self) -> int:
+        """Versao da base (contador crescente; 0 se nunca ingerida).
+
+        Incrementada a cada ingestao ou remocao de chunks. O marcador e
+        conferido no disco a cada chamada (e relido se mudou) para que uma
+        ingestao feita por outro processo invalide os caches do assistente
+        em execucao.
+        """
+        try:
+            stat = self.version_path.stat()
+        except OSError:
+            return 0
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key != self._version_key:
+            try:
+                self._version = int(self.version_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._version = stat.st_mtime_ns  # Marcador ilegivel
+            self._version_key = key
+        return self._version
+
+    def _bump_version(self) -> None:
+        """Marca uma nova versao da base apos a ingestao."""
+        version = self.version + 1
+        self.version_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.version_path.with_suffix(".tmp")
+        tmp_path.write_text(str(version), encoding="utf-8")
+        tmp_path.replace(self.version_path)
+        stat = self.version_path.stat()
+        self._version, self._version_key = version, (stat.st_mtime_ns, stat.st_size)
 
     def ingest_directory(self, dir_path: Path) -> int:
-        """Processa todos os arquivos .md de um diretorio.
+        """Indexa os arquivos .md novos ou alterados de um diretorio.
+
+        Args:
+            dir_path: Diretorio contendo arquivos Markdown.
+
+        Returns:
+            Numero de chunks indexados nesta execucao (ver sync_directory).
+        """
+        return self.sync_directory(dir_path).chunks_indexed
+
+    def sync_directory(self, dir_path: Path) -> IngestReport:
+        """Sincroniza a base com os arquivos .md de um diretorio.
+
+        O manifesto em data_dir guarda tamanho, mtime, hash e chunk ids de
+        cada arquivo. Arquivos com mesmo tamanho e mtime sao pulados sem
+        leitura; os demais tem o hash comparado. Em arquivos alterados so os
+        chunks novos sao gerados e os antigos sao removidos do Qdrant, assim
+        como os chunks de arquivos apagados.
+
+        Os arquivos alterados sao lidos em um pool de processos, os chunks de
+        varios arquivos sao agrupados em lotes de embedding ordenados por
+        tamanho e a escrita no Qdrant roda em uma thread separada, com fila
+        limitada (o parsing e o embedding esperam quando a escrita atrasa).
+
+        Com atomic_rebuild, as mudancas sao gravadas em uma nova geracao da
+        base (ver _rebuild) e as buscas seguem na geracao atual ate a troca.
 
         Args:
             dir_path: Diretorio contendo arquivos Markdown.
 
         Returns:
-            Numero total de chunks indexados.
+            Contagem de arquivos adicionados, atualizados e removidos.
         """
+        # O descarte por ociosidade espera a ingestao terminar
+        with self.in_use(), self._sync_lock:
+            return self._sync(dir_path)
+
+    def rollback(self) -> bool:
+        """Volta para a geracao anterior da base (a atual vira a anterior).
+
+        Returns:
+            True se a troca foi feita; False se nao ha geracao anterior.
+        """
+        with self._sync_lock:
+            previous = self.previous_generation
+            if previous is None or not self.vectordb.collection_exists(
+                self._collection_name(previous)
+            ):
+                logger.warning("Nenhuma geracao anterior da base para restaurar")
+                return False
+            sparse_index = BM25Index(
+                self._generation_file(self._base_sparse_path, previous)
+            )
+            self._switch_generation(previous, self.generation, sparse_index)
+        return True
+
+    def _sync(self, dir_path: Path) -> IngestReport:
+        """Implementacao de sync_directory."""
+        report = IngestReport()
         if not dir_path.exists():
             logger.error("Diretorio nao encontrado: %s", dir_path)
-            return 0
+            return report
+
+        start = time.perf_counter()
+        root = dir_path.resolve()
+        files = self._load_manifest()
+        paths = sorted(root.glob("**/*.md"))
+        logger.info("Sincronizando %d arquivos em %s", len(paths), root)
 
-        files = list(dir_path.glob("**/*.md"))
-        logger.info("Iniciando ingestao de %d arquivos em %s", len(files), dir_path)
+        changed, report.unchanged = self._find_changes(paths, files)
+        present = {str(p) for p in paths}
+        # Arquivos de outros diretorios ingeridos ficam no manifesto
+        removed = [
+            key
+            for key in files
+            if key not in present and Path(key).is_relative_to(root)
+        ]
 
-        total_chunks = 0
+        if self.atomic_rebuild and (changed or removed):
+            self._rebuild(paths, files, changed, removed, report)
+        else:
+            self._apply(
+                files, changed, removed, self.COLLECTION_NAME, self.sparse_index, report
+            )
+            self.sparse_index.save()
+            self._save_manifest(files)
+            if report.chunks_indexed or report.chunks_deleted:
+                self._bump_version()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Ingestao concluida em %.1fs: %d novos, %d atualizados, %d removidos, "
+            "%d inalterados (%d chunks indexados, %.1f chunks/s, %d removidos)",
+            elapsed,
+            report.added,
+            report.updated,
+            report.removed,
+            report.unchanged,
+            report.chunks_indexed,
+            report.chunks_indexed / elapsed if elapsed > 0 else 0.0,
+            report.chunks_deleted,
+        )
+        return report
 
-        for file_path in files:
-            chunks = self.parser.parse_file(file_path)
-            if not chunks:
+    def _find_changes(
+        self, paths: list[Path], files: dict[str, dict[str, Any]]
+    ) -> tuple[list[tuple[Path, os.stat_result, str, dict[str, Any] | None]], int]:
+        """Separa os arquivos novos ou alterados dos inalterados.
+
+        Returns:
+            Lista de (arquivo, stat, hash, entrada antiga do manifesto) e o
+            numero de arquivos inalterados.
+        """
+        changed: list[tuple[Path, os.stat_result, str, dict[str, Any] | None]] = []
+        unchanged = 0
+        for file_path in paths:
+            entry = files.get(str(file_path))
+            try:
+                stat = file_path.stat()
+                if (
+                    entry is not None
+                    and entry["size"] == stat.st_size
+                    and entry["mtime_ns"] == stat.st_mtime_ns
+                ):
+                    unchanged += 1
+                    continue
+                digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+            except OSError as e:
+                logger.error("Erro ao ler arquivo %s: %s", file_path, e)
                 continue
 
-            # Prepara dados para batch insert
-            texts = [c.content for c in chunks]
+            if entry is not None and entry["sha256"] == digest:
+                # So o mtime mudou (ex: touch, checkout)
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                unchanged += 1
+                continue
+            changed.append((file_path, stat, digest, entry))
+        return changed, unchanged
+
+    def _apply(
+        self,
+        files: dict[str, dict[str, Any]],
+        changed: list[tuple[Path, os.stat_result, str, dict[str, Any] | None]],
+        removed: list[str],
+        collection: str,
+        sparse_index: BM25Index,
+        report: IngestReport,
+    ) -> None:
+        """Indexa os arquivos alterados e remove os chunks antigos.
 
-            # Gera embeddings (pode demorar)
-            vectors = self.embedding_model.encode(texts)
+        Args:
+            files: Manifesto, atualizado no lugar.
+            changed: Arquivos novos ou alterados (ver _find_changes).
+            removed: Arquivos apagados (chaves do manifesto).
+            collection: Collection que recebe as mudancas.
+            sparse_index: Indice BM25 que recebe as mudancas.
+            report: Contadores da sincronizacao, atualizados no lugar.
+        """
+        stale: list[str] = []
+        # O indice NumPy reescreve a collection a cada gravacao: os lotes e as
+        # remocoes sao acumulados e gravados uma unica vez no fim
+        self.vectordb.buffer_writes(collection)
+        try:
+            writer = _UpsertWriter(
+                self.vectordb,
+                collection,
+                self.upsert_batch_size,
+                sparse_index=sparse_index,
+            )
+            try:
+                pending: list[Chunk] = []
+                parsed = self._parse_files([item[0] for item in changed])
+                for (file_path, stat, digest, entry), file_chunks in zip(
+                    changed, parsed, strict=True
+                ):
+                    chunks = list({c.chunk_id: c for c in file_chunks}.values())
+                    old_ids = set(entry["chunk_ids"]) if entry is not None else set()
+                    new_ids = {c.chunk_id for c in chunks}
+                    pending.extend(c for c in chunks if c.chunk_id not in old_ids)
+                    if len(pending) >= self.embed_batch_size:
+                        self._index_chunks(pending, writer)
+                        pending = []
+                    stale.extend(sorted(old_ids - new_ids))
 
-            # Prepara IDs e Payloads
-            # Qdrant requer UUIDs ou inteiros, mas suporta string hash como ID se cuidarmos disso
-            # Vamos usar o chunk_id (hash MD5)
-            ids = [c.chunk_id for c in chunks]
+                    files[str(file_path)] = {
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "sha256": digest,
+                        "chunk_ids": [c.chunk_id for c in chunks],
+                    }
+                    report.chunks_indexed += len(new_ids - old_ids)
+                    if entry is None:
+                        report.added += 1
+                    else:
+                        report.updated += 1
+                    logger.debug(
+                        "Arquivo %s processado: %d chunks", file_path.name, len(chunks)
+                    )
+                self._index_chunks(pending, writer)
+            finally:
+                writer.close()
 
-            payloads = []
-            for c in chunks:
-                payload = {
-                    "content": c.content,
-                    "source": c.source_file,
-                    "section": c.section,
-                }
-                payload.update(c.metadata)
-                payloads.append(payload)
+            for key in removed:
+                stale.extend(files.pop(key)["chunk_ids"])
+                report.removed += 1
+            for i in range(0, len(stale), self.upsert_batch_size):
+                self.vectordb.delete(collection, stale[i : i + self.upsert_batch_size])
+            sparse_index.remove(stale)
+            report.chunks_deleted = len(stale)
+        finally:
+            self.vectordb.flush(collection)
 
-            # Indexa no Qdrant
-            # Converte vectors numpy para list[float]
-            vectors_list = vectors.tolist()
+    def _rebuild(
+        self,
+        paths: list[Path],
+        files: dict[str, dict[str, Any]],
+        changed: list[tuple[Path, os.stat_result, str, dict[str, Any] | None]],
+        removed: list[str],
+        report: IngestReport,
+    ) -> None:
+        """Aplica as mudancas em uma nova geracao e a troca atomicamente.
 
-            self.vectordb.upsert(
-                collection_name=self.COLLECTION_NAME,
-                ids=ids,
-                vectors=vectors_list,
-                payloads=payloads,
+        A geracao nova comeca com uma copia dos pontos e do BM25 atuais (sem
+        refazer embeddings), recebe as mudancas e e conferida contra o
+        manifesto. So entao o ponteiro de geracao e trocado. Ate la as buscas
+        seguem na geracao atual, inteira; se algo falhar (ou o processo
+        cair) a geracao nova e descartada. A geracao substituida e mantida
+        para rollback().
+        """
+        generation = max(self.generation, self.previous_generation or 0) + 1
+        collection = self._collection_name(generation)
+        vector_size = self.embedding_model.embedding_size
+        vectordb = self.vectordb
+        vectordb.drop_collection(collection)  # Sobra de uma troca interrompida
+        vectordb.ensure_collection(collection, vector_size=vector_size)
+        kept = list(
+            dict.fromkeys(i for entry in files.values() for i in entry["chunk_ids"])
+        )
+        sparse_index = self.sparse_index.copy(
+            self._generation_file(self._base_sparse_path, generation), kept
+        )
+        try:
+            copied = vectordb.copy_points(self.COLLECTION_NAME, collection, kept)
+            if copied != len(kept) or len(sparse_index) != len(kept):
+                logger.warning(
+                    "Geracao %d incompleta (%d vetores e %d documentos BM25 "
+                    "para %d chunks), reindexando tudo",
+                    self.generation,
+                    copied,
+                    len(sparse_index),
+                    len(kept),
+                )
+                vectordb.drop_collection(collection)
+                vectordb.ensure_collection(collection, vector_size=vector_size)
+                sparse_index.clear()
+                report.removed = len(removed)
+                # Reindexa tambem os arquivos de outros diretorios ingeridos:
+                # sem isso a troca de geracao os apagaria da base
+                skip = {str(p) for p in paths}.union(removed)
+                others = [Path(key) for key in files if key not in skip]
+                files.clear()
+                changed, report.unchanged = self._find_changes(
+                    sorted(paths + others), files
+                )
+                removed = []
+            self._apply(files, changed, removed, collection, sparse_index, report)
+            self._verify_generation(collection, files, sparse_index)
+            sparse_index.save()
+            self._save_manifest(
+                files, self._generation_file(self._base_manifest_path, generation)
+            )
+        except BaseException:
+            self._drop_generation(generation)
+            raise
+        self._switch_generation(generation, self.generation, sparse_index)
+
+    def _verify_generation(
+        self,
+        collection: str,
+        files: dict[str, dict[str, Any]],
+        sparse_index: BM25Index,
+    ) -> None:
+        """Confere se a collection e o BM25 tem exatamente os chunks do manifesto.
+
+        Raises:
+            VectorDBError: Se as contagens divergirem.
+        """
+        expected = len({i for entry in files.values() for i in entry["chunk_ids"]})
+        count = self.vectordb.count(collection)
+        if count != expected or len(sparse_index) != expected:
+            raise VectorDBError(
+                f"Geracao nova inconsistente: {count} vetores e "
+                f"{len(sparse_index)} documentos BM25 para {expected} chunks"
+            )
+
+    def _switch_generation(
+        self, generation: int, previous: int | None, sparse_index: BM25Index
+    ) -> None:
+        """Grava o ponteiro e passa a usar outra geracao (ponto de commit)."""
+        stale = self.previous_generation
+        self._write_generation(generation, previous)
+        with self._lock:
+            if self._vectordb is not None:
+                self._vectordb.set_alias(
+                    self.COLLECTION_NAME, self._collection_name(generation)
+                )
+            self.sparse_index = sparse_index
+            self.manifest_path = self._generation_file(
+                self._base_manifest_path, generation
+            )
+            self.generation, self.previous_generation = generation, previous
+        self._bump_version()
+        logger.info("Geracao %d da base ativa (anterior: %s)", generation, previous)
+        if stale is not None and stale not in (generation, previous):
+            self._drop_generation(stale)
+
+    def _drop_generation(self, generation: int) -> None:
+        """Apaga a collection e os arquivos de uma geracao (erros so no log)."""
+        try:
+            self.vectordb.drop_collection(self._collection_name(generation))
+            self._generation_file(self._base_manifest_path, generation).unlink(
+                missing_ok=True
+            )
+            self._generation_file(self._base_sparse_path, generation).unlink(
+                missing_ok=True
+            )
+        except Exception as e:
+            logger.warning("Falha ao descartar a geracao %d: %s", generation, e)
+
+    def _collection_name(self, generation: int) -> str:
+        """Collection fisica de uma geracao (a 0 e a collection original)."""
+        if generation == 0:
+            return self.COLLECTION_NAME
+        return f"{self.COLLECTION_NAME}_g{generation}"
+
+    @staticmethod
+    def _generation_file(path: Path, generation: int) -> Path:
+        """Arquivo (manifesto ou BM25) de uma geracao."""
+        return path if generation == 0 else path.with_suffix(f".g{generation}.json")
+
+    def _read_generation(self) -> tuple[int, int | None]:
+        """Le o ponteiro de geracao (geracao 0 se ausente ou invalido)."""
+        if not self.generation_path.exists():
+            return 0, None
+        try:
+            stored = json.loads(self.generation_path.read_text(encoding="utf-8"))
+            previous = stored.get("previous")
+            return int(stored["current"]), None if previous is None else int(previous)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning("Ponteiro de geracao invalido, usando a geracao 0: %s", e)
+            return 0, None
+
+    def _write_generation(self, generation: int, previous: int | None) -> None:
+        """Grava o ponteiro de geracao de forma atomica."""
+        self.generation_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.generation_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"current": generation, "previous": previous}),
+            encoding="utf-8",
+        )
+        tmp_path.replace(self.generation_path)
+
+    def _parse_files(self, paths: list[Path]) -> Iterator[list[Chunk]]:
+        """Gera os chunks de cada arquivo, na ordem recebida.
+
+        Com mais de um worker, os arquivos sao lidos em um pool de processos
+        com no maximo 2 tarefas por worker em voo (memoria limitada).
+        """
+        workers = self.ingest_workers or os.cpu_count() or 1
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                yield self.parser.parse_file(path)
+            return
+
+        workers = min(workers, len(paths))
+        # spawn: o processo ja tem threads (escrita, modelos) e fork e inseguro
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            remaining = iter(paths)
+            in_flight: deque[Future[list[Chunk]]] = deque(
+                pool.submit(self.parser.parse_file, path)
+                for path in itertools.islice(remaining, 2 * workers)
             )
+            while in_flight:
+                chunks = in_flight.popleft().result()
+                path = next(remaining, None)
+                if path is not None:
+                    in_flight.append(pool.submit(self.parser.parse_file, path))
+                yield chunks
+
+    def _index_chunks(self, chunks: list[Chunk], writer: _UpsertWriter) -> None:
+        """Gera os embeddings de um lote de chunks e envia para a escrita."""
+        if not chunks:
+            return
+
+        # Ordenar por tamanho reduz o padding dentro de cada lote do modelo
+        chunks = sorted(chunks, key=lambda c: len(c.content))
+        vectors = self.embedding_model.encode([c.content for c in chunks])
+
+        payloads = []
+        for c in chunks:
+            payload = {
+                "content": c.content,
+                "source": c.source_file,
+                "section": c.section,
+            }
+            if self.token_counter is not None:
+                payload["n_tokens"] = self.token_counter(c.content)
+            payload.update(c.metadata)
+            payloads.append(payload)
+
+        # Qdrant aceita o chunk_id (hash MD5) como ID
+        writer.put([c.chunk_id for c in chunks], vectors.tolist(), payloads)
 
-            total_chunks += len(chunks)
-            logger.debug("Arquivo %s indexado: %d chunks", file_path.name, len(chunks))
+    def _load_manifest(self) -> dict[str, dict[str, Any]]:
+        """Le o manifesto de arquivos indexados (vazio se ausente ou invalido).
 
-        logger.info("Ingestao concluida. Total de chunks: %d", total_chunks)
-        return total_chunks
+        Se a collection ou o indice BM25 estiverem vazios (ex: banco
+        apagado), o manifesto e ignorado para que tudo seja reindexado.
+        """
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            stored = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            files = stored["files"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Manifesto invalido, reindexando tudo: %s", e)
+            return {}
+        if files and (
+            self.vectordb.count(self.COLLECTION_NAME) == 0 or not self.sparse_index
+        ):
+            logger.info("Indices vazios, reindexando tudo")
+            self.sparse_index.clear()
+            return {}
+        return files
+
+    def _save_manifest(
+        self, files: dict[str, dict[str, Any]], path: Path | None = None
+    ) -> None:
+        """Grava o manifesto (da geracao ativa, se path for None) de forma atomica."""
+        path = path or self.manifest_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"files": files}, ensure_ascii=False), encoding="utf-8"
+        )
+        tmp_path.replace(path)
 
     def search(self, query: str, limit: int = 3) -> list[str]:
         """Busca simples para teste (retorna apenas conteudo).
 
         A busca real (hibrida) sera no modulo Retriever.
         """
-        vector = self.embedding_model.encode(query)
-        if hasattr(vector, "tolist"):
-            vector = vector.tolist()  # type: ignore
-
-        results = self.vectordb.search(
-            collection_name=self.COLLECTION_NAME,
-            query_vector=vector,  # type: ignore
-            limit=limit,
-        )
+        with self.in_use():
+            vector = self.embedding_model.encode(query)
+            if hasattr(vector, "tolist"):
+                vector = vector.tolist()  # type: ignore
+
+            results = self.vectordb.search(
+                collection_name=self.COLLECTION_NAME,
+                query_vector=vector,  # type: ignore
+                limit=limit,
+            )
 
         return [res.payload["content"] for res in results if res.payload]
+
+
+class _UpsertWriter:
+    """Thread que grava lotes no VectorDB (e no BM25) a partir de uma fila limitada."""
+
+    def __init__(
+        self,
+        vectordb: VectorDB | NumpyVectorDB,
+        collection_name: str,
+        batch_size: int,
+        sparse_index: BM25Index | None = None,
+        depth: int = 4,
+    ) -> None:
+        self.vectordb = vectordb
+        self.sparse_index = sparse_index
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self._queue: queue.Queue[
+            tuple[list[str], list[list[float]], list[dict[str, Any]]] | None
+        ] = queue.Queue(maxsize=depth)
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, name="kb-writer", daemon=True)
+        self._thread.start()
+
+    def put(
+        self,
+        ids: list[str],
+        vectors: list[list[float]],
+        payloads: list[dict[str, Any]],
+    ) -> None:
+        """Enfileira pontos em lotes de ate batch_size (bloqueia se cheia)."""
+        for i in range(0, len(ids), self.batch_size):
+            end = i + self.batch_size
+            self._queue.put((ids[i:end], vectors[i:end], payloads[i:end]))
+
+    def close(self) -> None:
+        """Espera a escrita pendente e propaga o primeiro erro."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        while (batch := self._queue.get()) is not None:
+            if self._error is not None:
+                continue  # Esvazia a fila para nao travar quem produz
+            try:
+                ids, vectors, payloads = batch
+                self.vectordb.upsert(
+                    collection_name=self.collection_name,
+                    ids=ids,
+                    vectors=vectors,
+                    payloads=payloads,
+                )
+                if self.sparse_index is not None:
+                    self.sparse_index.add(ids, payloads)
+            except Exception as e:
+                self._error = e
@@ -0,0 +1,458 @@
+"""Indice vetorial embutido em NumPy (alternativa ao Qdrant).
+
+Para bases pequenas (alguns milhares de chunks) a inicializacao, o lock e o
+custo por consulta do Qdrant local dominam o tempo de busca. Aqui cada
+collection e uma matriz de vetores normalizados em disco (.npy, aberta com
+mmap) mais um JSON com IDs e payloads; o top-k sai de um produto
+matriz-vetor e de um argpartition. Com quantizacao, so os codigos compactos
+ficam na RAM e os candidatos sao reordenados com os vetores completos.
+
+Cada gravacao reescreve a collection inteira; na ingestao os lotes ficam em
+um buffer (buffer_writes) e sao aplicados e gravados uma unica vez no flush.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from mascate.intelligence.rag.quantization import (
+    MODES,
+    QuantizedVectors,
+    quantize,
+)
+from mascate.intelligence.rag.vectordb import VectorDBError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VectorHit:
+    """Resultado de busca (mesmos campos usados do ScoredPoint do Qdrant)."""
+
+    id: str
+    score: float
+    payload: dict[str, Any]
+
+
+class _Collection:
+    """Vetores, IDs e payloads de uma collection."""
+
+    def __init__(self, vector_size: int, dtype: np.dtype) -> None:
+        self.vectors = np.zeros((0, vector_size), dtype=dtype)
+        self.ids: list[str] = []
+        self.payloads: list[dict[str, Any]] = []
+        self.index: dict[str, int] = {}
+        self.quantized: QuantizedVectors | None = None
+        # Escritas ainda nao aplicadas (ver buffer_writes): ID -> (vetor,
+        # payload) e IDs removidos
+        self.buffered = False
+        self.pending: dict[str, tuple[np.ndarray, dict[str, Any]]] = {}
+        self.deleted: set[str] = set()
+
+
+class NumpyVectorDB:
+    """Banco vetorial em memoria/mmap com a mesma interface do VectorDB."""
+
+    VECTORS_FILE = "vectors.npy"
+    META_FILE = "meta.json"
+    CODES_FILE = "codes.npz"
+
+    def __init__(
+        self,
+        path: Path | str,
+        dtype: str = "float32",
+        quantization: str = "none",
+        oversampling: float = 4.0,
+    ) -> None:
+        """Abre as collections existentes em disco.
+
+        Args:
+            path: Diretorio com uma subpasta por collection.
+            dtype: Tipo dos vetores em disco ('float32' ou 'float16'; float16
+                usa metade da memoria, mas a busca nao usa BLAS).
+            quantization: 'none', 'int8' ou 'binary'. Com quantizacao a
+                primeira passada usa os codigos compactos e os melhores
+                candidatos sao reordenados com os vetores completos.
+            oversampling: Candidatos reordenados por resultado pedido.
+        """
+        if quantization not in MODES:
+            raise VectorDBError(f"Quantizacao desconhecida: {quantization}")
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.quantization = quantization
+        self.oversampling = oversampling
+        self._lock = threading.Lock()
+        self._collections: dict[str, _Collection] = {}
+        # Nome logico -> collection fisica (ver set_alias)
+        self._aliases: dict[str, str] = {}
+        logger.info("Indice NumPy inicializado em: %s", self.path)
+
+    def set_alias(self, alias: str, name: str) -> None:
+        """Faz o nome logico apontar para outra collection (troca atomica).
+
+        Args:
+            alias: Nome usado nas chamadas (ex: 'mascate_knowledge').
+            name: Collection fisica que passa a responder por ele.
+        """
+        with self._lock:
+            self._aliases[alias] = name
+        logger.debug("Alias '%s' -> '%s'", alias, name)
+
+    def resolve(self, name: str) -> str:
+        """Nome da collection fisica por tras de um alias."""
+        return self._aliases.get(name, name)
+
+    def ensure_collection(self, name: str, vector_size: int) -> None:
+        """Garante que a collection exista com a dimensao correta.
+
+        Args:
+            name: Nome da collection.
+            vector_size: Dimensao dos vetores (ex: 1024).
+        """
+        name = self.resolve(name)
+        with self._lock:
+            if name in self._collections:
+                return
+            collection = self._load(name, vector_size)
+            self._collections[name] = collection
+            logger.info(
+                "Collection '%s' aberta (%d vetores, size=%d)",
+                name,
+                len(collection.ids),
+                vector_size,
+            )
+
+    def upsert(
+        self,
+        collection_name: str,
+        ids: list[str],
+        vectors: list[list[float]],
+        payloads: list[dict[str, Any]],
+    ) -> None:
+        """Insere ou atualiza vetores e grava a collection em disco.
+
+        Com buffer_writes ativo os pontos so sao aplicados no flush.
+
+        Args:
+            collection_name: Nome da collection.
+            ids: Lista de IDs unicos (hash strings).
+            vectors: Lista de vetores (embeddings).
+            payloads: Metadados associados.
+        """
+        if len(ids) != len(vectors) or len(ids) != len(payloads):
+            raise VectorDBError(
+                "Listas de ids, vectors e payloads devem ter mesmo tamanho"
+            )
+        if not ids:
+            return
+
+        collection_name = self.resolve(collection_name)
+        new = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            collection = self._get(collection_name)
+            if new.shape[1] != collection.vectors.shape[1]:
+                raise VectorDBError(
+                    f"Dimensao {new.shape[1]} diferente da collection "
+                    f"({collection.vectors.shape[1]})"
+                )
+            for point_id, vector, payload in zip(ids, new, payloads, strict=True):
+                collection.deleted.discard(point_id)
+                collection.pending[point_id] = (vector, payload)
+            if not collection.buffered:
+                self._flush(collection_name, collection)
+        logger.debug("Upsert de %d pontos em '%s'", len(ids), collection_name)
+
+    def delete(self, collection_name: str, ids: list[str]) -> None:
+        """Remove pontos pelo ID.
+
+        Args:
+            collection_name: Nome da collection.
+            ids: IDs dos pontos a remover.
+        """
+        collection_name = self.resolve(collection_name)
+        with self._lock:
+            collection = self._get(collection_name)
+            for point_id in ids:
+                collection.pending.pop(point_id, None)
+                if point_id in collection.index:
+                    collection.deleted.add(point_id)
+            if not collection.buffered:
+                self._flush(collection_name, collection)
+        logger.debug("Remocao de %d pontos em '%s'", len(ids), collection_name)
+
+    def buffer_writes(self, collection_name: str) -> None:
+        """Acumula upserts e deletes em memoria ate o proximo flush.
+
+        Buscas e count continuam vendo o estado do ultimo flush.
+
+        Args:
+            collection_name: Nome da collection.
+        """
+        with self._lock:
+            self._get(self.resolve(collection_name)).buffered = True
+
+    def flush(self, collection_name: str) -> None:
+        """Aplica as escritas pendentes, grava a collection e sai do buffer.
+
+        Args:
+            collection_name: Nome da collection.
+        """
+        collection_name = self.resolve(collection_name)
+        with self._lock:
+            collection = self._get(collection_name)
+            collection.buffered = False
+            self._flush(collection_name, collection)
+
+    def close(self) -> None:
+        """Solta as collections (matrizes com mmap e codigos); reabertas sob demanda."""
+        with self._lock:
+            self._collections = {}
+
+    def copy_points(self, source: str, target: str, ids: list[str]) -> int:
+        """Copia pontos (vetor e payload) entre collections, sem reembedding.
+
+        Args:
+            source: Collection de origem.
+            target: Collection de destino (gravada uma unica vez).
+            ids: IDs dos pontos a copiar (ausentes na origem sao ignorados).
+
+        Returns:
+            Numero de pontos copiados.
+        """
+        with self._lock:
+            collection = self._get(self.resolve(source))
+            rows = [collection.index[i] for i in ids if i in collection.index]
+            vectors = np.asarray(collection.vectors[rows], dtype=np.float32)
+            point_ids = [collection.ids[r] for r in rows]
+            payloads = [collection.payloads[r] for r in rows]
+        self.upsert(target, point_ids, list(vectors), payloads)
+        return len(rows)
+
+    def collection_exists(self, name: str) -> bool:
+        """Se a collection fisica existe (aliases nao sao resolvidos)."""
+        with self._lock:
+            if name in self._collections:
+                return True
+        return (self.path / name / self.META_FILE).exists()
+
+    def drop_collection(self, name: str) -> None:
+        """Apaga a collection fisica (aliases nao sao resolvidos)."""
+        with self._lock:
+            self._collections.pop(name, None)
+            shutil.rmtree(self.path / name, ignore_errors=True)
+        logger.info("Collection '%s' removida", name)
+
+    def count(self, collection_name: str) -> int:
+        """Numero de pontos na collection."""
+        with self._lock:
+            return len(self._get(self.resolve(collection_name)).ids)
+
+    def bytes_per_point(self, collection_name: str) -> int:
+        """Bytes de vetor mantidos na RAM por ponto (codigos ou vetor completo)."""
+        with self._lock:
+            collection = self._get(self.resolve(collection_name))
+        if collection.quantized is not None:
+            return collection.quantized.bytes_per_vector
+        return collection.vectors.shape[1] * self.dtype.itemsize
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: list[float],
+        limit: int = 5,
+        score_threshold: float = 0.0,
+    ) -> list[VectorHit]:
+        """Busca os vizinhos mais proximos por similaridade de cosseno.
+
+        Args:
+            collection_name: Nome da collection.
+            query_vector: Vetor da query.
+            limit: Numero maximo de resultados.
+            score_threshold: Score minimo (cosseno similarity).
+
+        Returns:
+            Lista de VectorHit com payload e score, do mais similar ao menos.
+        """
+        collection_name = self.resolve(collection_name)
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                logger.error(
+                    "Erro na busca: collection '%s' nao existe", collection_name
+                )
+                return []
+            # Mutacoes trocam os objetos em vez de altera-los
+            matrix, ids, payloads, quantized = (
+                collection.vectors,
+                collection.ids,
+                collection.payloads,
+                collection.quantized,
+            )
+        if not len(matrix) or limit <= 0:
+            return []
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32)[np.newaxis])[0]
+        k = min(limit, len(matrix))
+        n_candidates = max(k, int(limit * self.oversampling))
+        if quantized is not None and n_candidates < len(matrix):
+            # 1a passada nos codigos; score exato so dos candidatos
+            approx = quantized.scores(query)
+            rows = np.sort(np.argpartition(-approx, n_candidates - 1)[:n_candidates])
+            candidate_scores = matrix[rows] @ query.astype(matrix.dtype)
+        else:
+            rows = np.arange(len(matrix))
+            candidate_scores = matrix @ query.astype(matrix.dtype)
+
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return [
+            VectorHit(
+                id=ids[rows[i]],
+                score=float(candidate_scores[i]),
+                payload=payloads[rows[i]],
+            )
+            for i in top
+            if candidate_scores[i] >= score_threshold
+        ]
+
+    def _flush(self, name: str, collection: _Collection) -> None:
+        """Aplica as escritas pendentes com uma unica copia e gravacao."""
+        if not collection.pending and not collection.deleted:
+            return
+        deleted = collection.deleted
+        keep = [r for r, i in enumerate(collection.ids) if i not in deleted]
+        # Copias: buscas em andamento seguem com os objetos anteriores
+        matrix = np.array(collection.vectors[keep], dtype=self.dtype)
+        point_ids = [collection.ids[r] for r in keep]
+        stored = [collection.payloads[r] for r in keep]
+        index = {point_id: r for r, point_id in enumerate(point_ids)}
+        appended: list[np.ndarray] = []
+        for point_id, (vector, payload) in collection.pending.items():
+            row = index.get(point_id)
+            if row is None:
+                index[point_id] = len(point_ids)
+                point_ids.append(point_id)
+                stored.append(payload)
+                appended.append(vector)
+            else:
+                matrix[row] = vector
+                stored[row] = payload
+        if appended:
+            matrix = np.vstack([matrix, np.asarray(appended, dtype=self.dtype)])
+        collection.vectors = matrix
+        collection.ids = point_ids
+        collection.payloads = stored
+        collection.index = index
+        collection.pending = {}
+        collection.deleted = set()
+        self._save(name, collection)
+
+    def _get(self, name: str) -> _Collection:
+        collection = self._collections.get(name)
+        if collection is None:
+            raise VectorDBError(f"Collection '{name}' nao existe")
+        return collection
+
+    def _load(self, name: str, vector_size: int) -> _Collection:
+        """Abre a collection do disco (vetores com mmap) ou cria uma vazia."""
+        collection = _Collection(vector_size, self.dtype)
+        directory = self.path / name
+        vectors_path = directory / self.VECTORS_FILE
+        meta_path = directory / self.META_FILE
+        if not vectors_path.exists() or not meta_path.exists():
+            return collection
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            vectors = np.load(vectors_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning("Collection '%s' invalida, recriando: %s", name, e)
+            return collection
+        if (
+            vectors.dtype != self.dtype
+            or vectors.ndim != 2
+            or vectors.shape[1] != vector_size
+            or len(meta["ids"]) != len(vectors)
+        ):
+            logger.warning("Collection '%s' incompativel, recriando", name)
+            shutil.rmtree(directory, ignore_errors=True)
+            return collection
+
+        collection.vectors = vectors
+        collection.ids = meta["ids"]
+        collection.payloads = meta["payloads"]
+        collection.index = {point_id: r for r, point_id in enumerate(collection.ids)}
+        if self.quantization != "none":
+            collection.quantized = self._load_codes(
+                directory, meta.get("quantization"), len(vectors)
+            )
+            if collection.quantized is None:
+                # Modo novo ou arquivo ausente: gera a partir dos vetores
+                collection.quantized = quantize(vectors, self.quantization)
+                self._save_codes(directory, collection.quantized)
+                meta["quantization"] = self.quantization
+                tmp_meta = directory / (self.META_FILE + ".tmp")
+                tmp_meta.write_text(json.dumps(meta, ensure_ascii=False), "utf-8")
+                tmp_meta.replace(meta_path)
+        return collection
+
+    def _load_codes(
+        self, directory: Path, stored_mode: str | None, n_vectors: int
+    ) -> QuantizedVectors | None:
+        """Le os codigos gravados, se forem do modo atual e da mesma matriz."""
+        codes_path = directory / self.CODES_FILE
+        if stored_mode != self.quantization or not codes_path.exists():
+            return None
+        try:
+            quantized = QuantizedVectors.load(codes_path, self.quantization)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Codigos quantizados invalidos, recriando: %s", e)
+            return None
+        return quantized if len(quantized) == n_vectors else None
+
+    def _save_codes(self, directory: Path, quantized: QuantizedVectors) -> None:
+        """Grava os codigos quantizados de forma atomica."""
+        tmp_codes = directory / (self.CODES_FILE + ".tmp")
+        quantized.save(tmp_codes)
+        tmp_codes.replace(directory / self.CODES_FILE)
+
+    def _save(self, name: str, collection: _Collection) -> None:
+        """Grava a collection de forma atomica e reabre os vetores com mmap."""
+        directory = self.path / name
+        vectors_path = directory / self.VECTORS_FILE
+        meta_path = directory / self.META_FILE
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp_vectors = directory / (self.VECTORS_FILE + ".tmp")
+            with tmp_vectors.open("wb") as f:
+                np.save(f, np.ascontiguousarray(collection.vectors, dtype=self.dtype))
+            meta: dict[str, Any] = {
+                "ids": collection.ids,
+                "payloads": collection.payloads,
+            }
+            quantized = None
+            if self.quantization != "none":
+                quantized = quantize(collection.vectors, self.quantization)
+                self._save_codes(directory, quantized)
+                meta["quantization"] = self.quantization
+            tmp_meta = directory / (self.META_FILE + ".tmp")
+            tmp_meta.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            tmp_vectors.replace(vectors_path)
+            tmp_meta.replace(meta_path)
+            collection.vectors = np.load(vectors_path, mmap_mode="r")
+            collection.quantized = quantized
+        except OSError as e:
+            raise VectorDBError(f"Falha ao gravar collection {name}: {e}") from e
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Normaliza as linhas (produto interno = cosseno)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
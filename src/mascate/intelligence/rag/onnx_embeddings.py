@@ -0,0 +1,309 @@
+"""Backend ONNX (int8) do modelo de embedding.
+
+O sentence-transformers carrega o PyTorch no processo: segundos de import e
+centenas de MB de RSS antes da primeira consulta, embora o RAG rode na CPU.
+Aqui o modelo e exportado uma unica vez para ONNX (opcionalmente quantizado
+em int8 dinamico), guardado em cache_dir e executado com onnxruntime e o
+tokenizer da biblioteca tokenizers. A exportacao ainda precisa de torch e
+transformers; o uso normal, nao.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+from mascate.core.config import DEFAULT_CACHE_DIR
+from mascate.intelligence.rag.embeddings import EmbeddingError, EmbeddingModel
+
+if TYPE_CHECKING:
+    from mascate.intelligence.rag.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+# Frases usadas para conferir a exportacao contra o modelo original
+_VERIFY_TEXTS = (
+    "abre o firefox",
+    "Use pactl set-sink-volume para ajustar o audio do sistema.",
+    "mascate",
+)
+
+# Similaridade minima aceita entre os vetores ONNX e os do PyTorch
+_MIN_COSINE = 0.99
+
+
+class OnnxEmbeddingModel(EmbeddingModel):
+    """Modelo de embedding exportado para ONNX (mesma interface do EmbeddingModel)."""
+
+    EXPORT_FILE = "export.json"
+    TOKENIZER_FILE = "tokenizer.json"
+
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-m3",
+        cache_dir: Path | str = DEFAULT_CACHE_DIR,
+        quantize: bool = True,
+        cache: EmbeddingCache | None = None,
+        max_length: int = 512,
+        batch_size: int = 32,
+    ) -> None:
+        """Carrega o modelo ONNX, exportando-o na primeira vez.
+
+        Args:
+            model_name: ID do modelo no Hugging Face.
+            cache_dir: Diretorio onde o modelo exportado e guardado.
+            quantize: Usa a versao quantizada em int8 (~1/4 do tamanho).
+            cache: Cache dos vetores de consultas unicas.
+            max_length: Tokens por texto (o excedente e truncado).
+            batch_size: Textos por execucao do modelo.
+
+        Raises:
+            EmbeddingError: Se onnxruntime/tokenizers nao estiverem instalados
+                ou se a exportacao falhar.
+        """
+        if ort is None or Tokenizer is None:
+            raise EmbeddingError(
+                "onnxruntime e tokenizers nao instalados. "
+                "Instale com 'uv pip install onnxruntime tokenizers'."
+            )
+
+        self.model_name = model_name
+        self.device = "cpu"
+        self.cache = cache
+        self.quantize = quantize
+        self.batch_size = batch_size
+        variant = "int8" if quantize else "fp32"
+        # Vetores do int8 diferem um pouco dos originais: cache separado
+        self.cache_key = f"{model_name}@onnx-{variant}"
+        self.model_dir = (
+            Path(cache_dir) / "onnx" / model_name.replace("/", "--") / variant
+        )
+
+        start = time.perf_counter()
+        if not (self.model_dir / self.EXPORT_FILE).exists():
+            export_onnx(model_name, self.model_dir, quantize)
+        try:
+            self.info = json.loads(
+                (self.model_dir / self.EXPORT_FILE).read_text(encoding="utf-8")
+            )
+            self.tokenizer = Tokenizer.from_file(
+                str(self.model_dir / self.TOKENIZER_FILE)
+            )
+            self.tokenizer.enable_truncation(max_length)
+            self.tokenizer.enable_padding(
+                pad_id=self.info["pad_id"], pad_token=self.info["pad_token"]
+            )
+            self.model: Any = ort.InferenceSession(
+                str(self.model_dir / self.info["model_file"]),
+                providers=["CPUExecutionProvider"],
+            )
+        except Exception as e:
+            logger.error("Falha ao carregar modelo ONNX: %s", e)
+            raise EmbeddingError(f"Erro no modelo ONNX {model_name}: {e}") from e
+        self._input_names = {i.name for i in self.model.get_inputs()}
+        logger.info(
+            "Modelo de embedding ONNX carregado: %s (%s) em %.2fs",
+            model_name,
+            variant,
+            time.perf_counter() - start,
+        )
+
+    def _encode(self, texts: str | list[str]) -> np.ndarray:
+        """Tokeniza, roda a sessao ONNX e aplica o pooling do modelo."""
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        embeddings = np.zeros((len(batch), self.embedding_size), dtype=np.float32)
+        # Lotes de textos de tamanho parecido reduzem o padding
+        order = sorted(range(len(batch)), key=lambda i: len(batch[i]))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start : start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([batch[i] for i in rows])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array(
+                    [e.attention_mask for e in encodings], dtype=np.int64
+                ),
+                "token_type_ids": np.array(
+                    [e.type_ids for e in encodings], dtype=np.int64
+                ),
+            }
+            (hidden,) = self.model.run(
+                ["last_hidden_state"],
+                {k: v for k, v in feeds.items() if k in self._input_names},
+            )
+            embeddings[rows] = pool(
+                hidden, feeds["attention_mask"], self.info["pooling"]
+            )
+        return embeddings[0] if isinstance(texts, str) else embeddings
+
+    @property
+    def embedding_size(self) -> int:
+        """Retorna a dimensao do vetor (ex: 1024 para BGE-M3)."""
+        return int(self.info["dimension"])
+
+
+def pool(hidden: np.ndarray, mask: np.ndarray, pooling: str) -> np.ndarray:
+    """Reduz os estados dos tokens a um vetor normalizado por texto.
+
+    Args:
+        hidden: Estados da ultima camada (lote x tokens x dimensao).
+        mask: Attention mask (lote x tokens).
+        pooling: 'cls' (primeiro token, usado pelo BGE-M3) ou 'mean'.
+
+    Returns:
+        Matriz (lote x dimensao) float32 normalizada.
+    """
+    if pooling == "mean":
+        weights = mask[..., np.newaxis].astype(np.float32)
+        vectors = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1)
+    else:
+        vectors = hidden[:, 0]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def export_onnx(model_name: str, directory: Path, quantize: bool = True) -> None:
+    """Exporta o modelo do Hugging Face para ONNX e confere os vetores.
+
+    Roda uma vez por modelo/variante. O export.json e gravado por ultimo:
+    uma exportacao interrompida e refeita no proximo inicio.
+
+    Args:
+        model_name: ID do modelo no Hugging Face.
+        directory: Destino do modelo, do tokenizer e do export.json.
+        quantize: Quantiza os pesos em int8 (quantizacao dinamica).
+
+    Raises:
+        EmbeddingError: Se torch/transformers nao estiverem instalados ou se
+            os vetores exportados divergirem do modelo original.
+    """
+    try:
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+    except ImportError as e:
+        raise EmbeddingError(
+            "A exportacao para ONNX (feita uma unica vez) requer torch e "
+            "transformers. Instale com 'uv pip install torch transformers'."
+        ) from e
+
+    logger.info("Exportando %s para ONNX em %s", model_name, directory)
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    pooling = _pooling_mode(model_name)
+
+    class _HiddenStates(torch.nn.Module):
+        """Expoe so a ultima camada (o pooling e feito no numpy)."""
+
+        def __init__(self, base: Any) -> None:
+            super().__init__()
+            self.base = base
+
+        def forward(self, input_ids: Any, attention_mask: Any) -> Any:
+            return self.base(
+                input_ids=input_ids, attention_mask=attention_mask
+            ).last_hidden_state
+
+    sample = tokenizer(list(_VERIFY_TEXTS), padding=True, return_tensors="pt")
+    with torch.no_grad():
+        reference_hidden = _HiddenStates(model)(
+            sample["input_ids"], sample["attention_mask"]
+        ).numpy()
+    reference = pool(reference_hidden, sample["attention_mask"].numpy(), pooling)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    model_file = "model.int8.onnx" if quantize else "model.onnx"
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        # Modelos > 2 GB (BGE-M3 em fp32) saem com pesos em arquivos externos
+        exported = Path(tmp) / "model.onnx"
+        with torch.no_grad():
+            torch.onnx.export(
+                _HiddenStates(model),
+                (sample["input_ids"], sample["attention_mask"]),
+                str(exported),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "tokens"},
+                    "attention_mask": {0: "batch", 1: "tokens"},
+                    "last_hidden_state": {0: "batch", 1: "tokens"},
+                },
+                opset_version=17,
+            )
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(
+                str(exported),
+                str(directory / model_file),
+                weight_type=QuantType.QInt8,
+            )
+        else:
+            for path in Path(tmp).iterdir():
+                shutil.move(str(path), directory / path.name)
+
+    session = ort.InferenceSession(
+        str(directory / model_file), providers=["CPUExecutionProvider"]
+    )
+    (hidden,) = session.run(
+        ["last_hidden_state"],
+        {
+            "input_ids": sample["input_ids"].numpy(),
+            "attention_mask": sample["attention_mask"].numpy(),
+        },
+    )
+    vectors = pool(hidden, sample["attention_mask"].numpy(), pooling)
+    cosine = float(np.min(np.sum(vectors * reference, axis=1)))
+    if cosine < _MIN_COSINE:
+        raise EmbeddingError(
+            f"Vetores ONNX divergem do modelo original (cosseno {cosine:.4f})"
+        )
+
+    tokenizer.backend_tokenizer.save(str(directory / OnnxEmbeddingModel.TOKENIZER_FILE))
+    info = {
+        "model_name": model_name,
+        "model_file": model_file,
+        "pooling": pooling,
+        "dimension": int(reference.shape[1]),
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+        "min_cosine": cosine,
+    }
+    (directory / OnnxEmbeddingModel.EXPORT_FILE).write_text(
+        json.dumps(info, indent=2), encoding="utf-8"
+    )
+    logger.info(
+        "Exportacao ONNX concluida em %.0fs (cosseno minimo %.4f)",
+        time.perf_counter() - start,
+        cosine,
+    )
+
+
+def _pooling_mode(model_name: str) -> str:
+    """Le o pooling da configuracao do sentence-transformers (padrao: CLS)."""
+    try:
+        from huggingface_hub import hf_hub_download
+
+        config_path = hf_hub_download(model_name, "1_Pooling/config.json")
+        config = json.loads(Path(config_path).read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.debug("Configuracao de pooling indisponivel (%s), usando CLS", e)
+        return "cls"
+    return "mean" if config.get("pooling_mode_mean_tokens") else "cls"
@@ -0,0 +1,137 @@
+"""Quantizacao de vetores para a primeira passada da busca.
+
+Um vetor BGE-M3 em float32 ocupa 4 KB. Os codigos compactos (int8 escalar:
+1 KB; binario: 128 bytes) ficam na RAM e ranqueiam candidatos; os vetores em
+precisao total ficam no disco (mmap) e so os candidatos sao lidos para o
+score exato.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+MODES = ("none", "int8", "binary")
+
+# Linhas processadas por vez (limita a memoria temporaria da conversao)
+_BLOCK = 4096
+
+# Numero de bits 1 de cada byte
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(
+    axis=1, dtype=np.int32
+)
+
+
+def _popcount(codes: np.ndarray) -> np.ndarray:
+    """Bits 1 de cada byte (np.bitwise_count no NumPy 2, tabela no 1.x)."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(codes)
+    return _POPCOUNT[codes]
+
+
+@dataclass
+class QuantizedVectors:
+    """Codigos compactos de uma matriz de vetores normalizados."""
+
+    mode: str
+    codes: np.ndarray
+    # int8: vetor ~= (codigo + 128) * scale + offset, por dimensao
+    scale: np.ndarray | None = None
+    offset: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        """Numero de vetores."""
+        return len(self.codes)
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """Bytes de RAM por vetor."""
+        return self.codes.shape[1] * self.codes.itemsize
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Scores aproximados (maior = mais similar) de todos os vetores.
+
+        Args:
+            query: Vetor normalizado da consulta (float32).
+
+        Returns:
+            Array com um score por vetor. Para int8, aproxima o produto
+            interno; para binario, e o negativo da distancia de Hamming.
+        """
+        if self.mode == "binary":
+            bits = np.packbits(query > 0)
+            distances = np.empty(len(self.codes), dtype=np.int32)
+            for start in range(0, len(self.codes), _BLOCK):
+                block = self.codes[start : start + _BLOCK]
+                distances[start : start + _BLOCK] = _popcount(block ^ bits).sum(axis=1)
+            return -distances
+
+        assert self.scale is not None and self.offset is not None
+        # q . v = (q * scale) . codigo + q . (128 * scale + offset)
+        weighted = query * self.scale
+        bias = float(query @ (128 * self.scale + self.offset))
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), _BLOCK):
+            block = self.codes[start : start + _BLOCK].astype(np.float32)
+            scores[start : start + _BLOCK] = block @ weighted
+        return scores + bias
+
+    def save(self, path: Path) -> None:
+        """Grava os codigos (.npz sem compressao)."""
+        arrays = {"codes": self.codes}
+        if self.scale is not None and self.offset is not None:
+            arrays.update(scale=self.scale, offset=self.offset)
+        with path.open("wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: Path, mode: str) -> QuantizedVectors:
+        """Le os codigos gravados por save()."""
+        with np.load(path) as data:
+            return cls(
+                mode=mode,
+                codes=data["codes"],
+                scale=data.get("scale"),
+                offset=data.get("offset"),
+            )
+
+
+def quantize(vectors: np.ndarray, mode: str) -> QuantizedVectors:
+    """Gera os codigos compactos de uma matriz de vetores.
+
+    Args:
+        vectors: Matriz (N x D) de vetores normalizados.
+        mode: 'int8' (escalar, min/max por dimensao) ou 'binary' (sinal).
+
+    Returns:
+        QuantizedVectors com os codigos.
+    """
+    if mode == "binary":
+        codes = np.empty((len(vectors), (vectors.shape[1] + 7) // 8), dtype=np.uint8)
+        for start in range(0, len(vectors), _BLOCK):
+            block = vectors[start : start + _BLOCK]
+            codes[start : start + _BLOCK] = np.packbits(block > 0, axis=1)
+        return QuantizedVectors(mode, codes)
+
+    if mode != "int8":
+        raise ValueError(f"Quantizacao desconhecida: {mode}")
+    if not len(vectors):
+        zeros = np.zeros(vectors.shape[1], dtype=np.float32)
+        return QuantizedVectors(
+            mode, np.zeros(vectors.shape, dtype=np.int8), zeros + 1, zeros
+        )
+
+    low = np.min(vectors, axis=0).astype(np.float32)
+    high = np.max(vectors, axis=0).astype(np.float32)
+    scale = np.where(high > low, (high - low) / 255, 1.0).astype(np.float32)
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    for start in range(0, len(vectors), _BLOCK):
+        block = np.asarray(vectors[start : start + _BLOCK], dtype=np.float32)
+        levels = np.rint((block - low) / scale) - 128
+        codes[start : start + _BLOCK] = np.clip(levels, -128, 127)
+    return QuantizedVectors(mode, codes, scale, low)
@@ -1,43 +1,101 @@
 """Retriever RAG (Busca Hibrida).
 
-Recupera documentos relevantes usando busca vetorial (densa) e keywords.
+Recupera documentos relevantes usando busca vetorial (densa) e, no modo
+hibrido, o indice BM25 da Knowledge Base, combinados por reciprocal rank fusion.
 """
 
 from __future__ import annotations
 
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import Any
 
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.rag.embedding_cache import normalize_text
 from mascate.intelligence.rag.knowledge import KnowledgeBase
 
 logger = logging.getLogger(__name__)
 
+# Contexto enviado ao LLM quando nenhum documento e relevante
+NO_CONTEXT = "Nenhuma informacao relevante encontrada."
+
 
 @dataclass
 class SearchResult:
-    """Resultado de busca unificado."""
+    """Resultado de busca unificado.
+
+    score ordena os resultados (cosseno na busca densa, RRF normalizado na
+    hibrida); dense_score e sempre o cosseno da busca densa, ou None para
+    documentos trazidos apenas pelo BM25.
+    """
 
     content: str
     source: str
     score: float
     metadata: dict
+    dense_score: float | None = None
 
 
 class RAGRetriever:
     """Recupera informacao da Knowledge Base."""
 
-    def __init__(self, knowledge_base: KnowledgeBase) -> None:
+    def __init__(
+        self,
+        knowledge_base: KnowledgeBase,
+        hybrid: bool = False,
+        rrf_k: int = 60,
+        score_threshold: float = 0.3,
+        sparse_threshold: float = 1.5,
+        cache_size: int = 0,
+    ) -> None:
         """Inicializa o retriever.
 
         Args:
             knowledge_base: Instancia da KB populada.
+            hybrid: Se True, combina a busca densa com o indice BM25 da KB
+                por reciprocal rank fusion.
+            rrf_k: Constante do RRF (valores maiores achatam o peso do topo).
+            score_threshold: Score minimo da busca densa.
+            sparse_threshold: Pontuacao BM25 minima para um documento entrar
+                na fusao (a escala do BM25 nao e comparavel ao cosseno).
+            cache_size: Buscas guardadas em um LRU por (consulta, top_k,
+                limiar, versao da KB). 0 desativa.
         """
         self.kb = knowledge_base
-
-        # Garante indice de texto para busca esparsa (keyword match)
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
+        self.score_threshold = score_threshold
+        self.sparse_threshold = sparse_threshold
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, list[SearchResult]] = OrderedDict()
+        self._cache_version: int | None = None
+        self._cache_lock = threading.Lock()
+        # BM25 roda em paralelo com o encode da query e a busca densa
+        self._sparse_pool = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-sparse")
+            if hybrid
+            else None
+        )
+        # Criado na primeira busca densa (o banco vetorial abre sob demanda)
+        # e de novo a cada geracao da base (collection fisica nova)
+        self._text_index_collection: str | None = None
+
+    def _ensure_text_index(self) -> None:
+        """Garante indice de texto para busca esparsa (keyword match)."""
+        vectordb = self.kb.vectordb
+        client = getattr(vectordb, "client", None)
+        if client is None:
+            return  # Backend numpy: o BM25 da KB cobre a busca por palavra
+        collection = vectordb.resolve(self.kb.COLLECTION_NAME)
+        if collection == self._text_index_collection:
+            return
+        self._text_index_collection = collection
         try:
-            self.kb.vectordb.client.create_payload_index(
-                collection_name=self.kb.COLLECTION_NAME,
+            client.create_payload_index(
+                collection_name=collection,
                 field_name="content",
                 field_schema="text",
             )
@@ -47,7 +105,15 @@ class RAGRetriever:
             logger.debug("Aviso ao criar indice de texto: %s", e)
 
     def search(self, query: str, top_k: int = 3) -> list[SearchResult]:
-        """Busca hibrida (Densa + Keyword).
+        """Busca hibrida (Densa + BM25).
+
+        No modo hibrido a busca esparsa roda em paralelo com a densa e as duas
+        listas sao combinadas por reciprocal rank fusion, cada uma filtrada
+        antes pelo proprio limiar. O score resultante e normalizado para
+        1.0 = primeiro lugar nas duas listas; o cosseno fica em dense_score.
+
+        Com cache, o resultado de uma consulta repetida e reaproveitado ate a
+        versao da KB mudar (ingestao ou remocao), quando o cache e esvaziado.
 
         Args:
             query: Pergunta do usuario.
@@ -56,44 +122,95 @@ class RAGRetriever:
         Returns:
             Lista de SearchResult ordenada por relevancia.
         """
-        # 1. Busca Densa (Semantica)
-        dense_results = self._search_dense(query, limit=top_k * 2)
-
-        # 2. Busca Esparsa (Keyword/Texto) - Simplificada via Qdrant Scroll/Filter
-        # Nota: Qdrant local nao tem um endpoint de "search text" puro rankeado como BM25 nativo exposto facilmente
-        # sem plugins, mas podemos confiar na busca vetorial como primaria e boostar com keywords se necessario.
-        # Para esta PoC, vamos focar na busca Densa que ja é muito forte com BGE-M3.
-        # Se precisarmos de keyword exata, filtramos os dense results.
-
-        # Por enquanto, retornamos os resultados densos convertidos
-        results = []
-        for res in dense_results:
-            if not res.payload:
-                continue
-
-            results.append(
-                SearchResult(
-                    content=res.payload.get("content", ""),
-                    source=res.payload.get("source", "unknown"),
-                    score=res.score,
-                    metadata=res.payload,
-                )
-            )
-
-        return results[:top_k]
+        if self.cache_size <= 0:
+            return self._search(query, top_k)
+
+        metrics = get_metrics()
+        version = self.kb.version
+        key = (
+            normalize_text(query),
+            top_k,
+            self.score_threshold,
+            self.sparse_threshold,
+            version,
+        )
+        with self._cache_lock:
+            if version != self._cache_version:
+                # KB modificada: nenhuma entrada antiga vale mais
+                self._cache.clear()
+                self._cache_version = version
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                metrics.increment("rag.retrieval_cache.hits")
+                return list(cached)
+        metrics.increment("rag.retrieval_cache.misses")
+
+        results = self._search(query, top_k)
+        with self._cache_lock:
+            if version == self._cache_version:
+                self._cache[key] = list(results)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def _search(self, query: str, top_k: int) -> list[SearchResult]:
+        """Executa a busca (densa ou hibrida) sem cache."""
+        if not self.hybrid:
+            return [
+                _to_result(res.payload, res.score, res.score)
+                for res in self._search_dense(query, limit=top_k * 2)
+                if res.payload
+            ][:top_k]
+
+        assert self._sparse_pool is not None
+        metrics = get_metrics()
+        sparse_future = self._sparse_pool.submit(
+            self.kb.sparse_index.search, query, top_k * 2
+        )
+        with metrics.timer("rag.search.dense"):
+            dense_results = self._search_dense(query, limit=top_k * 2)
+        # Limiares antes da fusao: o RRF so olha posicoes, entao sem eles
+        # qualquer palavra em comum traria contexto
+        sparse_results = [
+            r for r in sparse_future.result() if r.score >= self.sparse_threshold
+        ]
+
+        fused: dict[str, float] = {}
+        payloads: dict[str, dict[str, Any]] = {}
+        for ranking in (dense_results, sparse_results):
+            for rank, res in enumerate(r for r in ranking if r.payload):
+                key = str(res.id)
+                fused[key] = fused.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                payloads.setdefault(key, res.payload)
+
+        only_sparse = {str(r.id) for r in sparse_results} - {
+            str(r.id) for r in dense_results
+        }
+        metrics.increment("rag.search.sparse_only", len(only_sparse))
+
+        dense_scores = {str(r.id): r.score for r in dense_results}
+        best = 2.0 / (self.rrf_k + 1)
+        ranked = sorted(fused.items(), key=lambda item: -item[1])[:top_k]
+        return [
+            _to_result(payloads[key], score / best, dense_scores.get(key))
+            for key, score in ranked
+        ]
 
     def _search_dense(self, query: str, limit: int) -> list:
-        """Executa busca vetorial."""
-        vector = self.kb.embedding_model.encode(query)
-        if hasattr(vector, "tolist"):
-            vector = vector.tolist()
-
-        return self.kb.vectordb.search(
-            collection_name=self.kb.COLLECTION_NAME,
-            query_vector=vector,  # type: ignore
-            limit=limit,
-            score_threshold=0.3,  # Filtra lixo irrelevante
-        )
+        """Executa busca vetorial (a KB nao descarrega nada durante ela)."""
+        with self.kb.in_use():
+            self._ensure_text_index()
+            vector = self.kb.embedding_model.encode(query)
+            if hasattr(vector, "tolist"):
+                vector = vector.tolist()
+
+            return self.kb.vectordb.search(
+                collection_name=self.kb.COLLECTION_NAME,
+                query_vector=vector,  # type: ignore
+                limit=limit,
+                score_threshold=self.score_threshold,  # Filtra lixo irrelevante
+            )
 
     def format_context(self, results: list[SearchResult]) -> str:
         """Formata resultados para o prompt do LLM.
@@ -105,12 +222,27 @@ class RAGRetriever:
             String formatada com XML tags ou similar.
         """
         if not results:
-            return "Nenhuma informacao relevante encontrada."
-
-        context_parts = []
-        for i, res in enumerate(results, 1):
-            context_parts.append(
-                f"<doc id='{i}' source='{res.source}'>\n{res.content}\n</doc>"
-            )
+            return NO_CONTEXT
 
+        context_parts = [
+            format_doc(i, res.source, res.content) for i, res in enumerate(results, 1)
+        ]
         return "\n\n".join(context_parts)
+
+
+def _to_result(
+    payload: dict[str, Any], score: float, dense_score: float | None
+) -> SearchResult:
+    """Converte o payload de um ponto em SearchResult."""
+    return SearchResult(
+        content=payload.get("content", ""),
+        source=payload.get("source", "unknown"),
+        score=score,
+        metadata=payload,
+        dense_score=dense_score,
+    )
+
+
+def format_doc(doc_id: int, source: str, content: str) -> str:
+    """Formata um documento do contexto com tags XML."""
+    return f"<doc id='{doc_id}' source='{source}'>\n{content}\n</doc>"
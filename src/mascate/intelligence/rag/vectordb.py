@@ -1,6 +1,8 @@
 """Interface para Banco de Dados Vetorial (Qdrant).
 
-Gerencia conexao, criacao de collections e operacoes de CRUD.
+Gerencia conexao, criacao de collections e operacoes de CRUD. O
+qdrant-client (cerca de 1s de import) so e importado ao criar o primeiro
+VectorDB, entao o backend numpy e a Knowledge Base preguicosa nao o carregam.
 """
 
 from __future__ import annotations
@@ -9,17 +11,14 @@ import logging
 from pathlib import Path
 from typing import Any
 
-try:
-    from qdrant_client import QdrantClient
-    from qdrant_client.http import models
-except ImportError:
-    QdrantClient = None
-    models = None
-
 from mascate.core.exceptions import MascateError
 
 logger = logging.getLogger(__name__)
 
+# Importados no primeiro uso (ver _import_qdrant)
+QdrantClient: Any = None
+models: Any = None
+
 
 class VectorDBError(MascateError):
     """Erro relacionado ao banco vetorial."""
@@ -34,12 +33,14 @@ class VectorDB:
         Args:
             path: Caminho para persistencia em disco ou ':memory:'.
         """
-        if QdrantClient is None:
+        if not _import_qdrant():
             raise VectorDBError(
                 "qdrant-client nao instalado. Instale com 'uv pip install qdrant-client'."
             )
 
         self.path = str(path)
+        # Nome logico -> collection fisica (ver set_alias)
+        self._aliases: dict[str, str] = {}
         try:
             self.client = QdrantClient(path=self.path)
             logger.info("Qdrant inicializado em: %s", self.path)
@@ -47,6 +48,27 @@ class VectorDB:
             logger.error("Falha ao iniciar Qdrant: %s", e)
             raise VectorDBError(f"Erro Qdrant: {e}") from e
 
+    def close(self) -> None:
+        """Fecha o cliente (libera o lock do armazenamento local)."""
+        try:
+            self.client.close()
+        except Exception as e:
+            logger.debug("Falha ao fechar o Qdrant: %s", e)
+
+    def set_alias(self, alias: str, name: str) -> None:
+        """Faz o nome logico apontar para outra collection (troca atomica).
+
+        Args:
+            alias: Nome usado nas chamadas (ex: 'mascate_knowledge').
+            name: Collection fisica que passa a responder por ele.
+        """
+        self._aliases[alias] = name
+        logger.debug("Alias '%s' -> '%s'", alias, name)
+
+    def resolve(self, name: str) -> str:
+        """Nome da collection fisica por tras de um alias."""
+        return self._aliases.get(name, name)
+
     def ensure_collection(self, name: str, vector_size: int) -> None:
         """Garante que a collection exista com a configuracao correta.
 
@@ -54,6 +76,7 @@ class VectorDB:
             name: Nome da collection.
             vector_size: Dimensao dos vetores (ex: 1024).
         """
+        name = self.resolve(name)
         try:
             collections = self.client.get_collections().collections
             exists = any(c.name == name for c in collections)
@@ -90,6 +113,7 @@ class VectorDB:
                 "Listas de ids, vectors e payloads devem ter mesmo tamanho"
             )
 
+        collection_name = self.resolve(collection_name)
         try:
             # Qdrant local suporta batch upsert
             self.client.upsert(
@@ -104,6 +128,95 @@ class VectorDB:
         except Exception as e:
             raise VectorDBError(f"Falha no upsert: {e}") from e
 
+    def delete(self, collection_name: str, ids: list[str]) -> None:
+        """Remove pontos pelo ID.
+
+        Args:
+            collection_name: Nome da collection.
+            ids: IDs dos pontos a remover.
+        """
+        if not ids:
+            return
+        collection_name = self.resolve(collection_name)
+        try:
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=ids),
+            )
+            logger.debug("Removidos %d pontos de '%s'", len(ids), collection_name)
+        except Exception as e:
+            raise VectorDBError(f"Falha ao remover pontos: {e}") from e
+
+    def buffer_writes(self, collection_name: str) -> None:
+        """Sem efeito: o Qdrant grava cada lote de forma incremental."""
+
+    def flush(self, collection_name: str) -> None:
+        """Sem efeito: o Qdrant grava cada lote de forma incremental."""
+
+    def copy_points(
+        self, source: str, target: str, ids: list[str], batch_size: int = 256
+    ) -> int:
+        """Copia pontos (vetor e payload) entre collections, sem reembedding.
+
+        Args:
+            source: Collection de origem.
+            target: Collection de destino.
+            ids: IDs dos pontos a copiar (ausentes na origem sao ignorados).
+            batch_size: Pontos lidos e gravados por vez.
+
+        Returns:
+            Numero de pontos copiados.
+        """
+        source, target = self.resolve(source), self.resolve(target)
+        copied = 0
+        try:
+            for i in range(0, len(ids), batch_size):
+                records = self.client.retrieve(
+                    collection_name=source,
+                    ids=ids[i : i + batch_size],
+                    with_payload=True,
+                    with_vectors=True,
+                )
+                if records:
+                    self.client.upsert(
+                        collection_name=target,
+                        points=[
+                            models.PointStruct(
+                                id=r.id, vector=r.vector, payload=r.payload
+                            )
+                            for r in records
+                        ],
+                    )
+                copied += len(records)
+        except Exception as e:
+            raise VectorDBError(f"Falha ao copiar pontos: {e}") from e
+        logger.debug("Copiados %d pontos de '%s' para '%s'", copied, source, target)
+        return copied
+
+    def collection_exists(self, name: str) -> bool:
+        """Se a collection fisica existe (aliases nao sao resolvidos)."""
+        try:
+            return self.client.collection_exists(name)
+        except Exception as e:
+            raise VectorDBError(f"Falha ao consultar collection {name}: {e}") from e
+
+    def drop_collection(self, name: str) -> None:
+        """Apaga a collection fisica (aliases nao sao resolvidos)."""
+        try:
+            self.client.delete_collection(collection_name=name)
+            logger.info("Collection '%s' removida", name)
+        except Exception as e:
+            raise VectorDBError(f"Falha ao remover collection {name}: {e}") from e
+
+    def count(self, collection_name: str) -> int:
+        """Numero de pontos na collection."""
+        try:
+            return self.client.count(
+                collection_name=self.resolve(collection_name), exact=True
+            ).count
+        except Exception as e:
+            raise VectorDBError(f"Falha ao contar pontos: {e}") from e
+
     def search(
         self,
         collection_name: str,
@@ -122,7 +235,17 @@ class VectorDB:
         Returns:
             Lista de ScoredPoint com payload e score.
         """
+        collection_name = self.resolve(collection_name)
         try:
+            # query_points substitui search (removido no qdrant-client 1.13)
+            if hasattr(self.client, "query_points"):
+                return self.client.query_points(
+                    collection_name=collection_name,
+                    query=query_vector,
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=True,
+                ).points
             return self.client.search(
                 collection_name=collection_name,
                 query_vector=query_vector,
@@ -133,3 +256,20 @@ class VectorDB:
         except Exception as e:
             logger.error("Erro na busca: %s", e)
             return []
+
+
+def _import_qdrant() -> bool:
+    """Importa o qdrant-client sob demanda.
+
+    Returns:
+        False se a biblioteca nao estiver instalada.
+    """
+    global QdrantClient, models
+    try:
+        if QdrantClient is None:
+            from qdrant_client import QdrantClient
+        if models is None:
+            from qdrant_client.http import models
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,257 @@
+"""Roteador deterministico de intencoes (fast path).
+
+A maior parte do uso sao poucas frases ("abre o X", "aumenta o volume",
+"proxima musica"). Essas frases sao reconhecidas por regras compiladas uma
+unica vez em uma expressao regular combinada sobre a transcricao
+normalizada, e viram uma Intent direto, sem RAG nem LLM.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from mascate.core.metrics import get_metrics
+from mascate.intelligence.brain import Intent
+from mascate.intelligence.text import normalize_transcript
+
+logger = logging.getLogger(__name__)
+
+# Slots reutilizados pelas regras
+_APP = r"(?P<app>[a-z][a-z0-9_-]*)"
+_NUMBER = r"(?P<number>\d{1,3})"
+# Dominios de topo aceitos sem esquema ("relatorio.pdf" e arquivo, nao site)
+_TLDS = "com|br|org|net|io|dev|app|gov|edu|info|me|tv|co|ai|pt|us|uk|de|fr|es|eu"
+_URL = (
+    r"(?P<url>(?:(?:https?://|www\.)[a-z0-9-]+(?:\.[a-z0-9-]+)+"
+    rf"|[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:{_TLDS})\b)(?:/\S*)?)"
+)
+_PERCENT = r"(?: por cento)?"
+
+# Fragmentos comuns
+_OPEN = r"(?:abre|abra|abrir|inicia|inicie|iniciar|executa|execute|roda|rode)"
+_ART = r"(?:(?:o|a|os|as) )?"
+_UP = r"(?:aumenta|aumente|aumentar|sobe|suba|subir)"
+_DOWN = r"(?:diminui|diminua|diminuir|abaixa|abaixe|baixa|baixe)"
+_ON = r"(?:liga|ligue|ligar|ativa|ative|ativar)"
+_OFF = r"(?:desliga|desligue|desligar|desativa|desative|desativar)"
+
+# Palavras que indicam outro tipo de alvo apos o verbo de abrir
+_NOT_APP = r"(?!(?:site|pagina|pasta|arquivo|diretorio|url|link)\b)"
+
+Slots = dict[str, str]
+Builder = Callable[[Slots], tuple[str, str, dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class Route:
+    """Regra do fast path: padrao sobre o texto normalizado e construtor."""
+
+    name: str
+    pattern: str
+    build: Builder
+
+
+def _volume(action: str) -> Builder:
+    def build(slots: Slots) -> tuple[str, str, dict[str, Any]]:
+        params: dict[str, Any] = {"action": action}
+        if slots.get("number"):
+            params["value"] = int(slots["number"])
+        return "system_op", "volume", params
+
+    return build
+
+
+def _fixed(action: str, target: str, params: dict[str, Any] | None = None) -> Builder:
+    return lambda _slots: (action, target, dict(params or {}))
+
+
+def _url_target(slots: Slots) -> tuple[str, str, dict[str, Any]]:
+    url = slots["url"]
+    if not url.startswith(("http://", "https://")):
+        url = f"https://{url}"
+    return "open_url", url, {}
+
+
+# Ordem importa: a primeira regra que casa vence (URLs antes de apps)
+DEFAULT_ROUTES: tuple[Route, ...] = (
+    Route(
+        "open_url",
+        rf"(?:{_OPEN}|acessa|acesse|entra em|entre em|vai para|va para) "
+        rf"{_ART}(?:(?:site|pagina) )?(?:(?:do|da|de) )?{_URL}",
+        _url_target,
+    ),
+    Route(
+        "open_app",
+        rf"{_OPEN} {_ART}(?:(?:app|aplicativo|programa) )?{_NOT_APP}{_APP}",
+        lambda slots: ("open_app", slots["app"], {}),
+    ),
+    Route(
+        "volume_up",
+        rf"{_UP} {_ART}volume(?: em {_NUMBER}{_PERCENT})?",
+        _volume("up"),
+    ),
+    Route(
+        "volume_down",
+        rf"{_DOWN} {_ART}volume(?: em {_NUMBER}{_PERCENT})?",
+        _volume("down"),
+    ),
+    Route(
+        "volume_set",
+        rf"(?:(?:coloca|coloque|poe|ponha|deixa|deixe|{_UP}|{_DOWN}) )?{_ART}volume "
+        rf"(?:em|para|no|a) {_NUMBER}{_PERCENT}",
+        _volume("set"),
+    ),
+    Route(
+        "volume_mute",
+        r"(?:muta|mute|silencia|silencie|tira o som|sem som)",
+        _fixed("system_op", "volume", {"action": "mute"}),
+    ),
+    Route(
+        "media_next",
+        r"(?:proxima|pula|pule|avanca|avance)(?: a)?(?: musica| faixa)?",
+        _fixed("media_control", "next"),
+    ),
+    Route(
+        "media_previous",
+        r"(?:(?:musica|faixa) anterior|volta(?: a)?(?: musica| faixa))",
+        _fixed("media_control", "previous"),
+    ),
+    Route(
+        "media_pause",
+        r"(?:pausa|pause|pausar)(?: a)?(?: musica| video| faixa)?",
+        _fixed("media_control", "pause"),
+    ),
+    Route(
+        "media_play",
+        r"(?:continua|continue|despausa|toca|play)(?: a)?(?: musica| video| faixa)?",
+        _fixed("media_control", "play"),
+    ),
+    Route(
+        "lock_screen",
+        r"(?:bloqueia|bloqueie|bloquear|trava|trave|travar) (?:a )?tela",
+        _fixed("system_op", "lock"),
+    ),
+    Route(
+        "wifi_on",
+        rf"{_ON} {_ART}wi-?fi",
+        _fixed("system_op", "wifi", {"action": "on"}),
+    ),
+    Route(
+        "wifi_off",
+        rf"{_OFF} {_ART}wi-?fi",
+        _fixed("system_op", "wifi", {"action": "off"}),
+    ),
+    Route(
+        "bluetooth_on",
+        rf"{_ON} {_ART}bluetooth",
+        _fixed("system_op", "bluetooth", {"action": "on"}),
+    ),
+    Route(
+        "bluetooth_off",
+        rf"{_OFF} {_ART}bluetooth",
+        _fixed("system_op", "bluetooth", {"action": "off"}),
+    ),
+    Route(
+        "brightness_up",
+        rf"{_UP} {_ART}brilho",
+        _fixed("system_op", "brightness", {"action": "up"}),
+    ),
+    Route(
+        "brightness_down",
+        rf"{_DOWN} {_ART}brilho",
+        _fixed("system_op", "brightness", {"action": "down"}),
+    ),
+)
+
+
+class FastPathRouter:
+    """Reconhece frases frequentes e gera a Intent sem RAG nem LLM."""
+
+    def __init__(self, routes: tuple[Route, ...] = DEFAULT_ROUTES) -> None:
+        """Compila as regras em uma unica expressao regular.
+
+        Cada regra vira um grupo nomeado 'r<i>'; seus slots sao renomeados
+        para 'r<i>_<slot>' para nao colidirem entre regras.
+
+        Args:
+            routes: Regras em ordem de prioridade.
+        """
+        self.routes = routes
+        alternatives = []
+        for i, route in enumerate(routes):
+            pattern = re.sub(r"\(\?P<(\w+)>", rf"(?P<r{i}_\1>", route.pattern)
+            alternatives.append(f"(?P<r{i}>{pattern})")
+        self._regex = re.compile("|".join(alternatives))
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fracao das consultas resolvidas pelo fast path."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def route(self, text: str) -> Intent | None:
+        """Tenta resolver a transcricao por regra.
+
+        A regra precisa cobrir a frase inteira: um comando dentro de uma
+        frase maior ("nao abre o firefox", "explica como desligar o wifi")
+        nao e um pedido para executa-lo.
+
+        Args:
+            text: Transcricao do usuario (normalizada internamente).
+
+        Returns:
+            Intent ou None se nenhuma regra casar.
+        """
+        start = time.perf_counter()
+        normalized = normalize_transcript(text)
+        match = self._regex.fullmatch(normalized)
+        intent = self._build(match) if match else None
+
+        metrics = get_metrics()
+        metrics.observe("router.fast_path", time.perf_counter() - start)
+        if intent is None:
+            self.misses += 1
+            metrics.increment("router.fast_path.misses")
+        else:
+            self.hits += 1
+            metrics.increment("router.fast_path.hits")
+            logger.debug("Fast path: '%s' -> %s", normalized, intent.raw_json)
+        return intent
+
+    def _build(self, match: re.Match[str]) -> Intent | None:
+        """Monta a Intent da regra que casou."""
+        group = match.lastgroup
+        if group is None:
+            return None
+
+        prefix = f"{group}_"
+        slots = {
+            name[len(prefix) :]: value
+            for name, value in match.groupdict().items()
+            if name.startswith(prefix) and value is not None
+        }
+        return make_intent(*self.routes[int(group[1:])].build(slots))
+
+
+def make_intent(
+    action: str, target: str, params: dict[str, Any] | None = None
+) -> Intent:
+    """Monta uma Intent com o raw_json canonico (params omitido se vazio)."""
+    params = params or {}
+    data: dict[str, Any] = {"action": action, "target": target}
+    if params:
+        data["params"] = params
+    return Intent(
+        action=action,
+        target=target,
+        params=params,
+        raw_json=json.dumps(data, ensure_ascii=False),
+    )
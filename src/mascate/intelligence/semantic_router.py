@@ -0,0 +1,383 @@
+"""Roteador semantico por exemplos.
+
+Parafrases ("ta muito alto", "passa essa musica") escapam das regras do fast
+path, mas nao precisam do LLM. Frases de exemplo por intencao sao embutidas
+uma unica vez (na primeira consulta) com o modelo de embedding da Knowledge
+Base; cada transcricao e classificada por um produto matriz-vetor seguido de um
+teste de margem entre a melhor e a segunda melhor intencao.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from mascate.core.metrics import get_metrics
+from mascate.executor.registry import get_action_schemas
+from mascate.intelligence.router import make_intent
+from mascate.intelligence.text import normalize_transcript
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from mascate.intelligence.brain import Intent
+    from mascate.intelligence.rag.embeddings import EmbeddingModel
+
+logger = logging.getLogger(__name__)
+
+# Valores numericos nao sao extraidos por similaridade ('volume em 40' e
+# 'volume em 70' ficam proximos), entao essas frases seguem para o Brain
+_DIGITS_RE = re.compile(r"\d")
+
+
+_VOLUME_UP = {"action": "system_op", "target": "volume", "params": {"action": "up"}}
+_VOLUME_DOWN = {
+    "action": "system_op",
+    "target": "volume",
+    "params": {"action": "down"},
+}
+_MUTE = {"action": "system_op", "target": "volume", "params": {"action": "mute"}}
+_NEXT = {"action": "media_control", "target": "next"}
+_PREVIOUS = {"action": "media_control", "target": "previous"}
+_PAUSE = {"action": "media_control", "target": "pause"}
+_PLAY = {"action": "media_control", "target": "play"}
+_LOCK = {"action": "system_op", "target": "lock"}
+_WIFI_ON = {"action": "system_op", "target": "wifi", "params": {"action": "on"}}
+_WIFI_OFF = {"action": "system_op", "target": "wifi", "params": {"action": "off"}}
+_BRIGHTNESS_UP = {
+    "action": "system_op",
+    "target": "brightness",
+    "params": {"action": "up"},
+}
+_BRIGHTNESS_DOWN = {
+    "action": "system_op",
+    "target": "brightness",
+    "params": {"action": "down"},
+}
+
+# Exemplos curados: parafrases comuns que as regras do fast path nao cobrem
+DEFAULT_EXEMPLARS: tuple[tuple[str, dict[str, Any]], ...] = (
+    ("ta muito baixo", _VOLUME_UP),
+    ("nao estou ouvindo nada", _VOLUME_UP),
+    ("aumenta o som", _VOLUME_UP),
+    ("poe mais alto", _VOLUME_UP),
+    ("ta muito alto", _VOLUME_DOWN),
+    ("abaixa um pouco o som", _VOLUME_DOWN),
+    ("diminui o som", _VOLUME_DOWN),
+    ("deixa no mudo", _MUTE),
+    ("tira o audio", _MUTE),
+    ("passa essa musica", _NEXT),
+    ("troca de musica", _NEXT),
+    ("nao gosto dessa musica", _NEXT),
+    ("volta uma musica", _PREVIOUS),
+    ("toca a de antes", _PREVIOUS),
+    ("da um pause", _PAUSE),
+    ("para a musica um pouco", _PAUSE),
+    ("solta o som", _PLAY),
+    ("pode voltar a tocar", _PLAY),
+    ("vou sair da mesa", _LOCK),
+    ("protege o computador", _LOCK),
+    ("conecta na internet", _WIFI_ON),
+    ("desconecta da internet", _WIFI_OFF),
+    ("ta muito escuro", _BRIGHTNESS_UP),
+    ("a tela ta muito clara", _BRIGHTNESS_DOWN),
+)
+
+
+class SemanticRouter:
+    """Classifica transcricoes pela similaridade com frases de exemplo."""
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        exemplars_path: Path | None = None,
+        threshold: float = 0.85,
+        margin: float = 0.05,
+        max_learned: int = 500,
+        learning: bool = True,
+    ) -> None:
+        """Inicializa o roteador (os exemplos sao embutidos no primeiro uso).
+
+        Args:
+            embedding_model: Modelo de embedding da Knowledge Base.
+            exemplars_path: Arquivo JSON com exemplos extras e aprendidos
+                ([{"text": ..., "intent": {...}}]). Recarregado quando o
+                arquivo muda. Se None, usa apenas DEFAULT_EXEMPLARS.
+            threshold: Similaridade minima do melhor exemplo.
+            margin: Diferenca minima entre a melhor e a segunda melhor
+                intencao; abaixo dela a frase e ambigua e vai para o Brain.
+            max_learned: Limite de exemplos no arquivo (os mais antigos
+                saem primeiro).
+            learning: Se False, learn() nao adiciona exemplos.
+        """
+        self.embedding_model = embedding_model
+        self.exemplars_path = exemplars_path
+        self.threshold = threshold
+        self.margin = margin
+        self.max_learned = max_learned
+        self.learning = learning
+
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._loaded = False
+        self._file_exemplars: list[dict[str, Any]] = []
+        # Exemplos embutidos: textos, intencoes distintas, indice da intencao
+        # de cada linha e matriz normalizada (linhas = exemplos)
+        self._texts: list[str] = []
+        self._intents: list[dict[str, Any]] = []
+        self._labels = np.zeros(0, dtype=np.intp)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Numero de exemplos embutidos (zero antes do primeiro uso)."""
+        return len(self._texts)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fracao das consultas resolvidas por similaridade."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reload(self) -> None:
+        """Relê o arquivo de exemplos e reconstroi a matriz."""
+        with self._lock:
+            self._mtime = self._stat()
+            self._file_exemplars = self._read_file()
+            pairs = [(text, intent) for text, intent in DEFAULT_EXEMPLARS]
+            pairs += [(e["text"], e["intent"]) for e in self._file_exemplars]
+            self._rebuild(pairs)
+            self._loaded = True
+        logger.info("Roteador semantico: %d exemplos", len(self._texts))
+
+    def route(self, text: str) -> Intent | None:
+        """Tenta resolver a transcricao pelo exemplo mais proximo.
+
+        Args:
+            text: Transcricao do usuario.
+
+        Returns:
+            Intent da intencao mais proxima se a similaridade passar do
+            limiar com margem sobre a segunda intencao; None caso contrario.
+        """
+        start = time.perf_counter()
+        metrics = get_metrics()
+        normalized = normalize_transcript(text)
+        if not normalized or _DIGITS_RE.search(normalized):
+            metrics.increment("router.semantic.skipped")
+            return None
+
+        self._ensure_loaded()
+        if not self._texts:
+            metrics.increment("router.semantic.skipped")
+            return None
+
+        query = _normalize_rows(np.asarray(self.embedding_model.encode([normalized])))
+        with self._lock:
+            similarities = self._matrix @ query[0]
+            # Melhor similaridade por intencao
+            scores = np.full(len(self._intents), -np.inf, dtype=np.float32)
+            np.maximum.at(scores, self._labels, similarities)
+            intents = self._intents
+
+        order = np.argsort(-scores)
+        best = float(scores[order[0]])
+        second = float(scores[order[1]]) if len(order) > 1 else -1.0
+
+        metrics.observe("router.semantic", time.perf_counter() - start)
+        if best < self.threshold or best - second < self.margin:
+            self.misses += 1
+            metrics.increment("router.semantic.misses")
+            if best >= self.threshold:
+                metrics.increment("router.semantic.ambiguous")
+            logger.debug(
+                "Roteador semantico: '%s' sem decisao (%.3f, margem %.3f)",
+                normalized,
+                best,
+                best - second,
+            )
+            return None
+
+        self.hits += 1
+        metrics.increment("router.semantic.hits")
+        data = intents[order[0]]
+        logger.debug("Roteador semantico: '%s' -> %s (%.3f)", normalized, data, best)
+        return make_intent(data["action"], data["target"], data.get("params"))
+
+    def learn(self, text: str, intent: dict[str, Any]) -> bool:
+        """Adiciona um comando confirmado como exemplo.
+
+        O exemplo entra na matriz em memoria e e persistido no arquivo de
+        exemplos (se configurado). So sao aprendidas intencoes com alvo e
+        parametros de conjuntos fechados do schema da acao: um alvo livre
+        ("abre o visual studio code" -> open_app) capturaria pedidos por
+        outros apps parecidos.
+
+        Args:
+            text: Transcricao original.
+            intent: Intencao executada ({"action", "target", "params"}).
+
+        Returns:
+            True se o exemplo foi adicionado.
+        """
+        normalized = normalize_transcript(text)
+        data = _canonical_intent(intent)
+        if (
+            not self.learning
+            or not normalized
+            or data is None
+            or not _closed_set(data)
+            or _DIGITS_RE.search(normalized)
+        ):
+            return False
+
+        self._ensure_loaded()
+        with self._lock:
+            if normalized in self._texts:
+                return False
+            vector = _normalize_rows(
+                np.asarray(self.embedding_model.encode([normalized]))
+            )
+            self._append(normalized, data, vector)
+            self._file_exemplars.append({"text": normalized, "intent": data})
+            self._file_exemplars = self._file_exemplars[-self.max_learned :]
+            self._write_file()
+
+        get_metrics().increment("router.semantic.learned")
+        logger.info("Roteador semantico aprendeu: '%s' -> %s", normalized, data)
+        return True
+
+    def _rebuild(self, pairs: list[tuple[str, dict[str, Any]]]) -> None:
+        """Embute todos os exemplos em um unico encode."""
+        self._texts, self._intents = [], []
+        keys: dict[str, int] = {}
+        labels: list[int] = []
+        for text, intent in pairs:
+            normalized = normalize_transcript(text)
+            data = _canonical_intent(intent)
+            if not normalized or data is None or normalized in self._texts:
+                continue
+            key = json.dumps(data, sort_keys=True)
+            if key not in keys:
+                keys[key] = len(self._intents)
+                self._intents.append(data)
+            self._texts.append(normalized)
+            labels.append(keys[key])
+
+        self._labels = np.asarray(labels, dtype=np.intp)
+        if self._texts:
+            vectors = np.asarray(self.embedding_model.encode(self._texts))
+            self._matrix = _normalize_rows(vectors)
+        else:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def _append(self, text: str, data: dict[str, Any], vector: np.ndarray) -> None:
+        """Adiciona um exemplo ja embutido sem reconstruir a matriz."""
+        key = json.dumps(data, sort_keys=True)
+        keys = [json.dumps(i, sort_keys=True) for i in self._intents]
+        if key in keys:
+            label = keys.index(key)
+        else:
+            label = len(self._intents)
+            self._intents = [*self._intents, data]
+
+        self._texts = [*self._texts, text]
+        self._labels = np.append(self._labels, label)
+        self._matrix = (
+            np.vstack([self._matrix, vector]) if self._matrix.size else vector
+        )
+
+    def _ensure_loaded(self) -> None:
+        """Embute os exemplos na primeira chamada e recarrega se o arquivo mudou."""
+        if not self._loaded:
+            self.reload()
+        elif self.exemplars_path is not None and self._stat() != self._mtime:
+            logger.info("Arquivo de exemplos alterado, recarregando")
+            self.reload()
+
+    def _stat(self) -> float | None:
+        """mtime do arquivo de exemplos (None se nao existir)."""
+        if self.exemplars_path is None:
+            return None
+        try:
+            return self.exemplars_path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _read_file(self) -> list[dict[str, Any]]:
+        """Le os exemplos do arquivo, ignorando entradas invalidas."""
+        if self.exemplars_path is None or not self.exemplars_path.exists():
+            return []
+        try:
+            entries = json.loads(self.exemplars_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(
+                "Arquivo de exemplos invalido (%s): %s", self.exemplars_path, e
+            )
+            return []
+        if not isinstance(entries, list):
+            return []
+        return [
+            e
+            for e in entries
+            if isinstance(e, dict)
+            and isinstance(e.get("text"), str)
+            and isinstance(e.get("intent"), dict)
+        ]
+
+    def _write_file(self) -> None:
+        """Grava os exemplos de forma atomica e registra o novo mtime."""
+        if self.exemplars_path is None:
+            return
+        self.exemplars_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.exemplars_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(self._file_exemplars, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+        tmp_path.replace(self.exemplars_path)
+        # A escrita propria nao deve disparar um reload
+        self._mtime = self._stat()
+
+
+def _canonical_intent(intent: dict[str, Any]) -> dict[str, Any] | None:
+    """Reduz a intencao as chaves action/target/params (None se invalida)."""
+    action = intent.get("action")
+    target = intent.get("target")
+    if not isinstance(action, str) or not isinstance(target, str):
+        return None
+    data: dict[str, Any] = {"action": action, "target": target}
+    if intent.get("params"):
+        data["params"] = intent["params"]
+    return data
+
+
+def _closed_set(intent: dict[str, Any]) -> bool:
+    """Se alvo e parametros vem de listas fechadas do schema da acao."""
+    for schema in get_action_schemas():
+        if schema.action.value != intent["action"]:
+            continue
+        for spec in schema.targets:
+            if intent["target"] not in spec.names:
+                continue
+            choices = {param.name: param.choices for param in spec.params}
+            return all(
+                value in choices.get(name, ())
+                for name, value in intent.get("params", {}).items()
+            )
+    return False
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Normaliza as linhas (similaridade = produto interno)."""
+    vectors = np.atleast_2d(vectors).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
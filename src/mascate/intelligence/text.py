@@ -0,0 +1,134 @@
+"""Normalizacao de transcricoes.
+
+Forma canonica do texto vindo do STT, compartilhada por roteadores e caches:
+minusculas, sem acentos, sem pontuacao e sem palavras de preenchimento, com
+numeros por extenso convertidos em digitos.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Palavras de preenchimento removidas (inclui o nome do assistente)
+FILLERS = (
+    "por favor",
+    "por gentileza",
+    "mascate",
+    "hey",
+    "ei",
+    "oi",
+    "hmm",
+    "hum",
+    "tipo",
+    "entao",
+    "ai",
+)
+
+NUMBER_WORDS = {
+    "zero": 0,
+    "um": 1,
+    "uma": 1,
+    "dois": 2,
+    "duas": 2,
+    "tres": 3,
+    "quatro": 4,
+    "cinco": 5,
+    "seis": 6,
+    "sete": 7,
+    "oito": 8,
+    "nove": 9,
+    "dez": 10,
+    "onze": 11,
+    "doze": 12,
+    "treze": 13,
+    "quatorze": 14,
+    "catorze": 14,
+    "quinze": 15,
+    "dezesseis": 16,
+    "dezessete": 17,
+    "dezoito": 18,
+    "dezenove": 19,
+    "vinte": 20,
+    "trinta": 30,
+    "quarenta": 40,
+    "cinquenta": 50,
+    "sessenta": 60,
+    "setenta": 70,
+    "oitenta": 80,
+    "noventa": 90,
+    "cem": 100,
+    "cento": 100,
+}
+
+# So palavras inteiras (entre espacos, com pontuacao final): 'ai' em
+# 'openai.ai' ou 'x.ai' faz parte do dominio
+_FILLERS_RE = re.compile(r"(?<!\S)(?:" + "|".join(FILLERS) + r")(?=[.:\-]*(?:\s|$))")
+# Mantem caracteres usados em URLs e caminhos (., /, :, -, _, ~)
+_STRIP_RE = re.compile(r"[^a-z0-9./:_~\- ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def strip_accents(text: str) -> str:
+    """Remove acentos (cafe == café)."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_transcript(text: str) -> str:
+    """Converte uma transcricao para a forma canonica.
+
+    Args:
+        text: Texto do STT (ex: 'Mascate, aumenta o volume em trinta %!').
+
+    Returns:
+        Texto normalizado (ex: 'aumenta o volume em 30 por cento').
+    """
+    text = strip_accents(text.lower()).replace("%", " por cento ")
+    text = _STRIP_RE.sub(" ", text)
+    text = _FILLERS_RE.sub(" ", text)
+    # Pontuacao final de frase ('firefox.') sem quebrar 'github.com'
+    words = [w.strip(".:-") for w in text.split()]
+    return _SPACES_RE.sub(" ", " ".join(_numbers_to_digits(w for w in words if w)))
+
+
+def _numbers_to_digits(words: Iterable[str]) -> list[str]:
+    """Converte numeros por extenso ('vinte e cinco') em digitos ('25')."""
+    result: list[str] = []
+    pending: int | None = None  # Numero em construcao
+    joiner = False  # Ultima palavra foi 'e' apos um numero
+
+    for word in words:
+        value = NUMBER_WORDS.get(word)
+        if value is not None and pending is not None and joiner and value < pending:
+            pending += value
+            joiner = False
+            continue
+        if pending is not None and word == "e" and not joiner:
+            joiner = True
+            continue
+
+        if pending is not None:
+            result.append(str(pending))
+            if joiner:
+                result.append("e")
+            pending, joiner = None, False
+
+        # 'um'/'uma' isolados sao artigos ('abre uma aba') e 'por cento' nao
+        # e numero
+        is_article = word in ("um", "uma")
+        is_percent = word == "cento" and result[-1:] == ["por"]
+        if value is not None and not is_article and not is_percent:
+            pending = value
+        else:
+            result.append(word)
+
+    if pending is not None:
+        result.append(str(pending))
+        if joiner:
+            result.append("e")
+    return result
@@ -24,10 +24,16 @@ from mascate.audio.wake.detector import WakeWordDetector
 from mascate.core.config import Config
 from mascate.core.orchestrator import Orchestrator
 from mascate.executor.executor import Executor
+from mascate.executor.registry import get_action_schemas
 from mascate.intelligence.brain import Brain
+from mascate.intelligence.intent_cache import IntentCache
 from mascate.intelligence.llm.granite import GraniteLLM
+from mascate.intelligence.rag.compression import ContextCompressor
+from mascate.intelligence.rag.context import ContextAssembler
 from mascate.intelligence.rag.knowledge import KnowledgeBase
 from mascate.intelligence.rag.retriever import RAGRetriever
+from mascate.intelligence.router import FastPathRouter
+from mascate.intelligence.semantic_router import SemanticRouter
 from mascate.interface.hud import HUD
 
 # Configuração de Logging
@@ -239,12 +245,20 @@ def run(debug: bool) -> None:
             vad_processor=vad_processor,
             stt=stt,
             hotkey_listener=hotkey_listener,
+            partial_interval_s=config.audio.partial_transcript_interval_s,
         )
 
         # 2. Inteligência
         logger.info("  Inicializando RAG...")
+        # Com lazy_load, modelo e banco vetorial so abrem no primeiro uso
         kb = KnowledgeBase(config)
-        retriever = RAGRetriever(kb)
+        retriever = RAGRetriever(
+            kb,
+            hybrid=config.rag.hybrid,
+            rrf_k=config.rag.rrf_k,
+            sparse_threshold=config.rag.sparse_threshold,
+            cache_size=config.rag.retrieval_cache_size,
+        )
 
         logger.info("  Inicializando LLM...")
         llm_model = (
@@ -255,9 +269,68 @@ def run(debug: bool) -> None:
             model_path=llm_model,
             n_gpu_layers=config.llm.n_gpu_layers,
             n_ctx=config.llm.n_ctx,
+            cache_dir=config.cache_dir,
+            prompt_cache=config.llm.prompt_cache,
+            prefill=config.llm.prefill,
+            speculative_draft_tokens=config.llm.speculative_draft_tokens,
+        )
+        # Contagem de tokens por chunk gravada na ingestao
+        kb.token_counter = llm.count_tokens
+
+        # Acoes sem params podem ser despachadas assim que o target fecha
+        early_dispatch_actions = None
+        if config.llm.early_dispatch:
+            early_dispatch_actions = [
+                schema.action.value
+                for schema in get_action_schemas()
+                if not schema.accepts_params
+            ]
+
+        brain = Brain(
+            llm,
+            retriever,
+            early_dispatch_actions=early_dispatch_actions,
+            grammar_name="command_compact" if config.llm.compact_schema else "command",
+            top_k=config.rag.top_k,
+            context_assembler=ContextAssembler(
+                llm.count_tokens,
+                max_tokens=config.rag.context_tokens,
+                score_margin=config.rag.score_margin,
+            ),
+            context_compressor=(
+                ContextCompressor(
+                    kb.embedding_model,
+                    llm.count_tokens,
+                    max_tokens=config.rag.compression_tokens,
+                )
+                if config.rag.compression
+                else None
+            ),
+            retrieval_deadline_s=config.rag.retrieval_deadline_s or None,
+            generation_deadline_s=config.llm.generation_deadline_s or None,
+            parallel_prefill=config.llm.parallel_prefill,
+            router=FastPathRouter() if config.router.fast_path else None,
+            semantic_router=(
+                SemanticRouter(
+                    kb.embedding_model,
+                    exemplars_path=config.data_dir / "router_exemplars.json",
+                    threshold=config.router.semantic_threshold,
+                    margin=config.router.semantic_margin,
+                    learning=config.router.semantic_learn,
+                )
+                if config.router.semantic
+                else None
+            ),
+            intent_cache=(
+                IntentCache(
+                    config.cache_dir / "intent_cache.json",
+                    max_entries=config.router.intent_cache_size,
+                    ttl_s=config.router.intent_cache_ttl_s,
+                )
+                if config.router.intent_cache
+                else None
+            ),
         )
-
-        brain = Brain(llm, retriever)
 
         # 3. Execução
         logger.info("  Inicializando executor...")
@@ -279,7 +352,14 @@ def run(debug: bool) -> None:
 
         # 5. Orquestração
         logger.info("  Iniciando orquestrador...")
-        orchestrator = Orchestrator(audio_pipeline, brain, executor, hud, tts=tts)
+        orchestrator = Orchestrator(
+            audio_pipeline,
+            brain,
+            executor,
+            hud,
+            tts=tts,
+            on_ready=kb.preload if config.rag.preload else None,
+        )
 
         # Mostra informacao de ativacao
         if config.audio.hotkey_enabled:
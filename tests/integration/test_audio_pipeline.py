@@ -74,3 +74,23 @@ def test_pipeline_handle_end_of_speech():
     assert not pipeline._is_listening
     assert result == ["teste"]
     pipeline.vad_processor.confirm_end.assert_called_once()
+
+
+def test_pipeline_partial_transcription():
+    """Durante a fala, transcrições parciais saem em outra thread."""
+    pipeline = AudioPipeline(
+        MagicMock(), MagicMock(), MagicMock(), MagicMock(), partial_interval_s=0.5
+    )
+    pipeline.stt.transcribe.return_value = "abre o"
+    partials = []
+    pipeline.on_partial_transcription(partials.append)
+    pipeline._audio_buffer = [np.zeros(100)]
+
+    pipeline._last_partial = 0.0
+    pipeline._maybe_partial_transcription()
+    pipeline._partial_thread.join(timeout=2)
+    # Intervalo ainda não passou: nenhuma nova parcial
+    pipeline._maybe_partial_transcription()
+
+    assert partials == ["abre o"]
+    pipeline.stt.transcribe.assert_called_once()
@@ -1,9 +1,15 @@
 """Testes de integração para o Cérebro (Brain)."""
 
-from unittest.mock import MagicMock
+import threading
+from unittest.mock import MagicMock, call
 
-from mascate.intelligence.brain import Brain, Intent
+import pytest
+
+from mascate.core.metrics import get_metrics, reset_metrics
+from mascate.intelligence.brain import STILL_WORKING_REPLY, Brain, Intent
+from mascate.intelligence.intent_cache import IntentCache
 from mascate.intelligence.rag.retriever import SearchResult
+from mascate.intelligence.router import FastPathRouter
 
 
 def test_brain_process_flow():
@@ -71,3 +77,358 @@ def test_brain_missing_fields():
     intent = brain.process("abra")
 
     assert intent is None
+
+
+def test_brain_compact_keys():
+    """Testa conversão das chaves curtas do formato compacto."""
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.format_context.return_value = ""
+
+    llm = MagicMock()
+    llm.generate.return_value = '{"a":"file_op","t":"move","p":{"destination":"/tmp"}}'
+
+    brain = Brain(llm, retriever, grammar_name="command_compact")
+    intent = brain.process("mova o arquivo")
+
+    assert intent == Intent(
+        action="file_op",
+        target="move",
+        params={"destination": "/tmp"},
+        raw_json='{"action": "file_op", "target": "move", '
+        '"params": {"destination": "/tmp"}}',
+    )
+    assert llm.generate.call_args[1]["grammar_name"] == "command_compact"
+
+
+def _streaming_llm(fragments):
+    """Cria LLM mock cujo generate(stream=True) devolve um gerador rastreável."""
+    state = {"consumed": 0, "closed": False}
+
+    def stream():
+        try:
+            for fragment in fragments:
+                state["consumed"] += 1
+                yield fragment
+        finally:
+            state["closed"] = True
+
+    llm = MagicMock()
+    llm.generate.return_value = stream()
+    return llm, state
+
+
+def test_brain_early_dispatch_without_params():
+    """Testa despacho antecipado de ação sem parâmetros."""
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.format_context.return_value = ""
+
+    fragments = ['{"action": ', '"open_app"', ', "target": ', '"firefox"', "}", "\n"]
+    llm, state = _streaming_llm(fragments)
+
+    brain = Brain(llm, retriever, early_dispatch_actions=["open_app"])
+    intent = brain.process("abra o firefox")
+
+    assert intent.action == "open_app"
+    assert intent.target == "firefox"
+    assert intent.params == {}
+    # Parou logo após o target, sem consumir a chave final
+    assert state["consumed"] == 4
+    assert state["closed"] is True
+    assert llm.generate.call_args[1]["stream"] is True
+
+
+def test_brain_streaming_stops_on_final_brace():
+    """Testa que ações com params param na chave final balanceada."""
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.format_context.return_value = ""
+
+    fragments = [
+        '{"action": "system_op", "target": "volume", ',
+        '"params": {"action": "up"',
+        "}}",
+        "<|endoftext|>",
+    ]
+    llm, state = _streaming_llm(fragments)
+
+    brain = Brain(llm, retriever, early_dispatch_actions=["open_app"])
+    intent = brain.process("aumenta o volume")
+
+    assert intent.action == "system_op"
+    assert intent.params == {"action": "up"}
+    assert state["consumed"] == 3
+    assert state["closed"] is True
+
+
+def test_brain_generation_deadline_uses_partial_intent():
+    """Prazo estourado com action e target completos gera intenção parcial."""
+    reset_metrics()
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.format_context.return_value = ""
+
+    llm = MagicMock()
+    llm.generate.return_value = (
+        '{"action": "system_op", "target": "volume", "params": {"val'
+    )
+
+    brain = Brain(llm, retriever, generation_deadline_s=0.0)
+    intent = brain.process("aumenta o volume")
+
+    assert intent.action == "system_op"
+    assert intent.target == "volume"
+    assert intent.params == {}
+    assert llm.generate.call_args[1]["deadline"] is not None
+    assert get_metrics().get("brain.deadline.generation") == 1
+    assert get_metrics().get("brain.fallback.partial") == 1
+
+
+def test_brain_generation_deadline_still_working():
+    """Sem campos completos, responde que ainda está processando."""
+    reset_metrics()
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.format_context.return_value = ""
+
+    llm, _ = _streaming_llm(['{"action": ', '"open_'])
+
+    brain = Brain(
+        llm, retriever, early_dispatch_actions=["open_app"], generation_deadline_s=0.0
+    )
+    intent = brain.process("abra o firefox")
+
+    assert intent.action == "reply"
+    assert intent.target == STILL_WORKING_REPLY
+    assert get_metrics().get("brain.fallback.still_working") == 1
+
+
+def test_brain_retrieval_deadline():
+    """Busca que excede o prazo é descartada e a geração segue sem contexto."""
+    reset_metrics()
+    release = threading.Event()
+    retriever = MagicMock()
+    retriever.search.side_effect = lambda *_args, **_kwargs: release.wait(5) and []
+    retriever.format_context.return_value = "sem contexto"
+
+    llm = MagicMock()
+    llm.generate.return_value = '{"action": "open_app", "target": "firefox"}'
+
+    brain = Brain(llm, retriever, retrieval_deadline_s=0.01)
+    try:
+        intent = brain.process("abra o firefox")
+    finally:
+        release.set()
+
+    assert intent.target == "firefox"
+    retriever.format_context.assert_called_once_with([])
+    assert get_metrics().get("brain.deadline.retrieval") == 1
+
+
+def test_brain_cancel_during_generation():
+    """Cancelar durante a geração encerra o stream e retorna None."""
+    reset_metrics()
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.format_context.return_value = ""
+
+    brain = None
+
+    def stream():
+        yield '{"action": '
+        brain.cancel()
+        yield '"open_app", "target": "firefox"}'
+
+    llm = MagicMock()
+    llm.generate.return_value = stream()
+
+    brain = Brain(llm, retriever, early_dispatch_actions=["open_app"])
+    intent = brain.process("abra o firefox")
+
+    assert intent is None
+    assert llm.generate.call_args[1]["cancel_token"].cancelled
+    assert get_metrics().get("brain.cancelled") == 1
+
+
+def test_brain_fast_path_skips_rag_and_llm():
+    """Frases reconhecidas pelo router não passam pelo RAG nem pelo LLM."""
+    retriever = MagicMock()
+    llm = MagicMock()
+
+    brain = Brain(llm, retriever, router=FastPathRouter())
+    intent = brain.process("próxima música")
+
+    assert intent.action == "media_control"
+    assert intent.target == "next"
+    retriever.search.assert_not_called()
+    llm.generate.assert_not_called()
+
+    llm.generate.return_value = '{"action": "reply", "target": "Oi!"}'
+    retriever.search.return_value = []
+    assert brain.process("me conta uma piada").action == "reply"
+    llm.generate.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "qual a população do brasil",
+        "o computador está pausado",
+        "não abre o firefox",
+        "explica como desligar o wifi com nmcli",
+    ],
+)
+def test_brain_generation_deadline_ignores_rules_inside_phrase(text):
+    """Com prazo estourado, comandos citados na frase não são executados."""
+    reset_metrics()
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    llm = MagicMock()
+    llm.generate.return_value = '{"action": '
+
+    brain = Brain(llm, retriever, generation_deadline_s=0.0, router=FastPathRouter())
+    intent = brain.process(text)
+
+    assert intent.action == "reply"
+    assert intent.target == STILL_WORKING_REPLY
+    assert get_metrics().get("brain.fallback.still_working") == 1
+
+
+def test_brain_semantic_router_skips_llm():
+    """Paráfrases resolvidas pelo roteador semântico não chamam o LLM."""
+    retriever = MagicMock()
+    llm = MagicMock()
+    semantic_router = MagicMock()
+    semantic_router.route.return_value = Intent(
+        action="media_control", target="next", params={}, raw_json="{}"
+    )
+
+    brain = Brain(llm, retriever, semantic_router=semantic_router)
+    intent = brain.process("passa essa aí")
+
+    assert intent.target == "next"
+    retriever.search.assert_not_called()
+    llm.generate.assert_not_called()
+
+    brain.learn("passa essa aí", {"action": "media_control", "target": "next"})
+    semantic_router.learn.assert_called_once_with(
+        "passa essa aí", {"action": "media_control", "target": "next"}
+    )
+
+
+def test_brain_intent_cache():
+    """Comandos repetidos saem do cache; versões novas invalidam a entrada."""
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.kb.version = 1
+    llm = MagicMock()
+    llm.grammar_cache.version.return_value = 7
+    llm.generate.return_value = '{"action": "open_app", "target": "firefox"}'
+
+    brain = Brain(llm, retriever, intent_cache=IntentCache())
+    first = brain.process("Abre o navegador")
+    second = brain.process("abre o navegador")
+
+    assert second == first
+    llm.generate.assert_called_once()
+    llm.grammar_cache.version.assert_called_with("command")
+
+    # Reingestão da base muda a chave
+    retriever.kb.version = 2
+    brain.process("abre o navegador")
+    assert llm.generate.call_count == 2
+
+
+def test_brain_intent_cache_skips_replies_and_fallbacks():
+    """Respostas 'reply' e degradadas por prazo não vão para o cache."""
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    retriever.kb.version = 1
+    llm = MagicMock()
+    llm.grammar_cache.version.return_value = 1
+    cache = IntentCache()
+
+    llm.generate.return_value = '{"action": "reply", "target": "Oi!"}'
+    Brain(llm, retriever, intent_cache=cache).process("oi")
+
+    llm.generate.return_value = (
+        '{"action": "system_op", "target": "volume", "params": {"act'
+    )
+    brain = Brain(llm, retriever, generation_deadline_s=0.0, intent_cache=cache)
+    # Intenção parcial (sem params) não pode ser reaproveitada
+    assert brain.process("coloca o volume no talo").target == "volume"
+
+    assert len(cache) == 0
+
+
+def test_brain_parallel_prefill():
+    """O pedido é avaliado no LLM enquanto a busca roda em outra thread."""
+    primed = threading.Event()
+
+    def _search(*_args, **_kwargs):
+        # A busca só termina depois que o LLM avaliou o pedido
+        assert primed.wait(timeout=2)
+        return []
+
+    retriever = MagicMock()
+    retriever.search.side_effect = _search
+    llm = MagicMock()
+    llm.prime.side_effect = lambda _user_input: primed.set()
+    llm.generate.return_value = '{"action": "open_app", "target": "firefox"}'
+
+    brain = Brain(llm, retriever, parallel_prefill=True)
+    intent = brain.process("abre o firefox")
+
+    assert intent.target == "firefox"
+    llm.prime.assert_called_once_with("abre o firefox")
+    kwargs = llm.generate.call_args.kwargs
+    assert kwargs["user_first"] is True
+    # Busca vazia: segue sem contexto, sem reavaliar o início do prompt
+    assert kwargs["context"] == ""
+
+
+def test_brain_prefetch_reuses_partial_search():
+    """A busca da transcrição parcial é reaproveitada se a final for igual."""
+    reset_metrics()
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    llm = MagicMock()
+    llm.generate.return_value = '{"action": "open_app", "target": "firefox"}'
+
+    brain = Brain(llm, retriever)
+    brain.prefetch("Abre o Firefox")
+    brain.process("abre o firefox.")
+
+    retriever.search.assert_called_once_with("Abre o Firefox", top_k=3)
+    assert get_metrics().get("brain.prefetch.hits") == 1
+
+    # Parcial diferente da final: busca de novo
+    brain.prefetch("abre o")
+    brain.process("abre o firefox")
+    assert call("abre o firefox", top_k=3) in retriever.search.call_args_list
+    assert get_metrics().get("brain.prefetch.misses") == 1
+
+
+def test_brain_warm_up():
+    """A ativação aquece LLM e embedding em segundo plano."""
+    warmed = threading.Event()
+    retriever = MagicMock()
+    retriever.search.return_value = []
+    llm = MagicMock()
+    llm.warm_up.side_effect = lambda: warmed.wait(timeout=2)
+    llm.generate.side_effect = lambda **_kwargs: (
+        '{"action": "reply", "target": "ok"}'
+        if warmed.is_set()
+        else '{"action": "reply", "target": "frio"}'
+    )
+
+    brain = Brain(llm, retriever)
+    brain.warm_up()
+    brain.warm_up()  # Aquecimento em andamento não é repetido
+    threading.Timer(0.05, warmed.set).start()
+
+    # A geração espera o aquecimento terminar
+    assert brain.process("oi").target == "ok"
+    llm.warm_up.assert_called_once()
+    retriever.kb.embedding_model.encode.assert_called()
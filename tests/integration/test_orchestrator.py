@@ -1,5 +1,6 @@
 """Testes de integração para o Orquestrador."""
 
+import threading
 from unittest.mock import MagicMock
 
 import pytest
@@ -31,6 +32,56 @@ def test_orchestrator_wake_word_transition(mocks):
 
     assert orc.state == SystemState.LISTENING
     mocks["hud"].update_state.assert_called_with("LISTENING")
+    # Nova ativação cancela a geração anterior e aquece o Brain
+    mocks["brain"].cancel.assert_called_once()
+    mocks["brain"].warm_up.assert_called_once()
+
+
+def test_orchestrator_partial_transcription_prefetch(mocks):
+    """Transcrições parciais adiantam a busca no RAG."""
+    orc = Orchestrator(mocks["audio"], mocks["brain"], mocks["executor"], mocks["hud"])
+
+    orc._handle_partial_transcription("abre o")
+
+    mocks["brain"].prefetch.assert_called_once_with("abre o")
+    mocks["brain"].process.assert_not_called()
+
+
+def test_orchestrator_barge_in_cancel(mocks):
+    """Verifica que 'cancela' interrompe o comando sem passar pelo Brain."""
+    orc = Orchestrator(mocks["audio"], mocks["brain"], mocks["executor"], mocks["hud"])
+
+    orc._handle_transcription("Cancela!")
+
+    mocks["brain"].cancel.assert_called_once()
+    mocks["brain"].process.assert_not_called()
+    assert orc.state == SystemState.IDLE
+
+
+def test_orchestrator_cancel_during_processing(mocks):
+    """'Cancela' é ouvido e interrompe o Brain enquanto ele ainda processa."""
+    orc = Orchestrator(mocks["audio"], mocks["brain"], mocks["executor"], mocks["hud"])
+    started = threading.Event()
+    released = threading.Event()
+
+    def process(_text):
+        started.set()
+        released.wait(timeout=5)  # Geração só para quando cancelada
+        return None
+
+    mocks["brain"].process.side_effect = process
+    mocks["brain"].cancel.side_effect = released.set
+
+    orc._handle_transcription("escreve um poema bem longo")
+    assert started.wait(timeout=5)
+    # A thread de áudio está livre para entregar a próxima transcrição
+    orc._handle_transcription("cancela")
+    orc.wait_command(timeout=5)
+
+    assert released.is_set()
+    mocks["executor"].execute_intent.assert_not_called()
+    assert all(c.args[-1] != "ERROR" for c in mocks["hud"].add_log.call_args_list)
+    assert orc.state == SystemState.IDLE
 
 
 def test_orchestrator_full_cycle(mocks):
@@ -46,6 +97,7 @@ def test_orchestrator_full_cycle(mocks):
 
     # Simula chegada de transcrição
     orc._handle_transcription("abrir firefox")
+    orc.wait_command(timeout=5)
 
     # Verifica fluxo
     mocks["brain"].process.assert_called_once_with("abrir firefox")
@@ -53,6 +105,26 @@ def test_orchestrator_full_cycle(mocks):
     mocks["executor"].execute_intent.assert_called_once_with({"action": "test"})
     mocks["hud"].set_interaction.assert_called_with("abrir firefox", "Sucesso")
     assert orc.state == SystemState.IDLE
+    # Feedback sem sucesso do handler não vira exemplo
+    mocks["brain"].learn.assert_not_called()
+
+
+def test_orchestrator_learns_successful_command(mocks):
+    """Comando executado com sucesso é repassado ao Brain como exemplo."""
+    orc = Orchestrator(mocks["audio"], mocks["brain"], mocks["executor"], mocks["hud"])
+    mock_intent = MagicMock()
+    mock_intent.raw_json = '{"action": "open_app", "target": "firefox"}'
+    mocks["brain"].process.return_value = mock_intent
+    mocks[
+        "executor"
+    ].execute_intent.return_value = "Pronto! Executei open_app para firefox."
+
+    orc._handle_transcription("quero navegar na internet")
+    orc.wait_command(timeout=5)
+
+    mocks["brain"].learn.assert_called_once_with(
+        "quero navegar na internet", {"action": "open_app", "target": "firefox"}
+    )
 
 
 def test_orchestrator_stop(mocks):
@@ -64,5 +136,6 @@ def test_orchestrator_stop(mocks):
 
     assert not orc._running
     assert orc.state == SystemState.SHUTTING_DOWN
+    mocks["brain"].cancel.assert_called_once()
     mocks["audio"].stop.assert_called_once()
     mocks["hud"].stop.assert_called_once()
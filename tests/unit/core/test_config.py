@@ -14,6 +14,7 @@ from mascate.core.config import (
     AudioConfig,
     Config,
     LLMConfig,
+    RAGConfig,
     SecurityConfig,
     _expand_path,
     get_config,
@@ -97,6 +98,19 @@ class TestLLMConfig:
         assert config.max_tokens == 512
 
 
+class TestRAGConfig:
+    """Tests for RAGConfig dataclass."""
+
+    def test_default_values(self) -> None:
+        """Test default RAG config values."""
+        config = RAGConfig()
+
+        assert config.collection_name == "mascate_knowledge"
+        assert config.top_k == 3
+        assert config.context_tokens == 384
+        assert config.score_margin == 0.2
+
+
 class TestSecurityConfig:
     """Tests for SecurityConfig dataclass."""
 
@@ -226,6 +240,14 @@ model = "test-model.gguf"
 n_gpu_layers = 16
 temperature = 0.5
 
+[rag]
+top_k = 5
+context_tokens = 256
+
+[router]
+semantic = true
+semantic_threshold = 0.9
+
 [security]
 require_confirmation = false
 
@@ -244,6 +266,13 @@ cache_dir = "/tmp/cache"
         assert config.llm.model_path == Path("test-model.gguf")
         assert config.llm.n_gpu_layers == 16
         assert config.llm.temperature == 0.5
+        assert config.rag.top_k == 5
+        assert config.rag.context_tokens == 256
+        assert config.rag.score_margin == 0.2
+        assert config.router.fast_path is True
+        assert config.router.semantic is True
+        assert config.router.semantic_threshold == 0.9
+        assert config.router.semantic_margin == 0.05
         assert config.security.require_confirmation is False
         assert config.models_dir == Path("/tmp/models")
         assert config.data_dir == Path("/tmp/data")
@@ -0,0 +1,60 @@
+"""Unit tests for mascate.core.metrics module."""
+
+from __future__ import annotations
+
+from mascate.core.metrics import Metrics, get_metrics, reset_metrics
+
+
+class TestMetrics:
+    """Tests for Metrics registry."""
+
+    def test_increment(self) -> None:
+        """Test counters start at zero and accumulate."""
+        metrics = Metrics()
+
+        assert metrics.get("hits") == 0.0
+        metrics.increment("hits")
+        metrics.increment("hits", 2.5)
+
+        assert metrics.get("hits") == 3.5
+
+    def test_observe(self) -> None:
+        """Test timing statistics."""
+        metrics = Metrics()
+        metrics.observe("compile", 0.1)
+        metrics.observe("compile", 0.3)
+
+        stats = metrics.timing("compile")
+        assert stats.count == 2
+        assert stats.max == 0.3
+        assert abs(stats.mean - 0.2) < 1e-9
+
+    def test_timer_context(self) -> None:
+        """Test timer context manager records one observation."""
+        metrics = Metrics()
+        with metrics.timer("block"):
+            pass
+
+        assert metrics.timing("block").count == 1
+
+    def test_snapshot_and_reset(self) -> None:
+        """Test flat snapshot and reset."""
+        metrics = Metrics()
+        metrics.increment("a")
+        metrics.observe("t", 0.5)
+
+        snapshot = metrics.snapshot()
+        assert snapshot["a"] == 1.0
+        assert snapshot["t.count"] == 1.0
+        assert snapshot["t.total_s"] == 0.5
+
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_global_singleton(self) -> None:
+        """Test get_metrics returns a shared instance."""
+        assert get_metrics() is get_metrics()
+
+        get_metrics().increment("global")
+        reset_metrics()
+        assert get_metrics().get("global") == 0.0
@@ -0,0 +1,98 @@
+"""Testes unitários para os schemas de ação e a gramática gerada."""
+
+import re
+
+from mascate.executor.models import ActionType
+from mascate.executor.registry import build_command_grammar, get_action_schemas
+from mascate.executor.schema import (
+    ActionSchema,
+    ParamSpec,
+    ParamType,
+    TargetSpec,
+    build_grammar,
+)
+from mascate.intelligence.llm.grammar import GrammarLoader
+
+
+def _defined_and_referenced(grammar: str) -> tuple[set[str], set[str]]:
+    """Extrai regras definidas e referenciadas (fora de literais e classes)."""
+    defined: set[str] = set()
+    referenced: set[str] = set()
+    for line in grammar.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, _, body = line.partition(" ::= ")
+        defined.add(name)
+        # Remove literais e classes de caracteres (com escapes)
+        body = re.sub(r'"(?:\\.|[^"\\])*"|\[(?:\\.|[^\]\\])*\]', "", body)
+        referenced.update(re.findall(r"[a-z][a-z0-9-]*", body))
+    return defined, referenced
+
+
+def test_every_action_has_schema():
+    """Verifica se todas as ações executáveis declaram schema."""
+    actions = {schema.action for schema in get_action_schemas()}
+    expected = set(ActionType) - {ActionType.UNKNOWN}
+    assert actions == expected
+
+
+def test_grammar_rules_are_defined():
+    """Verifica se toda regra referenciada na gramática está definida."""
+    defined, referenced = _defined_and_referenced(build_command_grammar())
+    assert "root" in defined
+    assert referenced <= defined
+
+
+def test_grammar_restricts_targets_and_params():
+    """Verifica alvos e parâmetros declarados pelos handlers."""
+    grammar = build_command_grammar()
+
+    assert '"\\"volume\\""' in grammar
+    assert '("\\"up\\"" | "\\"down\\"" | "\\"mute\\""' in grammar
+    assert '"\\"value\\": " number' in grammar
+    assert '"\\"proxima\\""' in grammar
+    # open_app não aceita params
+    open_app = next(
+        line for line in grammar.splitlines() if line.startswith("open-app ::=")
+    )
+    assert "params" not in open_app
+
+
+def test_command_grammar_file_in_sync():
+    """Verifica se command.gbnf foi regenerado após mudar os handlers."""
+    assert GrammarLoader().load("command") == build_command_grammar()
+    assert GrammarLoader().load("command_compact") == build_command_grammar(
+        compact=True
+    )
+
+
+def test_compact_grammar_uses_short_keys():
+    """Verifica chaves curtas e separadores sem espaço no formato compacto."""
+    grammar = build_command_grammar(compact=True)
+    defined, referenced = _defined_and_referenced(grammar)
+    assert referenced <= defined
+    assert '"{\\"a\\":"' in grammar
+    assert '"action"' not in grammar
+
+
+def test_params_required_and_optional():
+    """Verifica a geração de parâmetros obrigatórios e opcionais."""
+    schema = ActionSchema(
+        ActionType.SYSTEM_OP,
+        targets=(
+            TargetSpec(
+                names=("volume",),
+                params=(
+                    ParamSpec("action", choices=("up",), required=True),
+                    ParamSpec("value", type=ParamType.NUMBER),
+                ),
+            ),
+        ),
+    )
+    grammar = build_grammar([schema])
+    line = next(ln for ln in grammar.splitlines() if ln.startswith("system-op ::="))
+
+    # Parâmetro obrigatório: o objeto params não é opcional
+    assert line.endswith('(", " "\\"value\\": " number)? "}"')
+    assert schema.accepts_params
+    assert not ActionSchema(ActionType.OPEN_APP).accepts_params
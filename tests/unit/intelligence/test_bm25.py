@@ -0,0 +1,83 @@
+"""Testes unitários para o índice BM25."""
+
+from mascate.intelligence.rag.bm25 import BM25Index, tokenize
+
+
+def _index(path=None):
+    index = BM25Index(path)
+    index.add(
+        ["fx", "term", "vol"],
+        [
+            {"content": "Para abrir o navegador use o Firefox."},
+            {"content": "O gnome-terminal é o terminal padrão do GNOME."},
+            {"content": "Volume: use pactl para aumentar ou diminuir o áudio."},
+        ],
+    )
+    return index
+
+
+def test_tokenize_folds_accents_and_drops_stopwords():
+    """Acentos saem, stopwords somem e termos compostos casam inteiros e em partes."""
+    assert tokenize("O Áudio do gnome-terminal") == [
+        "audio",
+        "gnome-terminal",
+        "gnome",
+        "terminal",
+    ]
+
+
+def test_search_ranks_keyword_matches():
+    """A palavra exata leva o documento ao topo."""
+    hits = _index().search("abre o firefox", limit=2)
+
+    assert [h.id for h in hits] == ["fx"]
+    assert hits[0].payload["content"].startswith("Para abrir")
+
+
+def test_search_matches_without_accents():
+    """'audio' encontra 'áudio'."""
+    assert _index().search("audio")[0].id == "vol"
+
+
+def test_rarer_terms_weigh_more():
+    """Termo presente em um documento pesa mais que o comum a vários."""
+    index = _index()
+    index.add(["use"], [{"content": "use use use"}])
+
+    assert index.search("pactl use")[0].id == "vol"
+
+
+def test_remove_and_readd():
+    """Documentos removidos ou atualizados deixam de casar com o texto antigo."""
+    index = _index()
+    index.remove(["fx"])
+    index.add(["term"], [{"content": "konsole"}])
+
+    assert index.search("firefox") == []
+    assert index.search("gnome") == []
+    assert index.search("konsole")[0].id == "term"
+    assert len(index) == 2
+
+
+def test_persistence_roundtrip(tmp_path):
+    """O índice salvo é recarregado com as mesmas pontuações."""
+    path = tmp_path / "bm25_index.json"
+    index = _index(path)
+    index.save()
+
+    reloaded = BM25Index(path)
+
+    assert len(reloaded) == 3
+    assert reloaded.search("terminal") == index.search("terminal")
+
+
+def test_copy_is_independent(tmp_path):
+    """A cópia filtra os IDs pedidos e não altera o índice original."""
+    index = _index()
+    copy = index.copy(tmp_path / "bm25_index.g1.json", ids=["fx", "term"])
+    copy.remove(["term"])
+    copy.save()
+
+    assert len(index) == 3
+    assert [h.id for h in index.search("terminal")] == ["term"]
+    assert len(BM25Index(tmp_path / "bm25_index.g1.json")) == 1
@@ -0,0 +1,70 @@
+"""Testes unitários para a compressão extrativa do contexto."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from mascate.intelligence.rag.compression import ContextCompressor, compression_ratio
+from mascate.intelligence.rag.retriever import SearchResult
+
+# Vetores normalizados por sentença (query = eixo x)
+_VECTORS = {
+    "abrir editor": [1.0, 0.0],
+    "O editor padrão é o gedit.": [0.9, 0.436],
+    "Foi instalado em 2020.": [0.0, 1.0],
+    "Use ctrl+s para salvar.": [0.6, 0.8],
+}
+
+
+def _embedding_model():
+    model = MagicMock()
+    model.encode.side_effect = lambda texts: np.array([_VECTORS[t] for t in texts])
+    return model
+
+
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+def _results():
+    return [
+        SearchResult(
+            content="O editor padrão é o gedit. Foi instalado em 2020.",
+            source="apps.md",
+            score=0.9,
+            metadata={"n_tokens": 10},
+        ),
+        SearchResult(
+            content="Use ctrl+s para salvar.",
+            source="atalhos.md",
+            score=0.7,
+            metadata={},
+        ),
+    ]
+
+
+def test_compress_keeps_most_similar_sentences():
+    """Mantém as sentenças mais próximas da query dentro do orçamento."""
+    compressor = ContextCompressor(_embedding_model(), _count_words, max_tokens=10)
+    compressed = compressor.compress("abrir editor", _results())
+
+    assert [r.content for r in compressed] == [
+        "O editor padrão é o gedit.",
+        "Use ctrl+s para salvar.",
+    ]
+    assert compressed[0].metadata["n_tokens"] == 6
+    assert compressor.last_ratio == 10 / 14
+
+
+def test_compress_drops_chunks_without_selected_sentences():
+    """Chunks sem sentenças escolhidas saem do contexto."""
+    compressor = ContextCompressor(_embedding_model(), _count_words, max_tokens=6)
+    compressed = compressor.compress("abrir editor", _results())
+
+    assert [r.source for r in compressed] == ["apps.md"]
+
+
+def test_compression_ratio():
+    """Sem tokens de entrada, a razão é 1."""
+    assert compression_ratio(0, 0) == 1.0
+    assert compression_ratio(200, 50) == 0.25
@@ -0,0 +1,99 @@
+"""Testes unitários para a montagem de contexto com orçamento de tokens."""
+
+from unittest.mock import MagicMock
+
+from mascate.intelligence.rag.context import ContextAssembler, split_sentences
+from mascate.intelligence.rag.retriever import NO_CONTEXT, SearchResult
+
+
+def _count_words(text: str) -> int:
+    """Contador de tokens simplificado: uma palavra por token."""
+    return len(text.split())
+
+
+def _result(content, score, source="doc", dense_score=None, **metadata):
+    return SearchResult(
+        content=content,
+        source=source,
+        score=score,
+        metadata=metadata,
+        dense_score=score if dense_score is None else dense_score,
+    )
+
+
+def test_split_sentences():
+    """Divide em pontuação final e quebras de linha."""
+    text = "Primeira frase. Segunda frase!\nTerceira linha"
+    assert split_sentences(text) == [
+        "Primeira frase.",
+        "Segunda frase!",
+        "Terceira linha",
+    ]
+
+
+def test_assemble_empty():
+    """Sem resultados, usa o texto padrão."""
+    assert ContextAssembler(_count_words).assemble([]) == NO_CONTEXT
+
+
+def test_assemble_orders_by_score_and_drops_low_margin():
+    """Documentos muito abaixo do melhor score são descartados."""
+    assembler = ContextAssembler(_count_words, max_tokens=100, score_margin=0.2)
+    context = assembler.assemble(
+        [
+            _result("Segundo doc.", 0.8, source="b"),
+            _result("Melhor doc.", 0.9, source="a"),
+            _result("Doc irrelevante.", 0.5, source="c"),
+        ]
+    )
+
+    assert context.index("source='a'") < context.index("source='b'")
+    assert "<doc id='1' source='a'>" in context
+    assert "Doc irrelevante" not in context
+
+
+def test_assemble_margin_uses_dense_scores_only():
+    """No modo híbrido a margem compara cossenos, não o score do RRF."""
+    assembler = ContextAssembler(_count_words, max_tokens=100, score_margin=0.2)
+    context = assembler.assemble(
+        [
+            _result("Fundido alto.", 1.0, source="a", dense_score=0.6),
+            _result("Fundido baixo.", 0.5, source="b", dense_score=0.55),
+            _result("Cosseno baixo.", 0.49, source="c", dense_score=0.3),
+            SearchResult(content="So BM25.", source="d", score=0.48, metadata={}),
+        ]
+    )
+
+    assert "source='b'" in context  # 0.5 do RRF, mas cosseno perto do melhor
+    assert "source='c'" not in context
+    assert context.index("source='b'") < context.index("source='d'")
+
+
+def test_assemble_truncates_at_sentence_boundary():
+    """O documento que não cabe inteiro é cortado entre sentenças."""
+    # Cabecalho "<doc id='1' source='a'>\n\n</doc>" = 3 palavras
+    assembler = ContextAssembler(_count_words, max_tokens=8)
+    context = assembler.assemble(
+        [_result("Abra o editor. Depois salve o arquivo.", 0.9, source="a")]
+    )
+
+    assert "Abra o editor." in context
+    assert "salve" not in context
+
+
+def test_assemble_uses_cached_token_counts():
+    """Usa 'n_tokens' do payload e conta cada chunk no máximo uma vez."""
+    counter = MagicMock(side_effect=_count_words)
+    assembler = ContextAssembler(counter, max_tokens=100)
+
+    cached = _result("Texto com contagem gravada.", 0.9, n_tokens=4)
+    assembler.assemble([cached])
+    assert "Texto com contagem gravada." not in [
+        c.args[0] for c in counter.call_args_list
+    ]
+
+    uncached = _result("Texto sem contagem.", 0.9)
+    assembler.assemble([uncached])
+    assembler.assemble([uncached])
+    calls = [c.args[0] for c in counter.call_args_list]
+    assert calls.count("Texto sem contagem.") == 1
@@ -0,0 +1,96 @@
+"""Testes unitários para o cache de embeddings de consultas."""
+
+import numpy as np
+import pytest
+
+from mascate.core.metrics import get_metrics, reset_metrics
+from mascate.intelligence.rag.embedding_cache import EmbeddingCache
+
+_VECTOR = np.array([0.6, 0.8], dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def _metrics():
+    reset_metrics()
+
+
+def test_hit_by_normalized_text():
+    """Espaços extras caem na mesma entrada; caixa diferente não."""
+    cache = EmbeddingCache()
+    cache.put("bge", "abre o firefox", _VECTOR)
+
+    np.testing.assert_array_equal(cache.get("bge", "  abre o   firefox"), _VECTOR)
+    assert cache.get("bge", "Abre o Firefox") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert get_metrics().get("embedding_cache.hits") == 1
+    assert get_metrics().get("embedding_cache.misses") == 1
+
+
+def test_keyed_by_model():
+    """Vetores de outro modelo não são reaproveitados."""
+    cache = EmbeddingCache()
+    cache.put("bge", "abre o firefox", _VECTOR)
+
+    assert cache.get("minilm", "abre o firefox") is None
+
+
+def test_lru_eviction():
+    """A entrada menos usada sai ao atingir o limite."""
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("bge", "a", _VECTOR)
+    cache.put("bge", "b", _VECTOR)
+    cache.get("bge", "a")
+    cache.put("bge", "c", _VECTOR)
+
+    assert cache.get("bge", "b") is None
+    assert cache.get("bge", "a") is not None
+    assert cache.evictions == 1
+    assert get_metrics().get("embedding_cache.evictions") == 1
+
+
+def test_float16_storage_returns_float32():
+    """Armazenamento em float16 devolve float32 próximo do original."""
+    cache = EmbeddingCache(dtype="float16")
+    cache.put("bge", "a", _VECTOR)
+
+    vector = cache.get("bge", "a")
+    assert vector.dtype == np.float32
+    np.testing.assert_allclose(vector, _VECTOR, atol=1e-3)
+
+
+def test_returned_vector_is_a_copy():
+    """Alterar o vetor devolvido não corrompe o cache."""
+    cache = EmbeddingCache()
+    cache.put("bge", "a", _VECTOR)
+    cache.get("bge", "a")[:] = 0
+
+    np.testing.assert_array_equal(cache.get("bge", "a"), _VECTOR)
+
+
+def test_persistence_roundtrip(tmp_path):
+    """Os vetores salvos são lidos com mmap por uma nova instância."""
+    path = tmp_path / "query_embeddings"
+    cache = EmbeddingCache(path=path, save_every=1)
+    cache.put("bge", "abre o firefox", _VECTOR)
+
+    assert (tmp_path / "query_embeddings.npy").exists()
+    reloaded = EmbeddingCache(path=path)
+    assert len(reloaded) == 1
+    np.testing.assert_array_equal(reloaded.get("bge", "abre o firefox"), _VECTOR)
+
+
+def test_persisted_dtype_mismatch_is_ignored(tmp_path):
+    """Trocar o tipo de armazenamento descarta o arquivo antigo."""
+    path = tmp_path / "query_embeddings"
+    EmbeddingCache(path=path, save_every=1).put("bge", "a", _VECTOR)
+
+    assert len(EmbeddingCache(path=path, dtype="float16")) == 0
+
+
+def test_corrupted_file_is_ignored(tmp_path):
+    """Arquivos inválidos não impedem a inicialização."""
+    (tmp_path / "query_embeddings.npy").write_bytes(b"lixo")
+    (tmp_path / "query_embeddings.json").write_text("[]", encoding="utf-8")
+
+    assert len(EmbeddingCache(path=tmp_path / "query_embeddings")) == 0
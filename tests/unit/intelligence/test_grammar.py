@@ -2,7 +2,11 @@
 
 import pytest
 
-from mascate.intelligence.llm.grammar import GrammarError, GrammarLoader
+from mascate.intelligence.llm.grammar import (
+    GrammarError,
+    GrammarLoader,
+    split_forced_prefix,
+)
 
 
 def test_grammar_loader_default_path():
@@ -37,3 +41,94 @@ def test_custom_grammar_dir(tmp_path):
     content = loader.load("custom")
 
     assert content == 'root ::= "test"'
+
+
+def test_available_grammars():
+    """Verifica listagem das gramáticas do diretório."""
+    loader = GrammarLoader()
+    assert "command" in loader.available()
+
+
+def test_grammar_cache_hit_and_invalidation(tmp_path):
+    """Verifica cache por nome e mtime, com recompilação ao mudar o arquivo."""
+    import os
+
+    from mascate.core.metrics import get_metrics, reset_metrics
+    from mascate.intelligence.llm.grammar import GrammarCache
+
+    reset_metrics()
+    grammar_file = tmp_path / "custom.gbnf"
+    grammar_file.write_text('root ::= "a"', encoding="utf-8")
+
+    compiled = []
+
+    def compiler(text):
+        compiled.append(text)
+        return f"compiled:{text}"
+
+    cache = GrammarCache(GrammarLoader(grammar_dir=tmp_path), compiler)
+
+    assert cache.get("custom") == 'compiled:root ::= "a"'
+    assert cache.get("custom") == 'compiled:root ::= "a"'
+    assert len(compiled) == 1
+
+    grammar_file.write_text('root ::= "b"', encoding="utf-8")
+    stat = grammar_file.stat()
+    os.utime(grammar_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cache.get("custom") == 'compiled:root ::= "b"'
+    assert len(compiled) == 2
+
+    metrics = get_metrics()
+    assert metrics.get("grammar_cache.hits") == 1
+    assert metrics.get("grammar_cache.misses") == 2
+    assert metrics.get("grammar_cache.time_saved_s") >= 0
+
+
+def test_grammar_cache_precompile(tmp_path):
+    """Verifica pré-compilação ignorando bibliotecas sem regra root."""
+    from mascate.intelligence.llm.grammar import GrammarCache
+
+    (tmp_path / "command.gbnf").write_text('root ::= "x"', encoding="utf-8")
+    (tmp_path / "base.gbnf").write_text('ws ::= " "*', encoding="utf-8")
+
+    cache = GrammarCache(GrammarLoader(grammar_dir=tmp_path), lambda text: text)
+
+    assert cache.precompile() == 1
+
+
+def test_grammar_cache_missing(tmp_path):
+    """Verifica erro para gramática inexistente."""
+    from mascate.intelligence.llm.grammar import GrammarCache
+
+    cache = GrammarCache(GrammarLoader(grammar_dir=tmp_path), lambda text: text)
+    with pytest.raises(GrammarError, match="não encontrada"):
+        cache.get("ghost")
+
+
+def test_split_forced_prefix():
+    """Verifica extração do texto forçado no início de 'root'."""
+    gbnf = 'root ::= "{\\"action\\": " command "}"\ncommand ::= "\\"x\\""\n'
+    prefix, rest = split_forced_prefix(gbnf)
+
+    assert prefix == '{"action": '
+    assert rest.startswith('root ::= command "}"\n')
+    assert 'command ::= "\\"x\\""' in rest
+
+
+def test_split_forced_prefix_without_forced_text():
+    """Alternativas ou literais opcionais no início não geram prefixo."""
+    for gbnf in (
+        'root ::= "a" | "b"\n',
+        'root ::= "a"? "b"\n',
+        "root ::= command\n",
+        'root ::= "so-literal"\n',
+    ):
+        assert split_forced_prefix(gbnf) == ("", gbnf)
+
+
+def test_command_grammars_have_prefix():
+    """As gramáticas de comando geradas começam com a chave da ação."""
+    loader = GrammarLoader()
+    assert split_forced_prefix(loader.load("command"))[0] == '{"action": '
+    assert split_forced_prefix(loader.load("command_compact"))[0] == '{"a":'
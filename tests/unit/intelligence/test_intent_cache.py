@@ -0,0 +1,95 @@
+"""Testes unitários para o cache de intenções."""
+
+import json
+
+import pytest
+
+from mascate.core.metrics import get_metrics, reset_metrics
+from mascate.intelligence.brain import Intent
+from mascate.intelligence.intent_cache import IntentCache
+
+_INTENT = Intent(
+    action="open_app",
+    target="firefox",
+    params={},
+    raw_json='{"action": "open_app", "target": "firefox"}',
+)
+
+
+@pytest.fixture(autouse=True)
+def _metrics():
+    reset_metrics()
+
+
+def test_hit_by_normalized_transcript():
+    """Variações de caixa, acentos e fillers caem na mesma entrada."""
+    cache = IntentCache()
+    cache.put("Abre o navegador", (1, 1), _INTENT)
+
+    assert cache.get("abre o navegador, por favor!", (1, 1)) == _INTENT
+    assert get_metrics().get("intent_cache.hits") == 1
+    assert get_metrics().timing("intent_cache.lookup").count == 1
+
+
+def test_version_change_misses():
+    """Nova versão da base ou da gramática invalida a entrada."""
+    cache = IntentCache()
+    cache.put("abre o navegador", (1, 1), _INTENT)
+
+    assert cache.get("abre o navegador", (2, 1)) is None
+    assert cache.get("abre o navegador", (1, 2)) is None
+    assert get_metrics().get("intent_cache.misses") == 2
+
+
+def test_ttl_expiration(monkeypatch):
+    """Entradas expiradas são removidas na consulta."""
+    now = 1000.0
+    monkeypatch.setattr("mascate.intelligence.intent_cache.time.time", lambda: now)
+    cache = IntentCache(ttl_s=10)
+    cache.put("abre o navegador", (1, 1), _INTENT)
+
+    now = 1011.0
+    assert cache.get("abre o navegador", (1, 1)) is None
+    assert len(cache) == 0
+    assert get_metrics().get("intent_cache.expired") == 1
+
+
+def test_lru_eviction():
+    """Acima do limite, sai a entrada menos usada."""
+    cache = IntentCache(max_entries=2)
+    cache.put("um", (1,), _INTENT)
+    cache.put("dois", (1,), _INTENT)
+    cache.get("um", (1,))
+    cache.put("tres", (1,), _INTENT)
+
+    assert cache.get("dois", (1,)) is None
+    assert cache.get("um", (1,)) == _INTENT
+    assert cache.get("tres", (1,)) == _INTENT
+
+
+def test_persistence(tmp_path):
+    """Entradas sobrevivem ao reinício; arquivos inválidos são ignorados."""
+    path = tmp_path / "intent_cache.json"
+    IntentCache(path).put("abre o navegador", (1, 1), _INTENT)
+
+    assert IntentCache(path).get("abre o navegador", (1, 1)) == _INTENT
+
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    stored.append(["invalida", 9e99, {"action": "x"}])
+    path.write_text(json.dumps(stored), encoding="utf-8")
+    assert len(IntentCache(path)) == 1
+
+    path.write_text("{corrompido", encoding="utf-8")
+    assert len(IntentCache(path)) == 0
+
+
+def test_clear(tmp_path):
+    """clear() esvazia a memória e remove o arquivo."""
+    path = tmp_path / "intent_cache.json"
+    cache = IntentCache(path)
+    cache.put("abre o navegador", (1, 1), _INTENT)
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert not path.exists()
@@ -0,0 +1,49 @@
+"""Testes unitários para o parser JSON incremental."""
+
+import json
+
+from mascate.intelligence.llm.json_stream import IncrementalJSONParser
+
+
+def test_fields_available_before_object_closes():
+    """Verifica se campos de topo ficam disponíveis assim que fecham."""
+    parser = IncrementalJSONParser()
+
+    parser.feed('{"action": "open_')
+    assert "action" not in parser.fields
+
+    parser.feed('app", "target": "fire')
+    assert parser.fields == {"action": "open_app"}
+
+    parser.feed('fox"')
+    assert parser.fields["target"] == "firefox"
+    assert not parser.complete
+
+
+def test_completes_on_balanced_brace():
+    """Verifica se o objeto raiz fecha apenas na chave balanceada."""
+    parser = IncrementalJSONParser()
+    payload = '{"action": "system_op", "target": "volume", "params": {"value": 5}}'
+
+    for char in payload[:-1]:
+        assert not parser.feed(char)
+
+    assert parser.feed(payload[-1] + "<|endoftext|>")
+    assert json.loads(parser.text)["params"] == {"value": 5}
+
+
+def test_braces_and_escapes_inside_strings():
+    """Verifica se chaves e aspas escapadas em strings são ignoradas."""
+    parser = IncrementalJSONParser()
+    payload = '{"action": "reply", "target": "use \\"{\\" e }"}'
+
+    assert parser.feed(payload)
+    assert parser.fields["target"] == 'use "{" e }'
+
+
+def test_nested_strings_not_promoted():
+    """Verifica se strings de objetos aninhados não viram campos de topo."""
+    parser = IncrementalJSONParser()
+    parser.feed('{"action": "file_op", "params": {"target": "x"}, "target": "/tmp"}')
+
+    assert parser.fields == {"action": "file_op", "target": "/tmp"}
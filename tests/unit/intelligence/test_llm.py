@@ -1,11 +1,14 @@
 """Testes unitários para o LLM Wrapper."""
 
+import threading
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from mascate.intelligence.llm.granite import GraniteLLM, LLMError
+from mascate.core.metrics import get_metrics, reset_metrics
+from mascate.intelligence.llm.granite import CancellationToken, GraniteLLM, LLMError
 
 
 @patch("mascate.intelligence.llm.granite.Llama")
@@ -19,6 +22,66 @@ def test_llm_initialization(MockGrammar, MockLlama):
         assert llm.model_path.name == "model.gguf"
 
 
+@patch("mascate.intelligence.llm.granite.LlamaPromptLookupDecoding")
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_speculative_draft_model(_mock_grammar, MockLlama, MockLookup):
+    """Verifica que o rascunho por prompt lookup só é criado se configurado."""
+    with patch.object(Path, "exists", return_value=True):
+        GraniteLLM(model_path="model.gguf", prompt_cache=False)
+        assert MockLlama.call_args[1]["draft_model"] is None
+        MockLookup.assert_not_called()
+
+        GraniteLLM(
+            model_path="model.gguf", prompt_cache=False, speculative_draft_tokens=8
+        )
+        MockLookup.assert_called_once_with(num_pred_tokens=8)
+        assert MockLlama.call_args[1]["draft_model"] is MockLookup.return_value
+
+
+@patch("mascate.intelligence.llm.granite.StoppingCriteriaList", list)
+def test_stopping_criteria_deadline():
+    """O critério de parada interrompe a geração após o prazo."""
+    assert GraniteLLM._stopping_criteria(None) is None
+
+    (expired,) = GraniteLLM._stopping_criteria(time.monotonic() - 1)
+    (pending,) = GraniteLLM._stopping_criteria(time.monotonic() + 60)
+    assert expired(None, None) is True
+    assert pending(None, None) is False
+
+
+@patch("mascate.intelligence.llm.granite.StoppingCriteriaList", list)
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_cancel_in_flight_generation(_mock_grammar, MockLlama):
+    """cancel() aciona o critério de parada da geração em andamento."""
+    mock_instance = MagicMock()
+    MockLlama.return_value = mock_instance
+
+    with (
+        patch.object(Path, "exists", return_value=True),
+        patch(
+            "mascate.intelligence.llm.granite.GrammarLoader.load",
+            return_value="root ::= ...",
+        ),
+    ):
+        llm = GraniteLLM(model_path="model.gguf", prompt_cache=False)
+
+        def fake_generation(_prompt, **kwargs):
+            (should_stop,) = kwargs["stopping_criteria"]
+            assert should_stop(None, None) is False
+            llm.cancel()
+            assert should_stop(None, None) is True
+            return {"choices": [{"text": "{}"}]}
+
+        mock_instance.side_effect = fake_generation
+        token = CancellationToken()
+        llm.generate("Oi", cancel_token=token)
+
+    assert token.cancelled
+    assert not llm._active_tokens
+
+
 def test_llm_model_not_found():
     """Verifica erro se modelo não existe."""
     with patch.object(Path, "exists", return_value=False), pytest.raises(LLMError):
@@ -63,9 +126,12 @@ def test_generate_streaming(MockGrammar, MockLlama):
     )
     MockLlama.return_value = mock_instance
 
-    with patch.object(Path, "exists", return_value=True), patch(
-        "mascate.intelligence.llm.granite.GrammarLoader.load",
-        return_value="root ::= ...",
+    with (
+        patch.object(Path, "exists", return_value=True),
+        patch(
+            "mascate.intelligence.llm.granite.GrammarLoader.load",
+            return_value="root ::= ...",
+        ),
     ):
         llm = GraniteLLM(model_path="model.gguf")
         generator = llm.generate("Hello", stream=True)
@@ -74,8 +140,216 @@ def test_generate_streaming(MockGrammar, MockLlama):
         assert result == ["{", "}"]
 
 
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_generate_prefills_forced_prefix(MockGrammar, MockLlama):
+    """Verifica que o prefixo forçado vai no prompt e volta na resposta."""
+    mock_instance = MagicMock()
+    mock_instance.return_value = {"choices": [{"text": '"reply", "target": "oi"}'}]}
+    MockLlama.return_value = mock_instance
+
+    with (
+        patch.object(Path, "exists", return_value=True),
+        patch(
+            "mascate.intelligence.llm.granite.GrammarLoader.load",
+            return_value='root ::= "{\\"action\\": " command "}"\n',
+        ),
+    ):
+        llm = GraniteLLM(model_path="model.gguf", prompt_cache=False)
+        response = llm.generate("Oi")
+
+    assert response == '{"action": "reply", "target": "oi"}'
+    prompt_sent = mock_instance.call_args[0][0]
+    assert prompt_sent.endswith('<|assistant|>{"action": ')
+    MockGrammar.from_string.assert_called_with('root ::= command "}"\n')
+
+
 @patch("mascate.intelligence.llm.granite.Llama", None)
 def test_llm_import_error():
     """Verifica erro se biblioteca não instalada."""
     with pytest.raises(LLMError, match="llama-cpp-python nao instalado"):
         GraniteLLM(model_path="model.gguf")
+
+
+def _mock_tokenizer(mock_instance):
+    """Configura tokenize para devolver um token por caractere."""
+    mock_instance.tokenize.side_effect = lambda text, add_bos=True, **_kwargs: (
+        ([1] if add_bos else []) + list(text)
+    )
+
+
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_prompt_state_restored_before_generate(_mock_grammar, MockLlama, tmp_path):
+    """Verifica se o prefixo é avaliado uma vez e restaurado a cada pedido."""
+    mock_instance = MagicMock()
+    mock_instance.return_value = {"choices": [{"text": "{}"}]}
+    mock_instance.save_state.return_value = {"n_tokens": 42}
+    _mock_tokenizer(mock_instance)
+    MockLlama.return_value = mock_instance
+
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"GGUF")
+
+    llm = GraniteLLM(model_path=model)
+    mock_instance.eval.assert_called_once()
+    mock_instance.save_state.assert_called_once()
+
+    llm.generate("abre o firefox")
+    llm.generate("fecha o firefox")
+
+    assert mock_instance.load_state.call_count == 2
+    mock_instance.load_state.assert_called_with({"n_tokens": 42})
+    mock_instance.eval.assert_called_once()
+
+
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_prompt_state_persisted_to_cache_dir(_mock_grammar, MockLlama, tmp_path):
+    """Verifica se o snapshot persistido evita reavaliar o prefixo no cold start."""
+    mock_instance = MagicMock()
+    mock_instance.save_state.return_value = {"n_tokens": 42}
+    _mock_tokenizer(mock_instance)
+    MockLlama.return_value = mock_instance
+
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"GGUF")
+    cache_dir = tmp_path / "cache"
+
+    GraniteLLM(model_path=model, cache_dir=cache_dir)
+    snapshots = list((cache_dir / "prompt_state").glob("*.bin"))
+    assert len(snapshots) == 1
+
+    mock_instance.reset_mock()
+    llm = GraniteLLM(model_path=model, cache_dir=cache_dir)
+
+    mock_instance.eval.assert_not_called()
+    mock_instance.save_state.assert_not_called()
+    mock_instance.load_state.assert_called_once_with({"n_tokens": 42})
+    assert llm._prefix_state == {"n_tokens": 42}
+
+
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_prompt_cache_disabled(_mock_grammar, MockLlama, tmp_path):
+    """Verifica se prompt_cache=False não avalia nem restaura estado."""
+    mock_instance = MagicMock()
+    mock_instance.return_value = {"choices": [{"text": "{}"}]}
+    MockLlama.return_value = mock_instance
+
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"GGUF")
+
+    llm = GraniteLLM(model_path=model, prompt_cache=False)
+    llm.generate("oi")
+
+    mock_instance.eval.assert_not_called()
+    mock_instance.load_state.assert_not_called()
+
+
+def test_build_prompt_user_first():
+    """O layout user_first coloca o pedido antes e omite contexto vazio."""
+    prompt = GraniteLLM._build_prompt("abre o firefox", "<doc/>", user_first=True)
+    assert prompt.index("abre o firefox") < prompt.index("<doc/>")
+
+    no_context = GraniteLLM._build_prompt("abre o firefox", "", user_first=True)
+    assert "Contexto RAG" not in no_context
+    assert prompt.startswith(no_context.removesuffix("<|assistant|>"))
+
+
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_prime_reused_by_generate(_mock_grammar, MockLlama, tmp_path):
+    """O pedido avaliado durante a busca não é reavaliado na geração."""
+    mock_instance = MagicMock()
+    mock_instance.return_value = {"choices": [{"text": "{}"}]}
+    mock_instance.save_state.return_value = {"n_tokens": 42}
+    _mock_tokenizer(mock_instance)
+
+    def _eval(tokens):
+        mock_instance.n_tokens += len(tokens)
+
+    mock_instance.eval.side_effect = _eval
+    MockLlama.return_value = mock_instance
+
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"GGUF")
+    llm = GraniteLLM(model_path=model, prefill=False)
+    prefix_len = len(mock_instance.eval.call_args[0][0])
+
+    def _load_state(_state):
+        mock_instance.n_tokens = prefix_len
+
+    mock_instance.load_state.side_effect = _load_state
+    reset_metrics()
+
+    assert llm.prime("abre o firefox")
+    # Só o sufixo do pedido é avaliado sobre o snapshot do sistema
+    primed = mock_instance.eval.call_args[0][0]
+    assert bytes(primed).decode().endswith("abre o firefox\n")
+    assert mock_instance.load_state.call_count == 1
+
+    llm.generate("abre o firefox", context="<doc/>", user_first=True)
+    assert mock_instance.load_state.call_count == 1
+    assert get_metrics().get("llm.prime.reused") == 1
+
+    # Pedido diferente do avaliado: restaura o snapshot
+    llm.prime("abre o firefox")
+    llm.generate("fecha o firefox", user_first=True)
+    assert mock_instance.load_state.call_count == 3
+    assert get_metrics().get("llm.prime.discarded") == 1
+
+
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_warm_up(_mock_grammar, MockLlama):
+    """O aquecimento faz um forward e deixa o estado limpo."""
+    mock_instance = MagicMock()
+    _mock_tokenizer(mock_instance)
+    MockLlama.return_value = mock_instance
+
+    with patch("pathlib.Path.exists", return_value=True):
+        llm = GraniteLLM(model_path="model.gguf", prompt_cache=False)
+
+    llm.warm_up()
+
+    mock_instance.eval.assert_called_once()
+    mock_instance.reset.assert_called_once()
+
+
+@patch("mascate.intelligence.llm.granite.Llama")
+@patch("mascate.intelligence.llm.granite.LlamaGrammar")
+def test_warm_up_waits_for_active_generation(_mock_grammar, MockLlama):
+    """Aquecer durante uma geração cancelada espera ela liberar o modelo."""
+    mock_instance = MagicMock()
+    _mock_tokenizer(mock_instance)
+    MockLlama.return_value = mock_instance
+    events: list[str] = []
+    generating = threading.Event()
+    release = threading.Event()
+
+    def fake_generation(*_args, **_kwargs):
+        generating.set()
+        release.wait(timeout=5)  # Só para no próximo token
+        events.append("generate")
+        return {"choices": [{"text": "{}"}]}
+
+    mock_instance.side_effect = fake_generation
+    mock_instance.eval.side_effect = lambda _tokens: events.append("warm_up")
+
+    with patch("pathlib.Path.exists", return_value=True):
+        llm = GraniteLLM(model_path="model.gguf", prompt_cache=False)
+
+    generation = threading.Thread(target=llm.generate, args=("Oi",))
+    generation.start()
+    assert generating.wait(timeout=5)
+    llm.cancel()
+    warm_up = threading.Thread(target=llm.warm_up)
+    warm_up.start()
+    time.sleep(0.05)
+    assert events == []  # warm_up bloqueado enquanto a geração usa o contexto
+
+    release.set()
+    generation.join(timeout=5)
+    warm_up.join(timeout=5)
+    assert events == ["generate", "warm_up"]
@@ -0,0 +1,175 @@
+"""Testes unitários para o índice vetorial NumPy."""
+
+import numpy as np
+import pytest
+
+from mascate.intelligence.rag.numpy_db import NumpyVectorDB
+from mascate.intelligence.rag.vectordb import VectorDBError
+
+
+def _db(path, dtype="float32"):
+    db = NumpyVectorDB(path, dtype=dtype)
+    db.ensure_collection("kb", 3)
+    return db
+
+
+def test_search_returns_top_k_by_cosine(tmp_path):
+    """Os mais similares vêm primeiro e o limiar descarta os distantes."""
+    db = _db(tmp_path)
+    db.upsert(
+        "kb",
+        ["x", "y", "xy", "z"],
+        [[1, 0, 0], [0, 1, 0], [1, 1, 0], [0, 0, 1]],
+        [{"content": "x"}, {"content": "y"}, {"content": "xy"}, {"content": "z"}],
+    )
+
+    hits = db.search("kb", [2, 0, 0], limit=3, score_threshold=0.3)
+
+    assert [h.id for h in hits] == ["x", "xy"]
+    assert hits[0].score == pytest.approx(1.0)
+    assert hits[1].score == pytest.approx(np.sqrt(0.5))
+    assert hits[0].payload == {"content": "x"}
+
+
+def test_upsert_replaces_existing_ids(tmp_path):
+    """Upsert do mesmo ID troca vetor e payload sem duplicar."""
+    db = _db(tmp_path)
+    db.upsert("kb", ["a"], [[1, 0, 0]], [{"v": 1}])
+    db.upsert("kb", ["a", "b"], [[0, 1, 0], [0, 0, 1]], [{"v": 2}, {"v": 3}])
+
+    assert db.count("kb") == 2
+    hit = db.search("kb", [0, 1, 0], limit=1)[0]
+    assert (hit.id, hit.payload) == ("a", {"v": 2})
+
+
+def test_delete_removes_points(tmp_path):
+    """Pontos removidos não aparecem mais na busca."""
+    db = _db(tmp_path)
+    db.upsert("kb", ["a", "b"], [[1, 0, 0], [0, 1, 0]], [{}, {}])
+    db.delete("kb", ["a", "inexistente"])
+
+    assert db.count("kb") == 1
+    assert [h.id for h in db.search("kb", [1, 1, 0])] == ["b"]
+
+
+def test_persists_and_reopens_with_mmap(tmp_path):
+    """Uma nova instância lê os vetores gravados em disco."""
+    _db(tmp_path).upsert("kb", ["a"], [[0, 0, 1]], [{"content": "doc"}])
+
+    db = _db(tmp_path)
+
+    assert db.count("kb") == 1
+    hit = db.search("kb", [0, 0, 1])[0]
+    assert (hit.id, hit.payload) == ("a", {"content": "doc"})
+
+
+def test_float16_storage(tmp_path):
+    """Vetores em float16 mantêm a ordem da busca."""
+    db = _db(tmp_path, dtype="float16")
+    db.upsert("kb", ["a", "b"], [[1, 0, 0], [0.8, 0.6, 0]], [{}, {}])
+
+    hits = db.search("kb", [1, 0, 0])
+    assert [h.id for h in hits] == ["a", "b"]
+    assert hits[1].score == pytest.approx(0.8, abs=1e-3)
+
+
+def test_dimension_mismatch_recreates_collection(tmp_path):
+    """Trocar o modelo de embedding (outra dimensão) descarta a collection."""
+    _db(tmp_path).upsert("kb", ["a"], [[1, 0, 0]], [{}])
+
+    db = NumpyVectorDB(tmp_path)
+    db.ensure_collection("kb", 4)
+
+    assert db.count("kb") == 0
+    with pytest.raises(VectorDBError):
+        db.upsert("kb", ["a"], [[1, 0, 0]], [{}])
+
+
+def test_missing_collection(tmp_path):
+    """Busca em collection inexistente retorna vazio, como o Qdrant."""
+    db = NumpyVectorDB(tmp_path)
+
+    assert db.search("nada", [1, 0, 0]) == []
+    with pytest.raises(VectorDBError):
+        db.count("nada")
+
+
+def test_buffered_writes_apply_on_flush(tmp_path):
+    """Com buffer, lotes e remoções só são aplicados e gravados no flush."""
+    db = _db(tmp_path)
+    db.upsert("kb", ["a", "b"], [[1, 0, 0], [0, 1, 0]], [{"v": 1}, {"v": 2}])
+    db.buffer_writes("kb")
+
+    db.upsert("kb", ["c", "a"], [[0, 0, 1], [0, 1, 0]], [{"v": 3}, {"v": 4}])
+    db.delete("kb", ["b", "c"])
+    db.upsert("kb", ["d"], [[1, 0, 0]], [{"v": 5}])
+    assert db.count("kb") == 2  # Ainda o estado gravado
+
+    db.flush("kb")
+
+    reopened = _db(tmp_path)
+    assert reopened.count("kb") == 2
+    assert [(h.id, h.payload) for h in reopened.search("kb", [0, 1, 0], limit=1)] == [
+        ("a", {"v": 4})
+    ]
+    assert reopened.search("kb", [1, 0, 0], limit=1)[0].id == "d"
+
+
+def test_alias_copy_and_drop(tmp_path):
+    """O alias redireciona as chamadas; cópia e remoção usam nomes físicos."""
+    db = _db(tmp_path)
+    db.upsert("kb", ["a", "b"], [[1, 0, 0], [0, 1, 0]], [{"v": 1}, {"v": 2}])
+    db.ensure_collection("kb_g1", 3)
+
+    assert db.copy_points("kb", "kb_g1", ["a", "ausente"]) == 1
+    db.set_alias("kb", "kb_g1")
+
+    assert db.resolve("kb") == "kb_g1"
+    assert db.count("kb") == 1
+    assert [h.payload for h in db.search("kb", [1, 0, 0])] == [{"v": 1}]
+
+    db.drop_collection("kb")
+    assert not db.collection_exists("kb")
+    assert db.collection_exists("kb_g1")
+    assert not (tmp_path / "kb").exists()
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search_rescores_candidates(tmp_path, quantization):
+    """A 1ª passada usa os códigos, mas os scores devolvidos são exatos."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((100, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    db = NumpyVectorDB(tmp_path, quantization=quantization, oversampling=4)
+    db.ensure_collection("kb", 16)
+    db.upsert("kb", [str(i) for i in range(100)], vectors.tolist(), [{}] * 100)
+
+    hits = db.search("kb", vectors[7].tolist(), limit=3)
+
+    assert hits[0].id == "7"
+    assert hits[0].score == pytest.approx(1.0)
+    exact = vectors @ vectors[7]
+    assert [h.score for h in hits] == pytest.approx(
+        sorted(exact[[int(h.id) for h in hits]], reverse=True)
+    )
+    assert db.bytes_per_point("kb") < 16 * 4
+
+
+def test_quantized_codes_persist_and_rebuild(tmp_path):
+    """Os códigos são relidos do disco e recriados ao trocar de modo."""
+    db = NumpyVectorDB(tmp_path, quantization="int8")
+    db.ensure_collection("kb", 3)
+    db.upsert("kb", ["a", "b"], [[1, 0, 0], [0, 1, 0]], [{}, {}])
+    assert (tmp_path / "kb" / "codes.npz").exists()
+
+    reopened = NumpyVectorDB(tmp_path, quantization="binary")
+    reopened.ensure_collection("kb", 3)
+
+    assert reopened.bytes_per_point("kb") == 1
+    assert reopened.search("kb", [0, 1, 0], limit=1)[0].id == "b"
+
+
+def test_unknown_quantization(tmp_path):
+    """Modo de quantização inválido gera VectorDBError."""
+    with pytest.raises(VectorDBError):
+        NumpyVectorDB(tmp_path, quantization="pq")
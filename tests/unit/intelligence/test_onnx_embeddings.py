@@ -0,0 +1,184 @@
+"""Testes unitários para o backend ONNX de embeddings."""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from mascate.intelligence.rag.embedding_cache import EmbeddingCache
+from mascate.intelligence.rag.embeddings import EmbeddingError
+from mascate.intelligence.rag.onnx_embeddings import OnnxEmbeddingModel, pool
+
+MODULE = "mascate.intelligence.rag.onnx_embeddings"
+
+
+class FakeTokenizer:
+    """Um token por caractere; o 1º token (CLS) codifica o tamanho do texto."""
+
+    def enable_truncation(self, max_length):
+        pass
+
+    def enable_padding(self, pad_id, **_kwargs):
+        self.pad_id = pad_id
+
+    def encode_batch(self, texts):
+        width = max(len(t) for t in texts) + 1
+        return [
+            SimpleNamespace(
+                ids=[len(t)] + [1] * len(t) + [self.pad_id] * (width - len(t) - 1),
+                attention_mask=[1] * (len(t) + 1) + [0] * (width - len(t) - 1),
+                type_ids=[0] * width,
+            )
+            for t in texts
+        ]
+
+
+class FakeSession:
+    """Estado oculto: [id, 1] para cada token."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_inputs(self):
+        return [
+            SimpleNamespace(name="input_ids"),
+            SimpleNamespace(name="attention_mask"),
+        ]
+
+    def run(self, _outputs, feeds):
+        self.calls += 1
+        assert set(feeds) == {"input_ids", "attention_mask"}
+        ids = feeds["input_ids"].astype(np.float32)
+        return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+
+
+@pytest.fixture
+def onnx_model(tmp_path):
+    model_dir = tmp_path / "onnx" / "BAAI--bge-m3" / "int8"
+    model_dir.mkdir(parents=True)
+    (model_dir / "export.json").write_text(
+        json.dumps(
+            {
+                "model_file": "model.int8.onnx",
+                "pooling": "cls",
+                "dimension": 2,
+                "pad_id": 0,
+                "pad_token": "<pad>",
+            }
+        )
+    )
+    session = FakeSession()
+    with (
+        patch(f"{MODULE}.ort") as mock_ort,
+        patch(f"{MODULE}.Tokenizer") as mock_tokenizer,
+        patch(f"{MODULE}.export_onnx") as mock_export,
+    ):
+        mock_ort.InferenceSession.return_value = session
+        mock_tokenizer.from_file.return_value = FakeTokenizer()
+        model = OnnxEmbeddingModel(
+            cache_dir=tmp_path, cache=EmbeddingCache(), batch_size=2
+        )
+        mock_export.assert_not_called()
+        yield model, session
+
+
+def test_encode_keeps_input_order_and_normalizes(onnx_model):
+    """Lotes ordenados por tamanho voltam na ordem original, normalizados."""
+    model, _ = onnx_model
+
+    vectors = model.encode(["abc", "a", "abcdefg"])
+
+    expected = np.array([[3, 1], [1, 1], [7, 1]], dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(vectors, expected, rtol=1e-6)
+    assert model.embedding_size == 2
+
+
+def test_single_query_uses_separate_cache_key(onnx_model):
+    """Consultas únicas vão ao cache com a chave do backend ONNX."""
+    model, session = onnx_model
+
+    first = model.encode("firefox")
+    again = model.encode("firefox")
+
+    assert first.shape == (2,)
+    np.testing.assert_allclose(again, first)
+    assert session.calls == 1
+    assert model.cache_key == "BAAI/bge-m3@onnx-int8"
+
+
+def test_mean_pooling_ignores_padding():
+    """O pooling por média considera só os tokens da máscara."""
+    hidden = np.array([[[1.0, 0.0], [0.0, 1.0], [9.0, 9.0]]])
+    mask = np.array([[1, 1, 0]])
+
+    vector = pool(hidden, mask, "mean")
+
+    np.testing.assert_allclose(vector, [[np.sqrt(0.5), np.sqrt(0.5)]])
+
+
+def test_missing_runtime(tmp_path):
+    """Sem onnxruntime, a criação falha com EmbeddingError."""
+    with patch(f"{MODULE}.ort", None), pytest.raises(EmbeddingError):
+        OnnxEmbeddingModel(cache_dir=tmp_path)
+
+
+def test_onnx_backend_does_not_import_torch(tmp_path):
+    """Criar o backend ONNX (com a KB importada) não carrega o PyTorch."""
+    model_dir = tmp_path / "onnx" / "BAAI--bge-m3" / "int8"
+    model_dir.mkdir(parents=True)
+    (model_dir / "export.json").write_text(
+        json.dumps(
+            {
+                "model_file": "model.int8.onnx",
+                "pooling": "cls",
+                "dimension": 2,
+                "pad_id": 0,
+                "pad_token": "<pad>",
+            }
+        )
+    )
+    # Processo novo: nesta sessão outros testes podem já ter importado tudo
+    script = textwrap.dedent(
+        f"""
+        import json, sys
+        from unittest.mock import MagicMock, patch
+
+        HEAVY = ("sentence_transformers", "torch")
+        attempted = []
+
+        class Recorder:
+            def find_spec(self, name, path=None, target=None):
+                if name.split(".")[0] in HEAVY:
+                    attempted.append(name)
+
+        sys.meta_path.insert(0, Recorder())
+        import mascate.intelligence.rag.knowledge
+        from mascate.intelligence.rag.onnx_embeddings import OnnxEmbeddingModel
+
+        with (
+            patch("{MODULE}.ort", MagicMock()),
+            patch("{MODULE}.Tokenizer", MagicMock()),
+        ):
+            OnnxEmbeddingModel(cache_dir={str(tmp_path)!r})
+        loaded = [m for m in sys.modules if m.split(".")[0] in HEAVY]
+        print(json.dumps({{"attempted": attempted, "loaded": loaded}}))
+        """
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    ).stdout
+
+    assert json.loads(output.splitlines()[-1]) == {"attempted": [], "loaded": []}
@@ -0,0 +1,54 @@
+"""Testes unitários para a quantização de vetores."""
+
+import numpy as np
+import pytest
+
+from mascate.intelligence.rag.quantization import QuantizedVectors, quantize
+
+
+def _vectors(n=200, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_int8_scores_approximate_inner_product():
+    """Os scores int8 ficam próximos do produto interno exato."""
+    vectors = _vectors()
+    quantized = quantize(vectors, "int8")
+    query = vectors[0]
+
+    assert quantized.codes.dtype == np.int8
+    assert quantized.bytes_per_vector == 32
+    np.testing.assert_allclose(quantized.scores(query), vectors @ query, atol=0.02)
+
+
+def test_binary_scores_rank_by_hamming_distance():
+    """O próprio vetor tem distância zero; o oposto, a máxima."""
+    vectors = _vectors()
+    vectors[1] = -vectors[0]
+    quantized = quantize(vectors, "binary")
+
+    scores = quantized.scores(vectors[0])
+
+    assert quantized.bytes_per_vector == 4
+    assert scores[0] == 0
+    assert scores[1] == -32
+    assert scores.argmax() == 0
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    """Códigos gravados são lidos de volta iguais."""
+    quantized = quantize(_vectors(), "int8")
+    quantized.save(tmp_path / "codes.npz")
+
+    loaded = QuantizedVectors.load(tmp_path / "codes.npz", "int8")
+
+    np.testing.assert_array_equal(loaded.codes, quantized.codes)
+    np.testing.assert_array_equal(loaded.scale, quantized.scale)
+
+
+def test_unknown_mode():
+    """Modo desconhecido é rejeitado."""
+    with pytest.raises(ValueError):
+        quantize(_vectors(), "pq")
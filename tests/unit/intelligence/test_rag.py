@@ -1,13 +1,19 @@
 "Testes unitários para o módulo RAG (Parser, KnowledgeBase)."
 
+import json
+import threading
 from unittest.mock import MagicMock, patch
 
 import numpy as np
+import pytest
 
+from mascate.intelligence.rag.embedding_cache import EmbeddingCache
 from mascate.intelligence.rag.embeddings import EmbeddingModel
 from mascate.intelligence.rag.knowledge import KnowledgeBase
+from mascate.intelligence.rag.numpy_db import NumpyVectorDB
 from mascate.intelligence.rag.parser import Chunk, MarkdownParser
-from mascate.intelligence.rag.vectordb import VectorDB
+from mascate.intelligence.rag.retriever import RAGRetriever
+from mascate.intelligence.rag.vectordb import VectorDB, VectorDBError
 
 # --- Parser Tests ---
 
@@ -81,6 +87,31 @@ def test_embedding_model_mock():
         assert emb.embedding_size == 768
 
 
+def test_embedding_model_caches_single_queries():
+    """Consultas únicas repetidas não passam de novo pelo modelo."""
+    with patch("mascate.intelligence.rag.embeddings.SentenceTransformer") as MockST:
+        mock_instance = MockST.return_value
+        mock_instance.encode.side_effect = lambda texts, **_: (
+            np.array([0.6, 0.8])
+            if isinstance(texts, str)
+            else np.tile([0.6, 0.8], (len(texts), 1))
+        )
+
+        emb = EmbeddingModel(cache=EmbeddingCache())
+        first = emb.encode("abre o firefox")
+        again = emb.encode("abre o  firefox ")
+        as_list = emb.encode(["abre o firefox"])
+
+        assert mock_instance.encode.call_count == 1
+        np.testing.assert_allclose(again, first)
+        assert as_list.shape == (1, 2)
+
+        # Lotes e chamadas sem cache vao sempre ao modelo
+        emb.encode(["abre o firefox", "fecha o firefox"])
+        emb.encode("abre o firefox", cache=False)
+        assert mock_instance.encode.call_count == 3
+
+
 # --- VectorDB Tests ---
 
 
@@ -105,13 +136,25 @@ def test_vectordb_mock():
 # --- KnowledgeBase Tests ---
 
 
+def _kb_config(data_dir, workers=1, batch_size=64):
+    """Config mínima da KnowledgeBase (sem cache de embeddings)."""
+    config = MagicMock()
+    config.data_dir = data_dir
+    config.rag.embedding_cache_size = 0
+    config.rag.ingest_workers = workers
+    config.rag.ingest_batch_size = batch_size
+    config.rag.lazy_load = True
+    config.rag.idle_unload_s = 0
+    config.rag.atomic_rebuild = False
+    return config
+
+
 @patch("mascate.intelligence.rag.knowledge.VectorDB")
 @patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
 def test_knowledge_base_ingestion(MockEmb, MockDB, tmp_path):
     """Verifica o fluxo de ingestão: Parse -> Embed -> Upsert."""
     # Setup Config Mock
-    config = MagicMock()
-    config.data_dir = tmp_path
+    config = _kb_config(tmp_path)
 
     # Setup Mocks
     mock_emb_instance = MockEmb.return_value
@@ -126,8 +169,416 @@ def test_knowledge_base_ingestion(MockEmb, MockDB, tmp_path):
     f = tmp_path / "doc.md"
     f.write_text("# Test\nContent.", encoding="utf-8")
 
+    assert kb.version == 0
     count = kb.ingest_directory(tmp_path)
 
     assert count == 1  # 1 chunk
+    # A ingestão marca uma nova versão da base (invalida caches)
+    assert kb.version == 1
     mock_emb_instance.encode.assert_called()
     mock_db_instance.upsert.assert_called_once()
+
+    f.write_text("# Test\nOutro conteudo.", encoding="utf-8")
+    kb.ingest_directory(tmp_path)
+    assert kb.version == 2
+    # Sem mudanças a versão não avança
+    kb.ingest_directory(tmp_path)
+    assert KnowledgeBase(config).version == 2
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_knowledge_base_stores_token_counts(MockEmb, MockDB, tmp_path):
+    """Verifica que a contagem de tokens de cada chunk vai para o payload."""
+    config = _kb_config(tmp_path)
+    MockEmb.return_value.embedding_size = 10
+    MockEmb.return_value.encode.return_value = np.zeros((1, 10))
+
+    kb = KnowledgeBase(config, token_counter=lambda text: len(text.split()))
+    (tmp_path / "doc.md").write_text("# Test\nUm dois tres.", encoding="utf-8")
+    kb.ingest_directory(tmp_path)
+
+    payload = MockDB.return_value.upsert.call_args[1]["payloads"][0]
+    assert payload["n_tokens"] == len(payload["content"].split())
+
+
+def _sync_kb(MockEmb, tmp_path, **config_args):
+    """KnowledgeBase com embedding falso (um vetor por texto)."""
+    config = _kb_config(tmp_path / "data", **config_args)
+    MockEmb.return_value.embedding_size = 10
+    MockEmb.return_value.encode.side_effect = lambda texts: np.zeros((len(texts), 10))
+    return KnowledgeBase(config)
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_skips_unchanged_files(MockEmb, _mock_db, tmp_path):
+    """Uma segunda sincronização sem mudanças não gera embeddings."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# A\nConteudo A.", encoding="utf-8")
+    (docs / "b.md").write_text("# B\nConteudo B.", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path)
+
+    first = kb.sync_directory(docs)
+    assert (first.added, first.chunks_indexed) == (2, 2)
+    # O indice BM25 e atualizado e salvo junto
+    assert len(kb.sparse_index) == 2
+    assert (tmp_path / "data" / "bm25_index.json").exists()
+
+    MockEmb.return_value.encode.reset_mock()
+    version = kb.version
+    second = kb.sync_directory(docs)
+
+    assert (second.added, second.updated, second.unchanged) == (0, 0, 2)
+    MockEmb.return_value.encode.assert_not_called()
+    assert kb.version == version
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_updates_changed_file(MockEmb, MockDB, tmp_path):
+    """Só os chunks novos são indexados e os antigos são removidos."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    doc = docs / "a.md"
+    doc.write_text("# Fixa\nNao muda.\n# Var\nVersao um.", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path)
+    kb.sync_directory(docs)
+    old_ids = MockDB.return_value.upsert.call_args[1]["ids"]
+
+    doc.write_text("# Fixa\nNao muda.\n# Var\nVersao dois, maior.", encoding="utf-8")
+    report = kb.sync_directory(docs)
+
+    assert (report.updated, report.chunks_indexed, report.chunks_deleted) == (1, 1, 1)
+    new_ids = MockDB.return_value.upsert.call_args[1]["ids"]
+    assert len(new_ids) == 1
+    assert new_ids[0] not in old_ids
+    deleted = MockDB.return_value.delete.call_args[0][1]
+    assert len(deleted) == 1
+    assert deleted[0] in old_ids
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_removes_deleted_file(MockEmb, MockDB, tmp_path):
+    """Chunks de arquivos apagados saem do Qdrant e do manifesto."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# A\nConteudo A.", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path)
+    kb.sync_directory(docs)
+    ids = MockDB.return_value.upsert.call_args[1]["ids"]
+
+    (docs / "a.md").unlink()
+    report = kb.sync_directory(docs)
+
+    assert (report.removed, report.chunks_deleted) == (1, 1)
+    assert kb.sparse_index.search("conteudo") == []
+    MockDB.return_value.delete.assert_called_with(KnowledgeBase.COLLECTION_NAME, ids)
+    assert kb.sync_directory(docs).removed == 0
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_reindexes_when_collection_is_empty(MockEmb, MockDB, tmp_path):
+    """Se o banco foi apagado, o manifesto é ignorado."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# A\nConteudo A.", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path)
+    kb.sync_directory(docs)
+
+    MockDB.return_value.count.return_value = 0
+    assert kb.sync_directory(docs).added == 1
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_batches_chunks_across_files(MockEmb, _mock_db, tmp_path):
+    """Chunks de vários arquivos vão em um lote, ordenados por tamanho."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name, body in (
+        ("a", "texto bem mais comprido"),
+        ("b", "curto"),
+        ("c", "medio a"),
+    ):
+        (docs / f"{name}.md").write_text(f"# {name}\n{body}", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path)
+
+    kb.sync_directory(docs)
+
+    MockEmb.return_value.encode.assert_called_once()
+    texts = MockEmb.return_value.encode.call_args[0][0]
+    assert texts == sorted(texts, key=len)
+    assert len(texts) == 3
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_splits_upserts_by_size(MockEmb, MockDB, tmp_path):
+    """A escrita no banco respeita o tamanho máximo de lote."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(5):
+        (docs / f"{i}.md").write_text(f"# Doc\nConteudo {i}.", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path, batch_size=3)
+    kb.upsert_batch_size = 2
+
+    assert kb.sync_directory(docs).chunks_indexed == 5
+
+    sizes = [len(c[1]["ids"]) for c in MockDB.return_value.upsert.call_args_list]
+    assert sizes == [2, 1, 2]
+    assert MockEmb.return_value.encode.call_count == 2
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_propagates_writer_errors(MockEmb, MockDB, tmp_path):
+    """Falhas na thread de escrita chegam a quem chamou e o manifesto não é salvo."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# A\nConteudo A.", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path)
+    MockDB.return_value.upsert.side_effect = VectorDBError("disco cheio")
+
+    with pytest.raises(VectorDBError):
+        kb.sync_directory(docs)
+    assert not kb.manifest_path.exists()
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_sync_parses_in_process_pool(MockEmb, _mock_db, tmp_path):
+    """Com vários workers o resultado é o mesmo da leitura serial."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(4):
+        (docs / f"{i}.md").write_text(f"# Doc {i}\nConteudo {i}.", encoding="utf-8")
+    kb = _sync_kb(MockEmb, tmp_path, workers=2)
+
+    report = kb.sync_directory(docs)
+
+    assert (report.added, report.chunks_indexed) == (4, 4)
+    manifest = json.loads(kb.manifest_path.read_text(encoding="utf-8"))
+    assert len(manifest["files"]) == 4
+
+
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_numpy_backend_end_to_end(MockEmb, tmp_path):
+    """Com vector_backend='numpy' a base indexa e busca sem o Qdrant."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# A\nabre o firefox", encoding="utf-8")
+    (docs / "b.md").write_text("# B\ntoca musica", encoding="utf-8")
+    config = _kb_config(tmp_path / "data")
+    config.rag.vector_backend = "numpy"
+    config.rag.vector_dtype = "float32"
+    config.rag.vector_quantization = "none"
+    config.rag.rescore_oversampling = 4.0
+    MockEmb.return_value.embedding_size = 2
+    MockEmb.return_value.encode.side_effect = lambda texts: np.array(
+        [[1.0, 0.0] if "firefox" in t else [0.0, 1.0] for t in texts]
+        if isinstance(texts, list)
+        else [1.0, 0.0]
+    )
+
+    kb = KnowledgeBase(config)
+    kb.upsert_batch_size = 1
+    save = NumpyVectorDB._save
+    with patch.object(NumpyVectorDB, "_save", autospec=True, side_effect=save) as saves:
+        assert kb.sync_directory(docs).chunks_indexed == 2
+    saves.assert_called_once()  # Os dois lotes são gravados de uma vez
+
+    assert kb.search("navegador", limit=1) == ["abre o firefox"]
+    assert kb.manifest_path.name == "knowledge_manifest.numpy.json"
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_knowledge_base_loads_lazily_and_unloads_when_idle(MockEmb, MockDB, tmp_path):
+    """Modelo e banco só abrem no primeiro uso e saem após ficarem ociosos."""
+    config = _kb_config(tmp_path)
+    MockEmb.return_value.embedding_size = 2
+    MockEmb.return_value.encode.return_value = np.array([1.0, 0.0])
+    MockDB.return_value.search.return_value = []
+
+    kb = KnowledgeBase(config)
+    assert not kb.loaded
+    MockEmb.assert_not_called()
+    MockDB.assert_not_called()
+
+    kb.search("firefox")
+    assert kb.loaded
+    MockDB.return_value.ensure_collection.assert_called_once_with(
+        KnowledgeBase.COLLECTION_NAME, vector_size=2
+    )
+
+    kb.idle_unload_s = 60
+    assert not kb.unload_if_idle()  # Usado agora há pouco
+    kb.idle_unload_s = 0
+    assert kb.unload_if_idle()
+    assert not kb.loaded
+    MockDB.return_value.close.assert_called_once()
+
+    kb.preload().join(timeout=5)
+    assert kb.loaded
+    assert MockEmb.call_count == 2
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_unload_waits_for_in_flight_search(MockEmb, MockDB, tmp_path):
+    """O descarte por ociosidade não fecha o banco no meio de uma busca."""
+    config = _kb_config(tmp_path)
+    MockEmb.return_value.embedding_size = 2
+    MockEmb.return_value.encode.return_value = np.array([1.0, 0.0])
+    searching, release = threading.Event(), threading.Event()
+
+    def _search(**_kwargs):
+        searching.set()
+        assert release.wait(timeout=5)
+        return []
+
+    MockDB.return_value.search.side_effect = _search
+    kb = KnowledgeBase(config)
+    kb.idle_unload_s = 0
+    retriever = RAGRetriever(kb)
+    thread = threading.Thread(target=retriever.search, args=("firefox",))
+    thread.start()
+    assert searching.wait(timeout=5)
+
+    assert not kb.unload_if_idle()
+    MockDB.return_value.close.assert_not_called()
+
+    release.set()
+    thread.join(timeout=5)
+    assert kb.unload_if_idle()
+    MockDB.return_value.close.assert_called_once()
+
+
+@patch("mascate.intelligence.rag.knowledge.VectorDB")
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_knowledge_base_eager_load(MockEmb, MockDB, tmp_path):
+    """Com lazy_load desligado, tudo é carregado na construção."""
+    config = _kb_config(tmp_path)
+    config.rag.lazy_load = False
+    MockEmb.return_value.embedding_size = 2
+
+    kb = KnowledgeBase(config)
+
+    assert kb.loaded
+    MockDB.return_value.ensure_collection.assert_called_once()
+
+
+def _atomic_kb(tmp_path, MockEmb, backend):
+    """KB real (numpy ou Qdrant local) com reconstrução atômica ligada."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# A\nabre o firefox", encoding="utf-8")
+    (docs / "b.md").write_text("# B\ntoca musica", encoding="utf-8")
+    config = _kb_config(tmp_path / "data")
+    config.rag.vector_backend = backend
+    config.rag.vector_dtype = "float32"
+    config.rag.vector_quantization = "none"
+    config.rag.rescore_oversampling = 4.0
+    config.rag.atomic_rebuild = True
+    MockEmb.return_value.embedding_size = 2
+
+    def encode(texts):
+        if isinstance(texts, str):
+            return np.array([1.0, 0.0])
+        if any("quebra" in t for t in texts):
+            raise RuntimeError("falha no embedding")
+        return np.array([[1.0, 0.0] if "firefox" in t else [0.0, 1.0] for t in texts])
+
+    MockEmb.return_value.encode.side_effect = encode
+    return KnowledgeBase(config), docs
+
+
+@pytest.mark.parametrize("backend", ["numpy", "qdrant"])
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_atomic_rebuild_swaps_generations(MockEmb, tmp_path, backend):
+    """A ingestão grava uma geração nova; as buscas veem a antiga até a troca."""
+    kb, docs = _atomic_kb(tmp_path, MockEmb, backend)
+    assert kb.sync_directory(docs).chunks_indexed == 2
+    assert (kb.generation, kb.previous_generation) == (1, 0)
+    assert kb.search("navegador", limit=1) == ["abre o firefox"]
+
+    seen_during_rebuild = []
+    verify = kb._verify_generation
+
+    def verify_and_search(*args):
+        seen_during_rebuild.extend(kb.search("navegador", limit=1))
+        verify(*args)
+
+    kb._verify_generation = verify_and_search
+    (docs / "a.md").write_text("# A\nabre o firefox nightly", encoding="utf-8")
+    report = kb.sync_directory(docs)
+
+    assert (report.updated, report.chunks_indexed, report.chunks_deleted) == (1, 1, 1)
+    assert seen_during_rebuild == ["abre o firefox"]
+    assert kb.search("navegador", limit=1) == ["abre o firefox nightly"]
+    assert (kb.generation, kb.previous_generation) == (2, 1)
+    assert kb.vectordb.count(kb.COLLECTION_NAME) == len(kb.sparse_index) == 2
+    assert kb.version == 2
+    # Só a geração ativa e a anterior ficam guardadas
+    assert not kb.vectordb.collection_exists(kb.COLLECTION_NAME)
+    assert kb.manifest_path.name.endswith(".g2.json")
+
+    # Nada mudou: nenhuma geração nova
+    assert kb.sync_directory(docs).unchanged == 2
+    assert kb.generation == 2
+
+    assert kb.rollback()
+    assert (kb.generation, kb.previous_generation) == (1, 2)
+    assert kb.search("navegador", limit=1) == ["abre o firefox"]
+    assert kb.version == 3
+
+
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_atomic_rebuild_fallback_keeps_other_directories(MockEmb, tmp_path):
+    """Reindexar após uma cópia incompleta não apaga outros diretórios da base."""
+    kb, docs = _atomic_kb(tmp_path, MockEmb, "numpy")
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    (notes / "n.md").write_text("# N\nabre o firefox em outra pasta", encoding="utf-8")
+    kb.sync_directory(docs)
+    kb.sync_directory(notes)
+    # Geração ativa sem um dos pontos: a cópia para a geração nova falha
+    manifest = json.loads(kb.manifest_path.read_text(encoding="utf-8"))
+    lost = manifest["files"][str(docs.resolve() / "a.md")]["chunk_ids"]
+    kb.vectordb.delete(kb.COLLECTION_NAME, lost)
+
+    (docs / "c.md").write_text("# C\ntoca podcast", encoding="utf-8")
+    kb.sync_directory(docs)
+
+    manifest = json.loads(kb.manifest_path.read_text(encoding="utf-8"))
+    assert str(notes.resolve() / "n.md") in manifest["files"]
+    assert kb.vectordb.count(kb.COLLECTION_NAME) == len(kb.sparse_index) == 4
+    assert "abre o firefox em outra pasta" in kb.search("navegador", limit=4)
+
+
+@patch("mascate.intelligence.rag.knowledge.EmbeddingModel")
+def test_atomic_rebuild_failure_keeps_live_generation(MockEmb, tmp_path):
+    """Uma falha no meio da ingestão descarta a geração nova sem tocar a ativa."""
+    kb, docs = _atomic_kb(tmp_path, MockEmb, "numpy")
+    kb.sync_directory(docs)
+    pointer = kb.generation_path.read_text(encoding="utf-8")
+
+    (docs / "c.md").write_text("# C\nquebra tudo", encoding="utf-8")
+    (docs / "b.md").unlink()
+    with pytest.raises(RuntimeError, match="falha no embedding"):
+        kb.sync_directory(docs)
+
+    assert kb.generation == 1
+    assert kb.generation_path.read_text(encoding="utf-8") == pointer
+    assert kb.vectordb.count(kb.COLLECTION_NAME) == 2
+    assert not (tmp_path / "data" / "numpy_db" / "mascate_knowledge_g2").exists()
+    assert kb.version == 1
+
+    # Um novo processo abre a geração que estava ativa
+    reopened = KnowledgeBase(kb.config)
+    assert reopened.generation == 1
+    assert reopened.search("navegador", limit=2) == ["abre o firefox", "toca musica"]
@@ -3,6 +3,8 @@
 from dataclasses import dataclass
 from unittest.mock import patch
 
+import pytest
+
 from mascate.intelligence.rag.retriever import RAGRetriever, SearchResult
 
 
@@ -10,17 +12,25 @@ from mascate.intelligence.rag.retriever import RAGRetriever, SearchResult
 class MockScoredPoint:
     score: float
     payload: dict
+    id: str = ""
 
 
 @patch("mascate.intelligence.rag.knowledge.KnowledgeBase")
 def test_retriever_initialization(MockKB):
-    """Verifica se o retriever cria índice de texto."""
+    """Verifica se o retriever cria índice de texto na primeira busca."""
     kb = MockKB()
     kb.COLLECTION_NAME = "test_coll"
+    kb.vectordb.search.return_value = []
+    kb.vectordb.resolve.side_effect = lambda name: name
+
+    retriever = RAGRetriever(kb)
+    # O banco vetorial só abre sob demanda
+    kb.vectordb.client.create_payload_index.assert_not_called()
 
-    RAGRetriever(kb)
+    retriever.search("teste")
+    retriever.search("teste")
 
-    kb.vectordb.client.create_payload_index.assert_called_with(
+    kb.vectordb.client.create_payload_index.assert_called_once_with(
         collection_name="test_coll", field_name="content", field_schema="text"
     )
 
@@ -50,6 +60,72 @@ def test_dense_search(MockKB):
     kb.vectordb.search.assert_called_once()
 
 
+@patch("mascate.intelligence.rag.knowledge.KnowledgeBase")
+def test_hybrid_search_fuses_rankings(MockKB):
+    """Documentos bem colocados nas duas buscas sobem; os só do BM25 entram."""
+    kb = MockKB()
+    kb.embedding_model.encode.return_value = [0.1, 0.2]
+    kb.vectordb.search.return_value = [
+        MockScoredPoint(0.9, {"content": "denso", "source": "a"}, id="a"),
+        MockScoredPoint(0.8, {"content": "ambos", "source": "b"}, id="b"),
+    ]
+    kb.sparse_index.search.return_value = [
+        MockScoredPoint(7.0, {"content": "ambos", "source": "b"}, id="b"),
+        MockScoredPoint(3.0, {"content": "palavra", "source": "c"}, id="c"),
+    ]
+
+    retriever = RAGRetriever(kb, hybrid=True, rrf_k=60)
+    results = retriever.search("query teste", top_k=3)
+
+    assert [r.source for r in results] == ["b", "a", "c"]
+    # 1.0 = primeiro lugar nas duas listas
+    assert results[0].score == pytest.approx((1 / 62 + 1 / 61) / (2 / 61))
+    # O cosseno fica separado do score fundido
+    assert [r.dense_score for r in results] == [0.8, 0.9, None]
+    kb.sparse_index.search.assert_called_once_with("query teste", 6)
+
+
+@patch("mascate.intelligence.rag.knowledge.KnowledgeBase")
+def test_hybrid_search_applies_sparse_threshold_before_fusion(MockKB):
+    """Um acerto fraco do BM25 não vira contexto quando a busca densa não acha nada."""
+    kb = MockKB()
+    kb.embedding_model.encode.return_value = [0.1, 0.2]
+    kb.vectordb.search.return_value = []  # Nada acima de score_threshold
+    kb.sparse_index.search.return_value = [
+        MockScoredPoint(0.7, {"content": "palavra comum", "source": "c"}, id="c"),
+    ]
+
+    retriever = RAGRetriever(kb, hybrid=True, sparse_threshold=1.5)
+
+    assert retriever.search("qual a populacao do brasil") == []
+    assert kb.vectordb.search.call_args[1]["score_threshold"] == 0.3
+
+
+@patch("mascate.intelligence.rag.knowledge.KnowledgeBase")
+def test_search_cache_is_invalidated_by_kb_version(MockKB):
+    """Consultas repetidas vêm do cache até a versão da KB mudar."""
+    kb = MockKB()
+    kb.version = 1
+    kb.embedding_model.encode.return_value = [0.1, 0.2]
+    kb.vectordb.search.return_value = [
+        MockScoredPoint(0.9, {"content": "Texto 1", "source": "doc1"}),
+    ]
+    retriever = RAGRetriever(kb, cache_size=2)
+
+    first = retriever.search("abre o firefox")
+    again = retriever.search("abre o  firefox ")
+    assert again == first
+    assert kb.vectordb.search.call_count == 1
+
+    # top_k diferente é outra entrada
+    retriever.search("abre o firefox", top_k=1)
+    assert kb.vectordb.search.call_count == 2
+
+    kb.version = 2
+    retriever.search("abre o firefox")
+    assert kb.vectordb.search.call_count == 3
+
+
 @patch("mascate.intelligence.rag.knowledge.KnowledgeBase")
 def test_format_context(MockKB):
     """Verifica formatação do contexto para LLM."""
@@ -0,0 +1,110 @@
+"""Testes unitários para o roteador de fast path."""
+
+import json
+
+import pytest
+
+from mascate.core.metrics import get_metrics, reset_metrics
+from mascate.intelligence.router import FastPathRouter
+
+
+@pytest.fixture
+def router():
+    reset_metrics()
+    return FastPathRouter()
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Abre o Firefox.", {"action": "open_app", "target": "firefox"}),
+        (
+            "abra o site github.com",
+            {"action": "open_url", "target": "https://github.com"},
+        ),
+        (
+            "Mascate, aumenta o volume em trinta %",
+            {
+                "action": "system_op",
+                "target": "volume",
+                "params": {"action": "up", "value": 30},
+            },
+        ),
+        (
+            "coloca o volume em 50",
+            {
+                "action": "system_op",
+                "target": "volume",
+                "params": {"action": "set", "value": 50},
+            },
+        ),
+        (
+            "entra em g1.globo.com/economia",
+            {"action": "open_url", "target": "https://g1.globo.com/economia"},
+        ),
+        (
+            "acessa www.exemplo.xyz",
+            {"action": "open_url", "target": "https://www.exemplo.xyz"},
+        ),
+        (
+            "abre o site openai.ai",
+            {"action": "open_url", "target": "https://openai.ai"},
+        ),
+        ("Próxima música", {"action": "media_control", "target": "next"}),
+        ("bloqueia a tela", {"action": "system_op", "target": "lock"}),
+        (
+            "desliga o wi-fi",
+            {"action": "system_op", "target": "wifi", "params": {"action": "off"}},
+        ),
+    ],
+)
+def test_route_matches(router, text, expected):
+    """Frases frequentes viram Intent com slots extraídos."""
+    intent = router.route(text)
+
+    assert intent is not None
+    assert json.loads(intent.raw_json) == expected
+    assert intent.action == expected["action"]
+    assert intent.params == expected.get("params", {})
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "abre a pasta documentos",
+        "abre o visual studio code",
+        "qual a previsão do tempo",
+        "abre o relatorio.pdf",
+        "abre o notas.txt",
+    ],
+)
+def test_route_falls_back(router, text):
+    """Frases fora das regras (ou ambíguas) seguem para o Brain."""
+    assert router.route(text) is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "qual a população do brasil",
+        "o computador está pausado",
+        "não abre o firefox",
+        "explica como desligar o wifi com nmcli",
+        "hmm acho que é melhor pausa a musica",
+    ],
+)
+def test_route_requires_whole_phrase(router, text):
+    """Comandos dentro de frases maiores não disparam ações."""
+    assert router.route(text) is None
+
+
+def test_hit_rate_metrics(router):
+    """Acertos e erros são contabilizados."""
+    router.route("pausa")
+    router.route("abre o firefox")
+    router.route("me conta uma piada")
+
+    assert router.hit_rate == 2 / 3
+    assert get_metrics().get("router.fast_path.hits") == 2
+    assert get_metrics().get("router.fast_path.misses") == 1
+    assert get_metrics().timing("router.fast_path").count == 3
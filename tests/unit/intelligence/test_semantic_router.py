@@ -0,0 +1,165 @@
+"""Testes unitários para o roteador semântico por exemplos."""
+
+import json
+import os
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from mascate.core.metrics import get_metrics, reset_metrics
+from mascate.intelligence.semantic_router import SemanticRouter
+
+_VOCAB: dict[str, int] = {}
+
+
+def _bag_of_words(texts):
+    """Embedding falso: saco de palavras normalizado."""
+    vectors = np.zeros((len(texts), 256))
+    for i, text in enumerate(texts):
+        for word in text.split():
+            vectors[i, _VOCAB.setdefault(word, len(_VOCAB))] += 1.0
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def embedding_model():
+    model = MagicMock()
+    model.encode.side_effect = _bag_of_words
+    return model
+
+
+@pytest.fixture(autouse=True)
+def _metrics():
+    reset_metrics()
+
+
+def test_route_paraphrase(embedding_model):
+    """Paráfrase próxima de um exemplo vira Intent."""
+    router = SemanticRouter(embedding_model)
+
+    intent = router.route("Tá muito alto mesmo!")
+
+    assert intent is not None
+    assert intent.action == "system_op"
+    assert intent.params == {"action": "down"}
+    assert json.loads(intent.raw_json)["target"] == "volume"
+    assert router.hit_rate == 1.0
+
+
+def test_route_below_threshold(embedding_model):
+    """Frases distantes de todos os exemplos seguem para o Brain."""
+    router = SemanticRouter(embedding_model)
+
+    assert router.route("qual a capital da franca") is None
+    assert get_metrics().get("router.semantic.misses") == 1
+
+
+def test_route_ambiguous(embedding_model):
+    """Sem margem entre as duas melhores intenções, não decide."""
+    router = SemanticRouter(embedding_model, threshold=0.5)
+
+    # Igualmente próximo de 'ta muito alto' e 'ta muito baixo'
+    assert router.route("ta muito") is None
+    assert get_metrics().get("router.semantic.ambiguous") == 1
+
+
+def test_exemplars_embedded_on_first_route(embedding_model):
+    """Criar o roteador não carrega o modelo; a matriz é montada na 1ª consulta."""
+    router = SemanticRouter(embedding_model)
+    embedding_model.encode.assert_not_called()
+    assert len(router) == 0
+
+    assert router.route("passa essa musica").target == "next"
+    assert len(router) > 0
+    embedding_model.encode.reset_mock()
+
+    router.route("ta muito alto")
+    embedding_model.encode.assert_called_once()
+
+
+def test_route_skips_numbers(embedding_model):
+    """Valores numéricos não são extraídos por similaridade."""
+    router = SemanticRouter(embedding_model)
+
+    assert router.route("ta muito alto, deixa em trinta") is None
+    embedding_model.encode.assert_not_called()
+
+
+def test_learn_persists_and_reloads(embedding_model, tmp_path):
+    """Comandos aprendidos são usados na hora e sobrevivem ao reinício."""
+    path = tmp_path / "router_exemplars.json"
+    router = SemanticRouter(embedding_model, exemplars_path=path)
+    intent = {"action": "system_op", "target": "wifi", "params": {"action": "off"}}
+
+    assert router.route("corta a internet") is None
+    assert router.learn("Corta a internet", intent)
+    assert not router.learn("corta a internet", intent)  # Duplicado
+    assert router.route("corta a internet").target == "wifi"
+
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    assert stored == [
+        {
+            "text": "corta a internet",
+            "intent": {
+                "action": "system_op",
+                "target": "wifi",
+                "params": {"action": "off"},
+            },
+        }
+    ]
+    restarted = SemanticRouter(embedding_model, exemplars_path=path)
+    assert restarted.route("corta a internet").params == {"action": "off"}
+
+
+@pytest.mark.parametrize(
+    "intent",
+    [
+        {"action": "open_app", "target": "firefox"},
+        {"action": "open_url", "target": "g1.com.br"},
+        {"action": "file_op", "target": "~/notas.txt", "params": {"operation": "open"}},
+        {"action": "reply", "target": "Oi!"},
+        {"action": "system_op", "target": "notification", "params": {"title": "oi"}},
+    ],
+)
+def test_learn_skips_free_targets(embedding_model, tmp_path, intent):
+    """Alvos ou parâmetros livres não viram exemplo (generalizariam errado)."""
+    path = tmp_path / "router_exemplars.json"
+    router = SemanticRouter(embedding_model, exemplars_path=path)
+
+    assert not router.learn("quero navegar na internet", intent)
+    assert not path.exists()
+    embedding_model.encode.assert_not_called()
+
+
+def test_learning_disabled(embedding_model, tmp_path):
+    """Com aprendizado desligado, nada é gravado."""
+    path = tmp_path / "router_exemplars.json"
+    router = SemanticRouter(embedding_model, exemplars_path=path, learning=False)
+
+    assert not router.learn("pula essa", {"action": "media_control", "target": "next"})
+    assert not path.exists()
+
+
+def test_hot_reload(embedding_model, tmp_path):
+    """Alterações no arquivo de exemplos são recarregadas sem reiniciar."""
+    path = tmp_path / "router_exemplars.json"
+    router = SemanticRouter(embedding_model, exemplars_path=path)
+    assert router.route("abre meu editor") is None
+    size = len(router)
+
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "text": "abre meu editor",
+                    "intent": {"action": "open_app", "target": "code"},
+                }
+            ]
+        ),
+        encoding="utf-8",
+    )
+    os.utime(path, (1, 1))
+
+    assert router.route("abre meu editor").target == "code"
+    assert len(router) == size + 1
@@ -0,0 +1,33 @@
+"""Testes unitários para a normalização de transcrições."""
+
+import pytest
+
+from mascate.intelligence.text import normalize_transcript, strip_accents
+
+
+def test_strip_accents():
+    """Remove acentos mantendo as letras."""
+    assert strip_accents("Próxima música, não") == "Proxima musica, nao"
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("Abre o Firefox.", "abre o firefox"),
+        ("Mascate, próxima música por favor!", "proxima musica"),
+        ("abra o site github.com", "abra o site github.com"),
+        ("volume em trinta %", "volume em 30 por cento"),
+        ("volume em vinte e cinco", "volume em 25"),
+        ("cento e vinte e dois", "122"),
+        ("abre uma aba", "abre uma aba"),
+        ("dois e três", "2 e 3"),
+        ("abre o firefox, por favor.", "abre o firefox"),
+        ("ai, abre o firefox entao", "abre o firefox"),
+        ("abre openai.ai", "abre openai.ai"),
+        ("abre o site x.ai", "abre o site x.ai"),
+        ("entra em ai.com", "entra em ai.com"),
+    ],
+)
+def test_normalize_transcript(raw, expected):
+    """Normaliza caixa, acentos, pontuação, fillers e números."""
+    assert normalize_transcript(raw) == expected